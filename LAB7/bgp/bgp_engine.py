@@ -0,0 +1,710 @@
+import os
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import deque
+
+# The topology readers are shared with the other simulators in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from topology import barabasi_albert_edges, read_as_links, read_as_relationships, write_as_relationships
+except ImportError:
+    print("Error: Could not import from topology.py.")
+    print("Make sure topology.py is in the LAB7 directory.")
+    exit(1)
+
+
+NO_ROUTE = -1
+
+
+def _read(table: array, prefix: int) -> int:
+    return table[prefix] if prefix < len(table) else NO_ROUTE
+
+
+def _write(table: array, prefix: int, attr: int):
+    if prefix >= len(table):
+        table.extend([NO_ROUTE] * (prefix + 1 - len(table)))
+    table[prefix] = attr
+
+
+class AttributeTable:
+    """
+    Shared, deduplicated BGP path attributes.
+
+    Every distinct (AS path, next hop, local-pref, MED) set is stored once,
+    column by column, and the RIBs refer to it by a small integer id. Ids
+    are reference counted and reused once no RIB entry points at them. AS
+    paths must be interned: the table keys on their identity.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.as_path = []
+        self.next_hop = []      # neighbor ASN, None for a local route
+        self.local_pref = []
+        self.med = []
+        # Decision-process order: higher local-pref, shorter AS path,
+        # lower MED, lower next-hop ASN
+        self.rank = []
+        self.refs = []
+        self.free = []
+
+    def intern(self, as_path: tuple, next_hop, local_pref: int, med: int) -> int:
+        key = (id(as_path), next_hop, local_pref, med)
+        attr = self.index.get(key)
+        if attr is not None:
+            return attr
+        rank = (-local_pref, len(as_path), med, -1 if next_hop is None else next_hop)
+        if self.free:
+            attr = self.free.pop()
+            self.as_path[attr] = as_path
+            self.next_hop[attr] = next_hop
+            self.local_pref[attr] = local_pref
+            self.med[attr] = med
+            self.rank[attr] = rank
+        else:
+            attr = len(self.as_path)
+            self.as_path.append(as_path)
+            self.next_hop.append(next_hop)
+            self.local_pref.append(local_pref)
+            self.med.append(med)
+            self.rank.append(rank)
+            self.refs.append(0)
+        self.index[key] = attr
+        return attr
+
+    def incref(self, attr: int):
+        self.refs[attr] += 1
+
+    def decref(self, attr: int):
+        self.refs[attr] -= 1
+        if self.refs[attr] == 0:
+            del self.index[(id(self.as_path[attr]), self.next_hop[attr], self.local_pref[attr], self.med[attr])]
+            self.as_path[attr] = self.rank[attr] = None
+            self.free.append(attr)
+
+    def discard(self, attr: int):
+        """Forgets a freshly interned attribute set that no RIB ended up using."""
+        if self.refs[attr] == 0:
+            self.refs[attr] = 1
+            self.decref(attr)
+
+    def nbytes(self) -> int:
+        total = sys.getsizeof(self.index) + sum(sys.getsizeof(key) for key in self.index)
+        for column in (self.as_path, self.next_hop, self.local_pref, self.med, self.rank, self.refs):
+            total += sys.getsizeof(column)
+        total += sum(sys.getsizeof(rank) for rank in self.rank if rank is not None)
+        return total
+
+    def __len__(self):
+        return len(self.index)
+
+
+class BGPEngine:
+    """
+    Event-driven BGP path-vector engine.
+
+    Every AS keeps, per neighbor session, the routes that neighbor
+    advertised (Adj-RIB-In) and its own best route per prefix (Loc-RIB).
+    Both are dense arrays indexed by prefix id that hold attribute ids into
+    one shared AttributeTable, so a route costs 4 bytes per RIB and each
+    distinct attribute set is stored once however many RIBs use it.
+
+    UPDATE messages carry one attribute set and every prefix it applies to;
+    WITHDRAW messages carry prefixes. They travel through a FIFO event queue
+    with a fixed link delay, so the virtual clock only moves forward. The
+    decision process only runs for prefixes whose candidate set changed,
+    and only rescans the Adj-RIB-Ins when the current best route got worse
+    or went away. An AS advertises only when its best route changes and
+    never sends a path to a neighbor already on it.
+
+    AS paths are interned tuples (origin last): prepending an ASN to a
+    known path returns the shared tuple. Best path: highest local-pref,
+    shortest AS path, lowest MED, lowest next-hop ASN.
+    """
+
+    DEFAULT_LOCAL_PREF = 100
+
+    def __init__(self, links, link_delay: float = 0.01):
+        self.neighbors = {}
+        for u, v in links:
+            if u != v:
+                self.neighbors.setdefault(u, set()).add(v)
+                self.neighbors.setdefault(v, set()).add(u)
+        self.link_delay = link_delay
+
+        # Prefix strings are mapped to small ints, the RIB array index
+        self.prefixes = []
+        self.prefix_index = {}
+        self.attributes = AttributeTable()
+        self.adj_rib_in = {asn: {peer: array('i') for peer in peers} for asn, peers in self.neighbors.items()}
+        self.loc_rib = {asn: array('i') for asn in self.neighbors}
+        # (asn, neighbor) -> MED sent to that neighbor (default 0)
+        self.med_out = {}
+
+        # (asn, id(tail)) -> (asn,) + tail; the tails are interned too,
+        # so their ids are stable for the life of the engine
+        self.paths = {}
+
+        self.now = 0.0
+        self.queue = deque()
+        self.messages = {'update': 0, 'withdraw': 0}
+        self.prefix_updates = {'update': 0, 'withdraw': 0}
+        self.events_processed = 0
+        self.best_path_runs = 0
+        self.adj_entries = 0
+        self.peak_adj_entries = 0
+        self.last_change = 0.0
+
+    # --- Paths and policy ---
+
+    def _prepend(self, asn, tail: tuple) -> tuple:
+        key = (asn, id(tail))
+        path = self.paths.get(key)
+        if path is None:
+            path = self.paths[key] = (asn,) + tail
+        return path
+
+    def import_local_pref(self, asn, neighbor) -> int:
+        """Local-pref given to routes AS `asn` learns from `neighbor`."""
+        return self.DEFAULT_LOCAL_PREF
+
+    def _export_neighbors(self, asn, learned_from):
+        """
+        Neighbors AS `asn` may send a route learned from `learned_from`
+        (None for its own prefixes) to. Without policy: all of them.
+        """
+        return self.neighbors[asn]
+
+    def _exportable_routes(self, asn, neighbor) -> list:
+        """Loc-RIB entries to send over a new session, as _advertise changes."""
+        return [(prefix, None, attr) for prefix, attr in enumerate(self.loc_rib[asn]) if attr != NO_ROUTE]
+
+    def set_med(self, asn, neighbor, med: int):
+        """MED that AS `asn` attaches to the routes it sends `neighbor`."""
+        self.med_out[(asn, neighbor)] = med
+
+    # --- Sending ---
+
+    def _advertise(self, asn, changes, only_to=None):
+        """
+        Tells the neighbors about best-route changes, given as
+        (prefix, old path or None, new attribute id or NO_ROUTE). Prefixes
+        with the same new attributes share one UPDATE per neighbor; lost
+        routes share one WITHDRAW. Neighbors on a path never got it, so
+        they get neither that path nor a withdrawal of it.
+        """
+        attrs = self.attributes
+        advertised = {}
+        updates = {}
+        withdrawn = {}
+        for prefix, old_path, new in changes:
+            targets = ()
+            if new != NO_ROUTE:
+                path = advertised.get(new)
+                if path is None:
+                    path = attrs.as_path[new]
+                    if attrs.next_hop[new] is not None:
+                        path = self._prepend(asn, path)
+                    advertised[new] = path
+                targets = self._export_neighbors(asn, attrs.next_hop[new])
+                if only_to is not None:
+                    targets = (only_to,) if only_to in targets else ()
+                for neighbor in targets:
+                    if neighbor not in path:
+                        updates.setdefault(neighbor, {}).setdefault(new, []).append(prefix)
+            if old_path is not None:
+                learned_from = old_path[0] if old_path[0] != asn else None
+                for neighbor in self._export_neighbors(asn, learned_from):
+                    if neighbor not in old_path and (neighbor not in targets or neighbor in path):
+                        withdrawn.setdefault(neighbor, []).append(prefix)
+
+        deliver_at = self.now + self.link_delay
+        queue = self.queue
+        for neighbor, groups in updates.items():
+            med = self.med_out.get((asn, neighbor), 0)
+            for new, prefixes in groups.items():
+                queue.append((deliver_at, neighbor, asn, advertised[new], med, prefixes))
+                self.messages['update'] += 1
+                self.prefix_updates['update'] += len(prefixes)
+        for neighbor, prefixes in withdrawn.items():
+            queue.append((deliver_at, neighbor, asn, None, 0, prefixes))
+            self.messages['withdraw'] += 1
+            self.prefix_updates['withdraw'] += len(prefixes)
+
+    # --- Receiving ---
+
+    def _select_best(self, asn, prefix: int) -> int:
+        self.best_path_runs += 1
+        rank = self.attributes.rank
+        best = NO_ROUTE
+        for session in self.adj_rib_in[asn].values():
+            attr = _read(session, prefix)
+            if attr != NO_ROUTE and (best == NO_ROUTE or rank[attr] < rank[best]):
+                best = attr
+        return best
+
+    def _decide(self, asn, prefix: int, sender, attr: int):
+        """
+        Updates the Loc-RIB after sender's route for `prefix` became `attr`.
+        Returns (prefix, old path, new attribute id) if the best route
+        changed, else None.
+        """
+        attrs = self.attributes
+        loc = self.loc_rib[asn]
+        current = _read(loc, prefix)
+        if current != NO_ROUTE and attrs.next_hop[current] is None:
+            # Locally originated routes always win
+            return None
+        if attr != NO_ROUTE and (current == NO_ROUTE or attrs.rank[attr] < attrs.rank[current]):
+            best = attr
+        elif current != NO_ROUTE and attrs.next_hop[current] == sender:
+            # The best route itself changed or went away: look again
+            best = self._select_best(asn, prefix)
+        else:
+            return None
+        if best == current:
+            return None
+
+        old_path = attrs.as_path[current] if current != NO_ROUTE else None
+        if best != NO_ROUTE:
+            attrs.incref(best)
+        _write(loc, prefix, best)
+        if current != NO_ROUTE:
+            attrs.decref(current)
+        self.last_change = self.now
+        return prefix, old_path, best
+
+    def _receive(self, asn, sender, path, med: int, prefixes):
+        session = self.adj_rib_in[asn].get(sender)
+        if session is None:
+            # The session went down while the message was in flight
+            return
+        attrs = self.attributes
+        attr = NO_ROUTE
+        # A path through ourselves is a loop: treat it as a withdrawal
+        if path is not None and asn not in path:
+            attr = attrs.intern(path, sender, self.import_local_pref(asn, sender), med)
+
+        changes = []
+        for prefix in prefixes:
+            old = _read(session, prefix)
+            if old == attr:
+                continue
+            if attr != NO_ROUTE:
+                attrs.incref(attr)
+                if old == NO_ROUTE:
+                    self.adj_entries += 1
+                    if self.adj_entries > self.peak_adj_entries:
+                        self.peak_adj_entries = self.adj_entries
+            else:
+                self.adj_entries -= 1
+            _write(session, prefix, attr)
+            change = self._decide(asn, prefix, sender, attr)
+            if old != NO_ROUTE:
+                attrs.decref(old)
+            if change is not None:
+                changes.append(change)
+        if attr != NO_ROUTE:
+            attrs.discard(attr)
+        if changes:
+            self._advertise(asn, changes)
+
+    # --- Public API ---
+
+    def originate(self, asn, *prefixes: str):
+        """AS `asn` starts announcing `prefixes` (in one UPDATE per neighbor)."""
+        attrs = self.attributes
+        attr = attrs.intern(self._prepend(asn, ()), None, self.DEFAULT_LOCAL_PREF, 0)
+        loc = self.loc_rib[asn]
+        changes = []
+        for prefix in prefixes:
+            index = self.prefix_index.get(prefix)
+            if index is None:
+                index = self.prefix_index[prefix] = len(self.prefixes)
+                self.prefixes.append(prefix)
+            current = _read(loc, index)
+            if current == attr:
+                continue
+            attrs.incref(attr)
+            _write(loc, index, attr)
+            old_path = None
+            if current != NO_ROUTE:
+                old_path = attrs.as_path[current]
+                attrs.decref(current)
+            changes.append((index, old_path, attr))
+        attrs.discard(attr)
+        if changes:
+            self._advertise(asn, changes)
+
+    def link_down(self, u, v):
+        """Session u-v fails; both sides drop what they learned over it."""
+        self.neighbors[u].discard(v)
+        self.neighbors[v].discard(u)
+        for asn, peer in ((u, v), (v, u)):
+            session = self.adj_rib_in[asn].pop(peer, None)
+            if session is None:
+                continue
+            changes = []
+            for prefix, attr in enumerate(session):
+                if attr == NO_ROUTE:
+                    continue
+                self.adj_entries -= 1
+                change = self._decide(asn, prefix, peer, NO_ROUTE)
+                self.attributes.decref(attr)
+                if change is not None:
+                    changes.append(change)
+            if changes:
+                self._advertise(asn, changes)
+
+    def link_up(self, u, v):
+        """Session u-v comes up; both sides send their Loc-RIB over it."""
+        for asn, peer in ((u, v), (v, u)):
+            self.neighbors[asn].add(peer)
+            self.adj_rib_in[asn].setdefault(peer, array('i'))
+        for asn, peer in ((u, v), (v, u)):
+            routes = self._exportable_routes(asn, peer)
+            if routes:
+                self._advertise(asn, routes, only_to=peer)
+
+    def run(self, trace_memory: bool = False) -> dict:
+        """
+        Delivers messages until the queue is empty (convergence) and returns
+        the report. With trace_memory the peak traced allocation during the
+        run is reported too (slower).
+        """
+        if trace_memory:
+            tracemalloc.start()
+        wall_start = time.perf_counter()
+        queue = self.queue
+        receive = self._receive
+        while queue:
+            deliver_at, asn, sender, path, med, prefixes = queue.popleft()
+            self.now = deliver_at
+            self.events_processed += 1
+            receive(asn, sender, path, med, prefixes)
+        wall_seconds = time.perf_counter() - wall_start
+        report = self.report(wall_seconds)
+        if trace_memory:
+            report['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return report
+
+    def rib(self, asn) -> dict:
+        """
+        Loc-RIB of one AS in simulate_bgp's {prefix: {'as_path', 'next_hop'}}
+        shape, plus the route's local-pref and MED.
+        """
+        attrs = self.attributes
+        table = {}
+        for prefix, attr in enumerate(self.loc_rib[asn]):
+            if attr == NO_ROUTE:
+                continue
+            next_hop = attrs.next_hop[attr]
+            table[self.prefixes[prefix]] = {
+                'as_path': list(attrs.as_path[attr]),
+                'next_hop': 'self' if next_hop is None else next_hop,
+                'local_pref': attrs.local_pref[attr],
+                'med': attrs.med[attr],
+            }
+        return table
+
+    def rib_bytes(self) -> int:
+        """Approximate bytes held by the RIBs, the attribute table and the shared paths."""
+        total = sys.getsizeof(self.adj_rib_in) + sys.getsizeof(self.loc_rib)
+        for sessions in self.adj_rib_in.values():
+            total += sys.getsizeof(sessions) + sum(sys.getsizeof(session) for session in sessions.values())
+        total += sum(sys.getsizeof(loc) for loc in self.loc_rib.values())
+        total += self.attributes.nbytes()
+        total += sys.getsizeof(self.paths)
+        total += sum(sys.getsizeof(key) + sys.getsizeof(path) for key, path in self.paths.items())
+        return total
+
+    def report(self, wall_seconds: float = 0.0) -> dict:
+        return {
+            'ases': len(self.neighbors),
+            'prefixes': len(self.prefixes),
+            'converged_at': self.last_change,
+            'wall_seconds': wall_seconds,
+            'events': self.events_processed,
+            'messages': dict(self.messages),
+            'total_messages': sum(self.messages.values()),
+            'prefix_updates': dict(self.prefix_updates),
+            'best_path_runs': self.best_path_runs,
+            'loc_rib_entries': sum(len(loc) - loc.count(NO_ROUTE) for loc in self.loc_rib.values()),
+            'adj_rib_in_entries': self.adj_entries,
+            'peak_adj_rib_in_entries': self.peak_adj_entries,
+            'attribute_sets': len(self.attributes),
+            'unique_paths': len(self.paths),
+        }
+
+
+# --- Gao-Rexford policy ---
+
+CUSTOMER, PEER, PROVIDER = 'customer', 'peer', 'provider'
+
+
+class PolicyBGPEngine(BGPEngine):
+    """
+    BGPEngine with Gao-Rexford routing policy.
+
+    Links carry business relationships in the CAIDA convention:
+    (provider, customer, -1) or (peer, peer, 0). Local-pref follows the
+    relationship (customer routes over peer routes over provider routes)
+    and export is valley-free: an AS's own prefixes and routes learned
+    from customers go to every neighbor, routes learned from peers and
+    providers go to customers only.
+
+    Export never scans the RIB. Each AS keeps its customers as a set, so a
+    route's targets are that set or all neighbors, and indexes the prefixes
+    whose best route may go to peers and providers, so a new session with
+    a peer or provider only walks those.
+    """
+
+    LOCAL_PREF = {CUSTOMER: 200, PEER: 150, PROVIDER: 100}
+
+    def __init__(self, relationships, link_delay: float = 0.01):
+        relationships = list(relationships)
+        # (asn, neighbor) -> what the neighbor is to asn
+        self.relationship = {}
+        for u, v, rel in relationships:
+            if rel == -1:
+                self.relationship[(u, v)] = CUSTOMER
+                self.relationship[(v, u)] = PROVIDER
+            elif rel == 0:
+                self.relationship[(u, v)] = self.relationship[(v, u)] = PEER
+            else:
+                raise ValueError(f"Unknown relationship {rel!r} on link {u}-{v} (expected -1 or 0)")
+        super().__init__([(u, v) for u, v, _ in relationships], link_delay)
+
+        self.customers = {asn: {peer for peer in peers if self.relationship[(asn, peer)] == CUSTOMER}
+                          for asn, peers in self.neighbors.items()}
+        # asn -> prefix ids whose best route is the AS's own or a customer's
+        self.exportable = {asn: set() for asn in self.neighbors}
+
+    def _exports_everywhere(self, asn, learned_from) -> bool:
+        return learned_from is None or self.relationship[(asn, learned_from)] == CUSTOMER
+
+    def import_local_pref(self, asn, neighbor) -> int:
+        return self.LOCAL_PREF[self.relationship[(asn, neighbor)]]
+
+    def _export_neighbors(self, asn, learned_from):
+        return self.neighbors[asn] if self._exports_everywhere(asn, learned_from) else self.customers[asn]
+
+    def _exportable_routes(self, asn, neighbor) -> list:
+        if self.relationship[(asn, neighbor)] == CUSTOMER:
+            return super()._exportable_routes(asn, neighbor)
+        loc = self.loc_rib[asn]
+        return [(prefix, None, loc[prefix]) for prefix in sorted(self.exportable[asn])]
+
+    def _advertise(self, asn, changes, only_to=None):
+        # Every Loc-RIB change passes through here: keep the index current
+        exportable = self.exportable[asn]
+        next_hop = self.attributes.next_hop
+        for prefix, _, new in changes:
+            if new != NO_ROUTE and self._exports_everywhere(asn, next_hop[new]):
+                exportable.add(prefix)
+            else:
+                exportable.discard(prefix)
+        super()._advertise(asn, changes, only_to)
+
+    def link_down(self, u, v):
+        self.customers[u].discard(v)
+        self.customers[v].discard(u)
+        super().link_down(u, v)
+
+    def link_up(self, u, v):
+        for asn, peer in ((u, v), (v, u)):
+            if self.relationship[(asn, peer)] == CUSTOMER:
+                self.customers[asn].add(peer)
+        super().link_up(u, v)
+
+
+def valley_free(asn, as_path, relationship: dict) -> bool:
+    """
+    Checks a route AS `asn` learned (AS path as in its RIB, origin last)
+    against the valley-free rule: from the origin, zero or more
+    customer-to-provider hops, at most one peer hop, then only
+    provider-to-customer hops.
+    """
+    hops = (asn,) + tuple(as_path)
+    descending = False
+    for i in range(len(hops) - 1, 0, -1):
+        rel = relationship[(hops[i - 1], hops[i])]
+        if rel == CUSTOMER:
+            if descending:
+                return False
+        elif rel == PEER and descending:
+            return False
+        else:
+            descending = True
+    return True
+
+
+# --- Topologies ---
+
+def internet_like_links(ases: int, links_per_as: int = 3, seed=None) -> list:
+    """
+    Preferential-attachment AS graph (Barabasi-Albert): each new AS links to
+    `links_per_as` existing ASes picked in proportion to their degree,
+    giving the heavy-tailed degree distribution of the AS-level Internet.
+    """
+    return [(u, v) for u, v, _ in barabasi_albert_edges(ases, links_per_as, seed)]
+
+
+def internet_like_relationships(ases: int, links_per_as: int = 3, peer_fraction: float = 0.2,
+                                seed=None) -> list:
+    """
+    internet_like_links annotated with relationships: the founding ASes
+    form a peering clique (the tier 1), each later AS buys transit from the
+    first AS it linked to and peers with each other one it picked with
+    probability `peer_fraction`, else buys transit from it too. Providers
+    are always older than their customers, so the hierarchy has no cycles.
+    """
+    rng = random.Random(seed)
+    relationships = []
+    has_provider = set()
+    for u, v in internet_like_links(ases, links_per_as, seed):
+        if u <= links_per_as + 1 and v <= links_per_as + 1:
+            relationships.append((u, v, 0))
+        elif u in has_provider and rng.random() < peer_fraction:
+            relationships.append((v, u, 0))
+        else:
+            has_provider.add(u)
+            relationships.append((v, u, -1))
+    return relationships
+
+
+def print_report(title: str, report: dict):
+    print(f"{title}: {report['ases']} ASes, {report['prefixes']} prefixes, "
+          f"converged at t={report['converged_at']:.2f} s (virtual), {report['wall_seconds']:.2f} s wall")
+    print(f"  messages: {report['total_messages']} (updates {report['messages']['update']} carrying "
+          f"{report['prefix_updates']['update']} prefixes, withdraws {report['messages']['withdraw']}), "
+          f"best-path runs: {report['best_path_runs']}")
+    memory = f", peak traced memory {report['peak_traced_bytes'] / 2**20:.1f} MB" \
+        if 'peak_traced_bytes' in report else ""
+    print(f"  RIB entries: Loc-RIB {report['loc_rib_entries']}, Adj-RIB-In {report['adj_rib_in_entries']} "
+          f"(peak {report['peak_adj_rib_in_entries']}), attribute sets {report['attribute_sets']}, "
+          f"unique AS paths {report['unique_paths']}{memory}")
+
+
+# --- Main execution for testing ---
+if __name__ == "__main__":
+
+    # The LAB7 topology: every AS reaches every prefix over a shortest path
+    links = [(100, 200), (200, 300), (300, 400), (400, 100), (200, 400)]
+    engine = BGPEngine(links)
+    for asn, prefix in [(100, '10.1.0.0/16'), (200, '20.2.0.0/16'), (300, '30.3.0.0/16'), (400, '40.4.0.0/16')]:
+        engine.originate(asn, prefix)
+    report = engine.run()
+    assert engine.rib(300)['10.1.0.0/16'] == {'as_path': [200, 100], 'next_hop': 200, 'local_pref': 100, 'med': 0}
+    assert engine.rib(100)['10.1.0.0/16'] == {'as_path': [100], 'next_hop': 'self', 'local_pref': 100, 'med': 0}
+    assert all(len(engine.rib(asn)) == 4 for asn in engine.neighbors)
+
+    # Failure: 300 falls back to 400 for AS 100's prefix, then back again
+    engine.link_down(200, 300)
+    engine.run()
+    assert engine.rib(300)['10.1.0.0/16']['as_path'] == [400, 100]
+    engine.link_down(300, 400)
+    engine.run()
+    assert '10.1.0.0/16' not in engine.rib(300) and len(engine.rib(100)) == 3
+    engine.link_up(200, 300)
+    engine.link_up(300, 400)
+    engine.run()
+    assert engine.rib(300)['10.1.0.0/16']['as_path'] == [200, 100]
+    assert engine.adj_entries == sum(len(s) - s.count(NO_ROUTE) for t in engine.adj_rib_in.values()
+                                     for s in t.values())
+
+    # Attribute sets are shared, not copied: the Loc-RIB points at the
+    # Adj-RIB-In entry, and every live id is referenced
+    prefix = engine.prefix_index['10.1.0.0/16']
+    assert engine.loc_rib[400][prefix] == engine.adj_rib_in[400][100][prefix]
+    assert all(engine.attributes.refs[attr] > 0 for attr in engine.attributes.index.values())
+
+    # MED breaks the tie between equally long paths: 300 now prefers 400
+    engine.set_med(200, 300, 50)
+    engine.set_med(400, 300, 10)
+    engine.link_down(200, 300)
+    engine.link_up(200, 300)
+    engine.run()
+    assert engine.rib(300)['10.1.0.0/16']['as_path'] == [400, 100]
+    assert engine.rib(300)['20.2.0.0/16']['as_path'] == [200]
+
+    # Many prefixes per origin: one UPDATE carries them all
+    engine = BGPEngine(links)
+    engine.originate(100, *[f"10.{i}.0.0/16" for i in range(100)])
+    report = engine.run()
+    assert report['prefix_updates']['update'] == 100 * report['messages']['update']
+    assert report['attribute_sets'] < 10
+
+    # Gao-Rexford on the LAB7 topology: 200 and 400 are providers of 100
+    # and 300 and peer with each other
+    relationships = [(200, 100, -1), (200, 300, -1), (400, 300, -1), (400, 100, -1), (200, 400, 0)]
+    engine = PolicyBGPEngine(relationships)
+    for asn, prefix in [(100, '10.1.0.0/16'), (200, '20.2.0.0/16'), (300, '30.3.0.0/16'), (400, '40.4.0.0/16')]:
+        engine.originate(asn, prefix)
+    engine.run()
+    assert engine.rib(300)['10.1.0.0/16'] == {'as_path': [200, 100], 'next_hop': 200, 'local_pref': 100, 'med': 0}
+    assert engine.rib(200)['10.1.0.0/16']['local_pref'] == 200
+    assert engine.rib(200)['40.4.0.0/16'] == {'as_path': [400], 'next_hop': 400, 'local_pref': 150, 'med': 0}
+    # Without the peering, 100 and 300 must not carry transit between
+    # their providers: 200 loses 400's prefix
+    engine.link_down(200, 400)
+    engine.run()
+    assert '40.4.0.0/16' not in engine.rib(200) and '40.4.0.0/16' in engine.rib(100)
+    engine.link_up(200, 400)
+    engine.run()
+    assert engine.rib(200)['40.4.0.0/16']['as_path'] == [400]
+
+    # Annotated Internet-like graph, through a relationship file: everyone
+    # reaches every prefix over valley-free paths only, and failures and
+    # repairs end in the same state as a fresh start
+    import tempfile
+    relationships = internet_like_relationships(2000, seed=3)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'as-rel.txt')
+        write_as_relationships(path, relationships)
+        assert list(read_as_relationships(path)) == relationships
+    origins = random.Random(4).sample(range(1, 2001), 10)
+
+    def converge(engine):
+        for i, origin in enumerate(origins):
+            engine.originate(origin, f"{i + 1}.0.0.0/8")
+        return engine.run()
+
+    engine = PolicyBGPEngine(relationships)
+    policy = converge(engine)
+    shortest = converge(BGPEngine((u, v) for u, v, _ in relationships))
+    assert policy['loc_rib_entries'] == 2000 * 10
+    assert all(valley_free(asn, route['as_path'], engine.relationship)
+               for asn in engine.neighbors for route in engine.rib(asn).values() if route['next_hop'] != 'self')
+    assert policy['prefix_updates']['update'] < shortest['prefix_updates']['update']
+    print_report("Gao-Rexford, 2000 ASes", policy)
+    print_report("Shortest path, 2000 ASes", shortest)
+
+    failed = random.Random(5).sample(relationships, 50)
+    for u, v, _ in failed:
+        engine.link_down(u, v)
+    engine.run()
+    for u, v, _ in failed:
+        engine.link_up(u, v)
+    engine.run()
+    fresh = PolicyBGPEngine(relationships)
+    converge(fresh)
+    assert all(engine.rib(asn) == fresh.rib(asn) for asn in engine.neighbors)
+    assert all(engine.exportable[asn] == fresh.exportable[asn] for asn in engine.neighbors)
+
+    # Internet scale: ~75k ASes, a handful of prefixes from random origins
+    links = internet_like_links(75_000, seed=1)
+    engine = BGPEngine(links)
+    rng = random.Random(2)
+    for i, origin in enumerate(rng.sample(sorted(engine.neighbors), 5)):
+        engine.originate(origin, f"{i + 1}.0.0.0/8")
+    report = engine.run()
+    print_report("Internet-like AS graph", report)
+    assert report['loc_rib_entries'] == 75_000 * 5
+    print(f"  RIB size: {engine.rib_bytes() / 2**20:.1f} MB")
+
+    print("\n--- All BGP Engine Tests Passed ---")
@@ -1,11 +1,34 @@
-import networkx as nx
-import matplotlib
-matplotlib.use('Agg') # Use a non-GUI backend
-import matplotlib.pyplot as plt
+import argparse
+import os
+import random
+import sys
 import time
 
+try:
+    from bgp_engine import (BGPEngine, PolicyBGPEngine, internet_like_links, internet_like_relationships,
+                            print_report, read_as_links, read_as_relationships)
+except ImportError:
+    print("Error: Could not import from bgp_engine.py.")
+    print("Make sure it is in the same directory.")
+    exit(1)
+# The topology loaders are shared by all LAB7 simulators and live in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from topology import add_topology_arguments, adjacency, generate
+except ImportError:
+    print("Error: Could not import from topology.py.")
+    print("Make sure topology.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from render import figure_graph, plotting
+except ImportError:
+    print("Error: Could not import from render.py.")
+    print("Make sure render.py is in the LAB7 directory.")
+    exit(1)
+
 def draw_as_graph(graph, pos, title):
     """Helper function to draw the AS-level graph."""
+    nx, plt = plotting()
     plt.figure(figsize=(10, 6))
     nx.draw(graph, pos, with_labels=True, node_color='lightgreen', node_size=3000, 
             font_size=18, font_weight='bold')
@@ -16,18 +39,22 @@ def draw_as_graph(graph, pos, title):
     print(f"\n*** Graph saved to {filename} ***") 
     plt.close() 
 
-def simulate_bgp():
-    """Simulates the Border Gateway Protocol (BGP) as a Path Vector protocol."""
+def simulate_bgp(render=True):
+    """
+    Simulates the Border Gateway Protocol (BGP) as a Path Vector protocol.
+    With render=False no figure is drawn and networkx/matplotlib are
+    never imported.
+    """
     
     print("--- Simulating BGP (Path Vector) ---")
     
     ases = [100, 200, 300, 400]
     links = [(100, 200), (200, 300), (300, 400), (400, 100), (200, 400)]
     
-    G = nx.Graph()
-    G.add_edges_from(links)
-    pos = nx.circular_layout(G)
-    draw_as_graph(G, pos, "BGP AS-Level Topology")
+    neighbors = adjacency((u, v, 1) for u, v in links)
+    if render:
+        G, pos = figure_graph(links, layout='circular')
+        draw_as_graph(G, pos, "BGP AS-Level Topology")
     
     prefixes = {
         100: '10.1.0.0/16',
@@ -57,7 +84,7 @@ def simulate_bgp():
         rib_snapshot = {asn: table.copy() for asn, table in rib.items()}
 
         for u_asn in ases:
-            for v_asn in G.neighbors(u_asn):
+            for v_asn in neighbors[u_asn]:
                 for prefix, info in rib_snapshot[u_asn].items():
                     if v_asn in info['as_path']:
                         continue 
@@ -93,13 +120,108 @@ def simulate_bgp():
 
     print("--- FINAL BGP ROUTING TABLES (RIBs) ---")
     for asn in ases:
-        print(f"AS {asn}'s RIB:")
-        print(f"  {'Prefix':<15} | {'Next Hop AS':<12} | {'AS_PATH':<20}")
-        print("  " + "-"*50)
-        for prefix, info in sorted(rib[asn].items()):
-            path_str = " -> ".join(map(str, info['as_path']))
-            print(f"  {prefix:<15} | {info['next_hop']:<12} | {path_str}")
-        print()
+        print_rib(asn, rib[asn])
+
+def print_rib(asn, rib):
+    print(f"AS {asn}'s RIB:")
+    print(f"  {'Prefix':<15} | {'Next Hop AS':<12} | {'AS_PATH':<20}")
+    print("  " + "-"*50)
+    for prefix, info in sorted(rib.items()):
+        path_str = " -> ".join(map(str, info['as_path']))
+        print(f"  {prefix:<15} | {info['next_hop']:<12} | {path_str}")
+    print()
+
+def simulate_bgp_events(links=None, prefixes=None, trace_memory=False):
+    """
+    Runs BGP on the event-driven engine: UPDATE/WITHDRAW messages,
+    Adj-RIB-In/Loc-RIB over shared attribute sets, no round limit. Defaults to the LAB7
+    topology; RIBs are printed for small networks only.
+    """
+    print("--- Simulating BGP (event-driven path vector) ---")
+    if links is None:
+        links = [(100, 200), (200, 300), (300, 400), (400, 100), (200, 400)]
+    if prefixes is None:
+        prefixes = {100: '10.1.0.0/16', 200: '20.2.0.0/16', 300: '30.3.0.0/16', 400: '40.4.0.0/16'}
+
+    engine = BGPEngine(links)
+    for asn, prefix in prefixes.items():
+        engine.originate(asn, prefix)
+    report = engine.run(trace_memory=trace_memory)
+    print_report("Initial convergence", report)
+    print(f"  RIB size: {engine.rib_bytes() / 2**20:.2f} MB\n")
+
+    if len(engine.neighbors) <= 20:
+        print("--- FINAL BGP ROUTING TABLES (RIBs) ---")
+        for asn in sorted(engine.neighbors):
+            print_rib(asn, engine.rib(asn))
+    return engine
+
+def simulate_bgp_policy(relationships=None, prefixes=None, trace_memory=False):
+    """
+    Runs the event-driven engine with Gao-Rexford policy (local-pref by
+    customer/peer/provider relationship, valley-free export) and, for
+    comparison, with plain shortest-path routing that exports everything.
+    Relationships are CAIDA (as1, as2, rel) triples; the default is the
+    LAB7 topology with 200 and 400 as providers of 100 and 300.
+    """
+    print("--- Simulating BGP with Gao-Rexford policy ---")
+    if relationships is None:
+        relationships = [(200, 100, -1), (200, 300, -1), (400, 300, -1), (400, 100, -1), (200, 400, 0)]
+    if prefixes is None:
+        prefixes = {100: '10.1.0.0/16', 200: '20.2.0.0/16', 300: '30.3.0.0/16', 400: '40.4.0.0/16'}
+
+    engines = [("Gao-Rexford policy", PolicyBGPEngine(relationships)),
+               ("Shortest path, export all", BGPEngine((u, v) for u, v, _ in relationships))]
+    for title, engine in engines:
+        for asn, prefix in prefixes.items():
+            engine.originate(asn, prefix)
+        report = engine.run(trace_memory=trace_memory)
+        print_report(title, report)
+        print(f"  RIB size: {engine.rib_bytes() / 2**20:.2f} MB\n")
+
+    engine = engines[0][1]
+    if len(engine.neighbors) <= 20:
+        print("--- FINAL BGP ROUTING TABLES (RIBs) WITH POLICY ---")
+        for asn in sorted(engine.neighbors):
+            print_rib(asn, engine.rib(asn))
+    return engine
 
 if __name__ == "__main__":
-    simulate_bgp()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event-driven", action="store_true",
+                        help="use the event-driven engine instead of synchronous rounds")
+    parser.add_argument("--policy", action="store_true",
+                        help="Gao-Rexford policy on relationship-annotated links (compared with shortest path)")
+    parser.add_argument("--ases", type=int, help="random Internet-like AS graph with this many ASes")
+    parser.add_argument("--prefixes", type=int, default=10, help="origin ASes (one prefix each) on large graphs")
+    parser.add_argument("--trace-memory", action="store_true", help="report peak traced memory (slower)")
+    parser.add_argument("--headless", action="store_true",
+                        help="draw no figures (networkx and matplotlib are not even imported)")
+    add_topology_arguments(parser)
+    args = parser.parse_args()
+
+    if args.topology or args.generate or args.ases:
+        if args.policy:
+            if args.generate:
+                parser.error("--policy needs AS relationships: use a CAIDA --topology file or --ases")
+            links = list(read_as_relationships(args.topology)) if args.topology else \
+                internet_like_relationships(args.ases, seed=args.seed)
+        elif args.topology:
+            links = list(read_as_links(args.topology))
+        elif args.generate:
+            links = [(u, v) for u, v, _ in generate(args.generate, seed=args.seed)]
+        else:
+            links = internet_like_links(args.ases, seed=args.seed)
+        ases = sorted({asn for link in links for asn in link[:2]})
+        origins = random.Random(args.seed).sample(ases, min(args.prefixes, len(ases)))
+        prefixes = {asn: f"{i // 256 + 1}.{i % 256}.0.0/16" for i, asn in enumerate(origins)}
+        if args.policy:
+            simulate_bgp_policy(links, prefixes, args.trace_memory)
+        else:
+            simulate_bgp_events(links, prefixes, args.trace_memory)
+    elif args.policy:
+        simulate_bgp_policy(trace_memory=args.trace_memory)
+    elif args.event_driven:
+        simulate_bgp_events(trace_memory=args.trace_memory)
+    else:
+        simulate_bgp(render=not args.headless)
\ No newline at end of file
@@ -0,0 +1,557 @@
+import heapq
+import itertools
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+# The SPF engine is shared with the other link-state simulator and lives in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from spf import CSRGraph, spf_with_first_hops
+except ImportError:
+    print("Error: Could not import from spf.py.")
+    print("Make sure spf.py is in the LAB7 directory.")
+    exit(1)
+
+# One link-state PDU. `expires_at` is the virtual time its remaining
+# lifetime runs out; a purge keeps the sequence number and has no
+# adjacencies or prefixes (None), and a router holding one as a header
+# drops it at its `expires_at`, ZeroAgeLifetime after the purge.
+LSP = namedtuple('LSP', 'origin seq expires_at adjacencies prefixes')
+
+
+class ISISEngine:
+    """
+    Event-driven IS-IS flooding and route calculation on a virtual clock.
+
+    Every router originates an LSP listing its adjacencies (IS
+    reachability) and its prefixes (IP reachability) with a sequence
+    number and a lifetime, and LSPs are flooded hop by hop as messages on
+    an event heap ordered by (time, sequence). Modeled behavior:
+      - an LSP newer than the receiver's copy is installed in its own LSDB
+        and flooded to every other neighbor; the same copy again is a
+        duplicate and dropped; an older one is answered with the newer copy;
+      - originators refresh their LSP (sequence + 1) every
+        `refresh_interval` seconds; an LSP not refreshed within its
+        `lifetime` expires and is purged network-wide; a copy whose
+        lifetime ran out in transit counts as a purge;
+      - routers keep a purged LSP's header for `zero_age_lifetime`
+        seconds, so late copies of the old LSP are answered with the purge
+        instead of bringing it back;
+      - a new adjacency synchronizes both LSDBs over the new link.
+    An LSDB change schedules a route calculation after `spf_delay`, so LSPs
+    arriving together share it. If an LSP changed adjacencies the router
+    runs a full SPF on its own LSDB (two-way checked adjacencies only); if
+    only prefixes changed it runs a partial route calculation (PRC), which
+    re-evaluates just those prefixes against the distances of the last
+    SPF. partial_route_calculation=False always runs the full SPF.
+    """
+
+    REFRESH = 0
+    EXPIRE = 1
+    DELIVER = 2
+    CALC = 3
+    CHANGE = 4
+
+    def __init__(self, network: dict, prefixes: dict = None, link_delay: float = 0.01,
+                 spf_delay: float = 0.05, lifetime: float = 1200.0, refresh_interval: float = 900.0,
+                 zero_age_lifetime: float = 60.0, partial_route_calculation: bool = True):
+        if refresh_interval >= lifetime:
+            raise ValueError("LSPs must be refreshed before their lifetime runs out")
+        # {router: {neighbor: metric}} and {router: {prefix: metric}}
+        self.neighbors = {node: dict(links) for node, links in network.items()}
+        prefixes = prefixes or {}
+        self.prefixes = {node: dict(prefixes.get(node, {})) for node in self.neighbors}
+        self.link_delay = link_delay
+        self.spf_delay = spf_delay
+        self.lifetime = lifetime
+        self.refresh_interval = refresh_interval
+        self.zero_age_lifetime = zero_age_lifetime
+        self.partial_route_calculation = partial_route_calculation
+
+        self.now = 0.0
+        self.events = []
+        self.sequence = itertools.count()
+        # Events other than the refresh and expiry timers still on the heap
+        self.in_flight = 0
+        self.down = set()
+
+        self.lsdb = {node: {} for node in self.neighbors}
+        self.own_seq = {node: 0 for node in self.neighbors}
+        self.refresh_due = {}
+        # router -> {prefix: {origin: metric}}, kept in step with its LSDB
+        self.advertisers = {node: {} for node in self.neighbors}
+        # router -> ({router: distance}, {router: first hops}) of its last SPF
+        self.spf = {}
+        # router -> {prefix: (cost, next hops)}
+        self.routes = {node: {} for node in self.neighbors}
+        # router -> [full SPF needed, prefixes to recalculate] until its CALC runs
+        self.pending = {}
+
+        self.messages = {'flood': 0, 'sync': 0, 'reply': 0}
+        self.lsps = {'originated': 0, 'installed': 0, 'duplicates': 0, 'older': 0, 'expired': 0, 'purged': 0}
+        self.calculations = {'spf': 0, 'prc': 0}
+        self.spf_routers = 0
+        self.spf_seconds = 0.0
+        self.prc_prefixes = 0
+        self.prc_seconds = 0.0
+        self.saved_routers = 0
+        self.route_changes = 0
+        self.last_change = 0.0
+        self.events_processed = 0
+
+        for node in self.neighbors:
+            self._originate(node)
+
+    # --- Event plumbing ---
+
+    def _schedule(self, event_time: float, kind: int, data):
+        if kind not in (self.REFRESH, self.EXPIRE):
+            self.in_flight += 1
+        heapq.heappush(self.events, (event_time, next(self.sequence), kind, data))
+
+    def _send(self, router, neighbor, lsp, kind: str):
+        self.messages[kind] += 1
+        self._schedule(self.now + self.link_delay, self.DELIVER, (neighbor, router, lsp))
+
+    def _flood(self, router, lsp, skip=None):
+        for neighbor in self.neighbors[router]:
+            if neighbor != skip:
+                self._send(router, neighbor, lsp, 'flood')
+
+    # --- LSPs ---
+
+    def _originate(self, router):
+        self.own_seq[router] += 1
+        lsp = LSP(router, self.own_seq[router], self.now + self.lifetime,
+                  dict(self.neighbors[router]), dict(self.prefixes[router]))
+        self.lsps['originated'] += 1
+        self._install(router, lsp)
+        self._flood(router, lsp)
+        self.refresh_due[router] = self.now + self.refresh_interval
+        self._schedule(self.refresh_due[router], self.REFRESH, router)
+
+    def _install(self, router, lsp):
+        """Puts `lsp` in router's LSDB and schedules the route calculation it needs."""
+        lsdb = self.lsdb[router]
+        old = lsdb.get(lsp.origin)
+        if lsp.adjacencies is None:
+            # Only the header is kept, until ZeroAgeLifetime has passed
+            lsp = lsp._replace(expires_at=self.now + self.zero_age_lifetime)
+        lsdb[lsp.origin] = lsp
+        self._schedule(lsp.expires_at, self.EXPIRE, (router, lsp.origin, lsp.seq))
+        self.lsps['installed'] += 1
+
+        old_adjacencies = old.adjacencies if old is not None and old.adjacencies is not None else {}
+        old_prefixes = old.prefixes if old is not None and old.prefixes is not None else {}
+        new_adjacencies = lsp.adjacencies or {}
+        new_prefixes = lsp.prefixes or {}
+        advertisers = self.advertisers[router]
+        for prefix in old_prefixes:
+            if prefix not in new_prefixes:
+                del advertisers[prefix][lsp.origin]
+                if not advertisers[prefix]:
+                    del advertisers[prefix]
+        changed = {prefix for prefix, metric in old_prefixes.items() if new_prefixes.get(prefix) != metric}
+        for prefix, metric in new_prefixes.items():
+            if old_prefixes.get(prefix) != metric:
+                advertisers.setdefault(prefix, {})[lsp.origin] = metric
+                changed.add(prefix)
+
+        if old_adjacencies != new_adjacencies or changed:
+            pending = self.pending.get(router)
+            if pending is None:
+                pending = self.pending[router] = [False, set()]
+                self._schedule(self.now + self.spf_delay, self.CALC, router)
+            if old_adjacencies != new_adjacencies:
+                pending[0] = True
+            pending[1] |= changed
+
+    def _receive(self, router, sender, lsp):
+        if sender not in self.neighbors[router]:
+            # The adjacency went down while the LSP was in flight
+            return
+        if lsp.adjacencies is not None and lsp.expires_at <= self.now:
+            # Its remaining lifetime ran out on the way: it is only a purge
+            self.lsps['expired'] += 1
+            lsp = lsp._replace(adjacencies=None, prefixes=None)
+        purge = lsp.adjacencies is None
+        held = self.lsdb[router].get(lsp.origin)
+        held_purge = held is not None and held.adjacencies is None
+        if lsp.origin == router and (lsp.seq > self.own_seq[router] or
+                                     (lsp.seq == self.own_seq[router] and purge)):
+            # Our own LSP, newer than ours (say, from before a restart) or
+            # purged: take over its sequence number and re-originate above it
+            self.own_seq[router] = lsp.seq
+            self._originate(router)
+        elif held is None and purge:
+            # Nothing to purge
+            self.lsps['duplicates'] += 1
+        elif held is None or lsp.seq > held.seq or (lsp.seq == held.seq and purge and not held_purge):
+            self._install(router, lsp)
+            self._flood(router, lsp, skip=sender)
+        elif lsp.seq == held.seq and purge == held_purge:
+            self.lsps['duplicates'] += 1
+        else:
+            # An older LSP, or a late copy of one this router has purged
+            self.lsps['older'] += 1
+            self._send(router, sender, held, 'reply')
+
+    def _refresh(self, router):
+        if router not in self.down and self.refresh_due.get(router) == self.now:
+            self._originate(router)
+
+    def _expire(self, router, origin, seq):
+        held = self.lsdb[router].get(origin)
+        if held is None or held.seq != seq or held.expires_at > self.now:
+            return
+        if held.adjacencies is None:
+            # The purge header has been held for ZeroAgeLifetime
+            del self.lsdb[router][origin]
+            return
+        purge = held._replace(expires_at=self.now, adjacencies=None, prefixes=None)
+        self.lsps['purged'] += 1
+        self._install(router, purge)
+        self._flood(router, purge)
+
+    # --- Route calculation ---
+
+    def _two_way_graph(self, router) -> CSRGraph:
+        live = {origin: lsp.adjacencies for origin, lsp in self.lsdb[router].items()
+                if lsp.adjacencies is not None}
+        adjacency = {}
+        for origin, adjacencies in live.items():
+            adjacency[origin] = [(neighbor, metric) for neighbor, metric in adjacencies.items()
+                                 if neighbor in live and origin in live[neighbor]]
+        return CSRGraph.from_adjacency(adjacency)
+
+    def _shortest_paths(self, router) -> tuple:
+        """({router: distance}, {router: first hops}) of an SPF on router's LSDB, and the routers visited."""
+        graph = self._two_way_graph(router)
+        distances, _, _, first_hops = spf_with_first_hops(graph, graph.index[router])
+        names = graph.names
+        return (
+            {names[i]: d for i, d in enumerate(distances) if d != float('inf')},
+            {names[i]: tuple(names[hop] for hop in hops) for i, hops in enumerate(first_hops)},
+        ), graph.node_count
+
+    def _prefix_route(self, router, prefix, spf=None):
+        """Best (cost, next hops) to `prefix` from `spf` (default: the last SPF), or None."""
+        origins = self.advertisers[router].get(prefix)
+        if not origins:
+            return None
+        if router in origins:
+            return origins[router], ()
+        distances, first_hops = spf or self.spf[router]
+        best = None
+        for origin, metric in origins.items():
+            distance = distances.get(origin)
+            if distance is None:
+                continue
+            cost = distance + metric
+            if best is None or cost < best[0]:
+                best = (cost, first_hops[origin])
+            elif cost == best[0]:
+                best = (cost, best[1] + tuple(hop for hop in first_hops[origin] if hop not in best[1]))
+        return best
+
+    def _set_route(self, router, prefix, route):
+        routes = self.routes[router]
+        if routes.get(prefix) != route:
+            if route is None:
+                del routes[prefix]
+            else:
+                routes[prefix] = route
+            self.route_changes += 1
+            self.last_change = self.now
+
+    def _full_spf(self, router):
+        start = time.perf_counter()
+        self.spf[router], visited = self._shortest_paths(router)
+        for prefix in set(self.routes[router]) | set(self.advertisers[router]):
+            self._set_route(router, prefix, self._prefix_route(router, prefix))
+        self.calculations['spf'] += 1
+        self.spf_routers += visited
+        self.spf_seconds += time.perf_counter() - start
+
+    def _partial_route_calculation(self, router, prefixes):
+        start = time.perf_counter()
+        for prefix in prefixes:
+            self._set_route(router, prefix, self._prefix_route(router, prefix))
+        self.calculations['prc'] += 1
+        self.prc_prefixes += len(prefixes)
+        # A full SPF would have visited every router in the LSDB again
+        self.saved_routers += len(self.spf[router][0])
+        self.prc_seconds += time.perf_counter() - start
+
+    def _calculate(self, router):
+        full, prefixes = self.pending.pop(router)
+        if router in self.down:
+            return
+        if full or router not in self.spf or not self.partial_route_calculation:
+            self._full_spf(router)
+        else:
+            self._partial_route_calculation(router, prefixes)
+
+    # --- Topology and prefix changes ---
+
+    def _change(self, kind: str, data):
+        if kind == 'link':
+            u, v, metric = data
+            for a, b in ((u, v), (v, u)):
+                new = b not in self.neighbors[a]
+                if metric is None:
+                    self.neighbors[a].pop(b, None)
+                else:
+                    self.neighbors[a][b] = metric
+                if a in self.down:
+                    continue
+                self._originate(a)
+                if new and metric is not None:
+                    # The new adjacency synchronizes the two LSDBs
+                    for lsp in list(self.lsdb[a].values()):
+                        self._send(a, b, lsp, 'sync')
+        else:
+            router, prefix, metric = data
+            if metric is None:
+                self.prefixes[router].pop(prefix, None)
+            else:
+                self.prefixes[router][prefix] = metric
+            self._originate(router)
+
+    def link_down(self, u, v, at: float = None):
+        self._schedule(self.now if at is None else at, self.CHANGE, ('link', (u, v, None)))
+
+    def link_up(self, u, v, metric=10, at: float = None):
+        self._schedule(self.now if at is None else at, self.CHANGE, ('link', (u, v, metric)))
+
+    def set_link_metric(self, u, v, metric, at: float = None):
+        self._schedule(self.now if at is None else at, self.CHANGE, ('link', (u, v, metric)))
+
+    def set_prefix(self, router, prefix: str, metric=0, at: float = None):
+        """Router starts advertising `prefix` (or changes its metric): a leaf-only LSP change."""
+        self._schedule(self.now if at is None else at, self.CHANGE, ('prefix', (router, prefix, metric)))
+
+    def remove_prefix(self, router, prefix: str, at: float = None):
+        self._schedule(self.now if at is None else at, self.CHANGE, ('prefix', (router, prefix, None)))
+
+    def router_down(self, router):
+        """The router stops: its links go down now and its own LSP is left to expire."""
+        self.down.add(router)
+        for neighbor in list(self.neighbors[router]):
+            self.link_down(router, neighbor)
+
+    # --- Public API ---
+
+    def run(self, until: float = float('inf'), stop_when_converged: bool = True) -> dict:
+        """
+        Processes events until the virtual clock passes `until` or, with
+        stop_when_converged, until only refresh and expiry timers are left
+        (no LSP in flight and no route calculation pending). Returns the
+        report.
+        """
+        wall_start = time.perf_counter()
+        events = self.events
+        while events:
+            if stop_when_converged and self.in_flight == 0:
+                break
+            event_time, _, kind, data = events[0]
+            if event_time > until:
+                break
+            heapq.heappop(events)
+            self.now = event_time
+            self.events_processed += 1
+            if kind not in (self.REFRESH, self.EXPIRE):
+                self.in_flight -= 1
+
+            if kind == self.DELIVER:
+                self._receive(*data)
+            elif kind == self.CALC:
+                self._calculate(data)
+            elif kind == self.REFRESH:
+                self._refresh(data)
+            elif kind == self.EXPIRE:
+                self._expire(*data)
+            else:
+                self._change(*data)
+        return self.report(time.perf_counter() - wall_start)
+
+    def routing_table(self, router) -> dict:
+        """{prefix: {'next_hop', 'next_hops', 'cost'}} like the simulators' tables."""
+        return {prefix: {'next_hop': hops[0] if hops else '-', 'next_hops': list(hops), 'cost': cost}
+                for prefix, (cost, hops) in self.routes[router].items()}
+
+    def link_state_database(self, router) -> CSRGraph:
+        """The router's LSDB compiled for SPF (two-way checked adjacencies)."""
+        return self._two_way_graph(router)
+
+    def lsdbs_synchronized(self) -> bool:
+        """True if every running router holds the same LSP versions (purges included)."""
+        views = [{origin: (lsp.seq, lsp.adjacencies is None) for origin, lsp in self.lsdb[node].items()}
+                 for node in self.neighbors if node not in self.down]
+        return all(view == views[0] for view in views)
+
+    def matches_full_spf(self) -> bool:
+        """
+        True if every running router's routes equal a from-scratch SPF on
+        its LSDB. The SPF is computed on the side; the engine is not touched.
+        """
+        for router in self.neighbors:
+            if router in self.down:
+                continue
+            spf, _ = self._shortest_paths(router)
+            expected = {}
+            for prefix in self.advertisers[router]:
+                route = self._prefix_route(router, prefix, spf)
+                if route is not None:
+                    expected[prefix] = route
+            if expected != self.routes[router]:
+                return False
+        return True
+
+    def report(self, wall_seconds: float = 0.0) -> dict:
+        return {
+            'virtual_time': self.now,
+            'converged_at': self.last_change,
+            'wall_seconds': wall_seconds,
+            'events': self.events_processed,
+            'messages': dict(self.messages),
+            'total_messages': sum(self.messages.values()),
+            'lsps': dict(self.lsps),
+            'calculations': dict(self.calculations),
+            'spf_routers': self.spf_routers,
+            'spf_seconds': self.spf_seconds,
+            'prc_prefixes': self.prc_prefixes,
+            'prc_seconds': self.prc_seconds,
+            'saved_routers': self.saved_routers,
+            'route_changes': self.route_changes,
+        }
+
+
+def print_report(title: str, report: dict):
+    lsps = report['lsps']
+    calculations = report['calculations']
+    print(f"{title}: converged at t={report['converged_at']:.2f} s (virtual), "
+          f"{report['wall_seconds']:.2f} s wall, {report['route_changes']} route changes")
+    print(f"  LSP messages: {report['total_messages']} (flooded {report['messages']['flood']}, "
+          f"sync {report['messages']['sync']}, newer-copy replies {report['messages']['reply']}); "
+          f"originated {lsps['originated']}, duplicates suppressed {lsps['duplicates']}, "
+          f"purged {lsps['purged']}")
+    print(f"  full SPF runs: {calculations['spf']} ({report['spf_routers']} routers visited, "
+          f"{report['spf_seconds'] * 1000:.1f} ms); PRC runs: {calculations['prc']} "
+          f"({report['prc_prefixes']} prefixes, {report['prc_seconds'] * 1000:.1f} ms, "
+          f"{report['saved_routers']} SPF router visits saved)")
+
+
+def report_since(before: dict, after: dict) -> dict:
+    """The counters of report `after` minus those of `before`: one phase of a run."""
+    delta = dict(after)
+    for key, value in after.items():
+        if isinstance(value, dict):
+            delta[key] = {name: count - before[key][name] for name, count in value.items()}
+        elif key not in ('virtual_time', 'converged_at', 'wall_seconds'):
+            delta[key] = value - before[key]
+    return delta
+
+
+def random_network(routers: int, extra_links: int = None, seed=None) -> tuple:
+    """
+    Connected random topology with metrics 1-20 (a random tree plus
+    `extra_links` chords, default one per router) and one loopback prefix
+    per router. Returns (network, prefixes).
+    """
+    rng = random.Random(seed)
+    network = {i: {} for i in range(routers)}
+    for i in range(1, routers):
+        j = rng.randrange(i)
+        network[i][j] = network[j][i] = rng.randint(1, 20)
+    for _ in range(routers if extra_links is None else extra_links):
+        u, v = rng.sample(range(routers), 2)
+        network[u][v] = network[v][u] = rng.randint(1, 20)
+    prefixes = {i: {f"10.{i // 256}.{i % 256}.0/24": 0} for i in range(routers)}
+    return network, prefixes
+
+
+# --- Main execution for testing ---
+if __name__ == "__main__":
+
+    # The LAB7 topology: flooding gives every router the same LSDB, and
+    # the routes match the simulator's Dijkstra tables
+    network = {'R1': {'R2': 10, 'R3': 5, 'R5': 7}, 'R2': {'R1': 10, 'R3': 2, 'R4': 1},
+               'R3': {'R1': 5, 'R2': 2, 'R4': 9, 'R5': 2}, 'R4': {'R2': 1, 'R3': 9, 'R5': 4},
+               'R5': {'R3': 2, 'R4': 4, 'R1': 7}}
+    prefixes = {router: {f"10.0.{router[1]}.0/24": 0} for router in network}
+    engine = ISISEngine(network, prefixes)
+    report = engine.run()
+    assert engine.lsdbs_synchronized() and len(engine.lsdb['R1']) == 5
+    assert engine.routing_table('R1')['10.0.4.0/24'] == {'next_hop': 'R3', 'next_hops': ['R3'], 'cost': 8}
+    assert engine.routing_table('R1')['10.0.1.0/24']['cost'] == 0
+    # Each LSP reaches each router once; every other copy is suppressed
+    assert report['lsps']['installed'] == 5 * 5
+    assert report['lsps']['duplicates'] == report['messages']['flood'] - 5 * 4
+
+    # A leaf-only change: one PRC per router, no SPF
+    before = engine.report()
+    engine.set_prefix('R4', '172.16.4.0/24', 3)
+    report = engine.run()
+    assert report['calculations']['spf'] == before['calculations']['spf']
+    assert report['calculations']['prc'] == 5
+    assert engine.routing_table('R1')['172.16.4.0/24']['cost'] == 11
+    assert engine.matches_full_spf()
+
+    # A metric change needs SPF
+    engine.set_link_metric('R3', 'R4', 1)
+    engine.run()
+    assert engine.routing_table('R1')['10.0.4.0/24']['cost'] == 6
+    assert engine.matches_full_spf()
+
+    # The check works on the side: no counters or routes move
+    before = engine.report()
+    assert engine.matches_full_spf() and engine.report() == before
+
+    # A dead router: neighbors drop it at once, its LSP ages out later
+    engine.router_down('R4')
+    engine.run()
+    assert '10.0.4.0/24' not in engine.routing_table('R1')
+    last_lsp = engine.lsdb['R1']['R4']
+    engine.run(until=last_lsp.expires_at + 1, stop_when_converged=False)
+    assert engine.lsdb['R1']['R4'].adjacencies is None and engine.lsdbs_synchronized()
+
+    # A late copy of the purged LSP that still carries remaining lifetime
+    # is answered with the purge, not installed
+    before = engine.report()
+    engine._schedule(engine.now, engine.DELIVER, ('R1', 'R3', last_lsp._replace(expires_at=engine.now + 100)))
+    report = report_since(before, engine.run())
+    assert engine.lsdb['R1']['R4'].adjacencies is None and report['lsps']['older'] == 1
+    assert '10.0.4.0/24' not in engine.routing_table('R1')
+
+    # After ZeroAgeLifetime the header goes, and a copy that outlived its
+    # lifetime in transit is dropped as a purge of an unknown LSP
+    engine.run(until=engine.now + engine.zero_age_lifetime + 1, stop_when_converged=False)
+    assert 'R4' not in engine.lsdb['R1']
+    before = engine.report()
+    engine._schedule(engine.now, engine.DELIVER, ('R1', 'R3', last_lsp))
+    report = report_since(before, engine.run())
+    assert 'R4' not in engine.lsdb['R1'] and report['lsps']['expired'] == 1
+    assert report['lsps']['installed'] == 0 and report['total_messages'] == 0
+
+    # Random networks: PRC and full SPF agree, with far less work
+    network, prefixes = random_network(200, seed=3)
+    changes = random.Random(4).sample(range(200), 20)
+    results = []
+    for prc in (True, False):
+        engine = ISISEngine(network, prefixes, partial_route_calculation=prc)
+        engine.run()
+        before = engine.report()
+        for i, router in enumerate(changes):
+            engine.set_prefix(router, f"192.168.{i}.0/24", i, at=engine.now + i)
+        report = report_since(before, engine.run())
+        assert engine.lsdbs_synchronized() and engine.matches_full_spf()
+        results.append((engine.routes, report['calculations']['spf']))
+        print_report(f"200 routers, 20 prefix changes, PRC {'on' if prc else 'off'}", report)
+    assert results[0][0] == results[1][0]
+    assert results[0][1] == 0 and results[1][1] == 200 * 20
+
+    print("\n--- All IS-IS Engine Tests Passed ---")
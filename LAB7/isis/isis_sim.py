@@ -1,11 +1,44 @@
-import networkx as nx
-import matplotlib
-matplotlib.use('Agg') # Use a non-GUI backend
-import matplotlib.pyplot as plt
-import heapq
+import argparse
+import os
+import random
+import sys
+
+# The SPF engine is shared by the OSPF and IS-IS simulators and lives in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from spf import dijkstra_ecmp
+except ImportError:
+    print("Error: Could not import from spf.py.")
+    print("Make sure spf.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from link_state import build_routing_table, print_routing_table, run_batch_spf, simulate_topology
+except ImportError:
+    print("Error: Could not import from link_state.py.")
+    print("Make sure link_state.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from isis_engine import ISISEngine, print_report, random_network, report_since
+except ImportError:
+    print("Error: Could not import from isis_engine.py.")
+    print("Make sure it is in the same directory.")
+    exit(1)
+try:
+    from topology import add_topology_arguments, adjacency, topology_from_args
+except ImportError:
+    print("Error: Could not import from topology.py.")
+    print("Make sure topology.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from render import figure_graph, plotting
+except ImportError:
+    print("Error: Could not import from render.py.")
+    print("Make sure render.py is in the LAB7 directory.")
+    exit(1)
 
 def draw_graph_with_costs(graph, pos, title):
     """Helper function to draw the network graph with link costs."""
+    nx, plt = plotting()
     plt.figure(figsize=(12, 8))
     labels = nx.get_edge_attributes(graph, 'weight')
     nx.draw(graph, pos, with_labels=True, node_color='lightcoral', node_size=2500, font_size=16, font_weight='bold')
@@ -17,60 +50,18 @@ def draw_graph_with_costs(graph, pos, title):
     print(f"\n*** Graph saved to {filename} ***") 
     plt.close() 
 
-def dijkstra(graph, start_node):
-    """Implements Dijkstra's algorithm to find shortest paths."""
-    
-    pq = [(0, start_node, None)]
-    distances = {node: float('inf') for node in graph.nodes}
-    distances[start_node] = 0
-    predecessors = {node: None for node in graph.nodes}
-    visited = set()
-
-    while pq:
-        cost, node, prev = heapq.heappop(pq)
-        
-        if node in visited:
-            continue
-        visited.add(node)
-
-        for neighbor in graph.neighbors(node):
-            if neighbor not in visited:
-                edge_data = graph.get_edge_data(node, neighbor)
-                new_cost = cost + edge_data['weight']
-                
-                if new_cost < distances[neighbor]:
-                    distances[neighbor] = new_cost
-                    predecessors[neighbor] = node
-                    heapq.heappush(pq, (new_cost, neighbor, node))
-                    
-    return distances, predecessors
-
-def build_routing_table(start_node, predecessors):
-    """Builds a routing table from Dijkstra's predecessors map."""
-    table = {}
-    for dest in predecessors:
-        if dest == start_node:
-            table[dest] = {'next_hop': '-', 'cost': 0}
-            continue
-            
-        if predecessors[dest] is None:
-            table[dest] = {'next_hop': '-', 'cost': float('inf')}
-            continue
-
-        curr = dest
-        while predecessors[curr] is not None and predecessors[curr] != start_node:
-            curr = predecessors[curr]
-        
-        table[dest] = {'next_hop': curr, 'cost': 0}
-            
-    return table
+def simulate_is_is_topology(edges, workers=None, sources=None, seed=1):
+    """IS-IS on a topology from a file or a generator; see link_state.simulate_topology()."""
+    return simulate_topology("IS-IS", edges, workers, sources, seed)
 
-def simulate_is_is():
-    """Simulates the IS-IS protocol (using Dijkstra)."""
+def simulate_is_is(batch=False, workers=None, render=True):
+    """
+    Simulates the IS-IS protocol (using Dijkstra). With render=False no
+    figure is drawn and networkx/matplotlib are never imported.
+    """
     
     print("--- Simulating IS-IS (Link-State / Dijkstra) ---")
     
-    G = nx.Graph()
     edges = [
         ('R1', 'R2', 10), ('R1', 'R3', 5),
         ('R2', 'R3', 2), ('R2', 'R4', 1),
@@ -78,40 +69,97 @@ def simulate_is_is():
         ('R4', 'R5', 4),
         ('R5', 'R1', 7)
     ]
-    for u, v, w in edges:
-        G.add_edge(u, v, weight=w)
+    network = adjacency(edges)
 
-    print(f"Network Nodes: {list(G.nodes)}")
+    print(f"Network Nodes: {list(network)}")
     print(f"Network Links (with metrics): {edges}\n")
     
-    link_state_database = G
-    print("Step 1: Link-State PDU (LSP) flooding simulated.")
-    print("All routers now have a complete map (LSDB) of the network.\n")
+    print("Step 1: Every router originates its Link-State PDU (LSP) and floods it to its neighbors.")
+    prefixes = {node: {f"10.0.{node[1:]}.0/24": 0} for node in network}
+    flooding = ISISEngine(network, prefixes)
+    print_report("LSP flooding", flooding.run())
+    print(f"All routers now hold the same LSDB ({len(flooding.lsdb[edges[0][0]])} LSPs).\n")
+    
+    # The LSDB is compiled once into a compact CSR graph shared by every SPF run
+    link_state_database = flooding.link_state_database(edges[0][0])
     
-    pos = nx.spring_layout(G)
-    draw_graph_with_costs(G, pos, "IS-IS Network Topology (Link Metrics)")
+    if render:
+        G, pos = figure_graph(edges)
+        draw_graph_with_costs(G, pos, "IS-IS Network Topology (Link Metrics)")
     
     all_routing_tables = {}
     
-    print("Step 2: Each router runs Dijkstra's algorithm (IS-IS uses SPF).\n")
+    if batch:
+        print("Step 2: Batch mode - all routers run SPF in parallel on a process pool.\n")
+        run_batch_spf(link_state_database, workers)
+    else:
+        print("Step 2: Each router runs Dijkstra's algorithm (IS-IS uses SPF).\n")
     
-    for router_name in G.nodes:
-        print(f"--- Router {router_name} Calculations ---")
+        for router_name in network:
+            print(f"--- Router {router_name} Calculations ---")
         
-        distances, predecessors = dijkstra(link_state_database, router_name)
+            distances, first_hops, _ = dijkstra_ecmp(link_state_database, router_name)
         
-        routing_table = build_routing_table(router_name, predecessors)
-        for dest in routing_table:
-            routing_table[dest]['cost'] = distances[dest]
+            routing_table = build_routing_table(router_name, distances, first_hops)
             
-        all_routing_tables[router_name] = routing_table
+            all_routing_tables[router_name] = routing_table
         
-        print(f"Routing Table for Router {router_name}:")
-        print(f"  {'Destination':<12} | {'Next Hop':<10} | {'Total Cost':<10}")
-        print("  " + "-"*40)
-        for dest, info in sorted(routing_table.items()):
-            print(f"  {dest:<12} | {info['next_hop']:<10} | {info['cost']:<10}")
+            print_routing_table(router_name, routing_table)
+
+    print("Step 3: R4 advertises a new prefix. Only leaf (IP reachability) entries of its")
+    print("LSP change, so routers run a partial route calculation (PRC) instead of SPF.\n")
+    before = flooding.report()
+    flooding.set_prefix('R4', '10.4.1.0/24', 3)
+    print_report("Prefix change", report_since(before, flooding.run()))
+    print()
+    print_routing_table('R1', flooding.routing_table('R1'))
+
+def simulate_isis_flooding(network=None, routers=200, seed=1, changes=20):
+    """
+    LSP flooding on a larger network (random, or the given {router:
+    {neighbor: metric}}, one prefix per router), then `changes` prefix
+    changes handled with and without PRC to show the SPF work saved.
+    """
+    print("--- Simulating IS-IS LSP flooding and PRC ---")
+    if network is None:
+        network, prefixes = random_network(routers, seed=seed)
+    else:
+        prefixes = {node: {f"10.{i // 256}.{i % 256}.0/24": 0} for i, node in enumerate(network)}
+    print(f"Network: {len(network)} routers, {sum(len(links) for links in network.values()) // 2} links\n")
+
+    changed = random.Random(seed).sample(list(network), min(changes, len(network)))
+    for prc in (True, False):
+        engine = ISISEngine(network, prefixes, partial_route_calculation=prc)
+        if prc:
+            print_report("Initial flooding", engine.run())
+            print()
+        else:
+            engine.run()
+        before = engine.report()
+        for i, router in enumerate(changed):
+            engine.set_prefix(router, f"192.168.{i % 256}.0/24", 1, at=engine.now + i)
+        print_report(f"{len(changed)} prefix changes, PRC {'on' if prc else 'off'}",
+                     report_since(before, engine.run()))
         print()
 
 if __name__ == "__main__":
-    simulate_is_is()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", action="store_true",
+                        help="compute all routing tables in parallel instead of router by router")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--headless", action="store_true",
+                        help="draw no figures (networkx and matplotlib are not even imported)")
+    parser.add_argument("--flooding", action="store_true",
+                        help="LSP flooding and PRC on a larger network (--routers, --topology or --generate)")
+    parser.add_argument("--routers", type=int, default=200, help="random network size for --flooding")
+    add_topology_arguments(parser)
+    parser.add_argument("--sources", type=int, default=None,
+                        help="routers that run SPF on a loaded topology (default: all up to 2000 routers, else 64)")
+    args = parser.parse_args()
+    edges = topology_from_args(args)
+    if args.flooding:
+        simulate_isis_flooding(adjacency(edges) if edges is not None else None, args.routers, args.seed)
+    elif edges is not None:
+        simulate_is_is_topology(edges, args.workers, args.sources, args.seed)
+    else:
+        simulate_is_is(batch=args.batch, workers=args.workers, render=not args.headless)
\ No newline at end of file
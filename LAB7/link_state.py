@@ -0,0 +1,80 @@
+import random
+import time
+
+from spf import all_routers_spf, routing_table_from_arrays
+from topology import csr_graph
+
+
+# --- Routing tables ---
+
+def build_routing_table(start_node, distances, first_hops):
+    """
+    Builds a routing table from the SPF's first-hop sets. Every equal-cost
+    next hop is kept in 'next_hops' (ECMP); 'next_hop' is the one on the SPT.
+    """
+    table = {}
+    for dest, hops in first_hops.items():
+        if dest == start_node:
+            table[dest] = {'next_hop': '-', 'next_hops': [], 'cost': 0}
+        elif not hops:
+            table[dest] = {'next_hop': '-', 'next_hops': [], 'cost': float('inf')}
+        else:
+            table[dest] = {'next_hop': hops[0], 'next_hops': hops, 'cost': distances[dest]}
+    return table
+
+
+def print_routing_table(router_name, routing_table):
+    print(f"Routing Table for Router {router_name}:")
+    print(f"  {'Destination':<12} | {'Next Hop':<10} | {'Total Cost':<10}")
+    print("  " + "-"*40)
+    for dest, info in sorted(routing_table.items()):
+        next_hops = ", ".join(map(str, info['next_hops'])) or '-'
+        print(f"  {dest:<12} | {next_hops:<10} | {info['cost']:<10}")
+    print()
+
+
+# --- Batch and loaded-topology runs ---
+
+def run_batch_spf(link_state_database, workers=None, print_limit=20, sources=None):
+    """
+    Batch mode: computes every router's routing table (or those of the
+    `sources` router ids) on a process pool. Returns the (distances,
+    first_hops, ecmp) arrays from all_routers_spf(); tables are only
+    expanded for printing on small networks.
+    """
+    start = time.perf_counter()
+    distances, first_hops, ecmp = all_routers_spf(link_state_database, workers, sources=sources)
+    elapsed = time.perf_counter() - start
+    print(f"Computed {len(distances)} routing tables in {elapsed:.3f} s.\n")
+
+    if link_state_database.node_count <= print_limit:
+        for row, source in enumerate(range(link_state_database.node_count) if sources is None else sources):
+            print_routing_table(link_state_database.names[source], routing_table_from_arrays(
+                link_state_database, source, distances[row], first_hops[row],
+                ecmp[row] if ecmp is not None else None))
+    return distances, first_hops, ecmp
+
+
+def simulate_topology(protocol, edges, workers=None, sources=None, seed=1):
+    """
+    Runs a link-state `protocol` (the name is only printed) on a topology
+    from a file or a generator, streamed straight into the CSR LSDB. Every
+    router runs SPF on networks of up to 2000 routers; on larger ones only
+    `sources` sampled routers do (default 64), since the full routing
+    tables grow with the square of the network size.
+    """
+    print(f"--- Simulating {protocol} on a loaded topology ---")
+    start = time.perf_counter()
+    link_state_database = csr_graph(edges)
+    n = link_state_database.node_count
+    print(f"LSDB: {n} routers, {link_state_database.edge_count} links "
+          f"(built in {time.perf_counter() - start:.2f} s).")
+    if sources is None and n > 2000:
+        sources = 64
+    chosen = sorted(random.Random(seed).sample(range(n), sources)) if sources and sources < n else None
+
+    distances, first_hops, ecmp = run_batch_spf(link_state_database, workers, sources=chosen)
+    reachable = distances[distances < float('inf')]
+    print(f"Reachable (router, destination) pairs: {reachable.size} of {distances.size}, "
+          f"longest shortest path: {reachable.max():g}")
+    return distances, first_hops, ecmp
\ No newline at end of file
@@ -1,11 +1,37 @@
-import networkx as nx
-import matplotlib
-matplotlib.use('Agg') # Use a non-GUI backend
-import matplotlib.pyplot as plt
-import heapq
+import argparse
+import os
+import sys
+
+# The SPF engine is shared by the OSPF and IS-IS simulators and lives in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from spf import CSRGraph, IncrementalSPF, dijkstra_ecmp
+except ImportError:
+    print("Error: Could not import from spf.py.")
+    print("Make sure spf.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from link_state import build_routing_table, print_routing_table, run_batch_spf, simulate_topology
+except ImportError:
+    print("Error: Could not import from link_state.py.")
+    print("Make sure link_state.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from topology import add_topology_arguments, adjacency, topology_from_args
+except ImportError:
+    print("Error: Could not import from topology.py.")
+    print("Make sure topology.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from render import figure_graph, plotting, render_parallel
+except ImportError:
+    print("Error: Could not import from render.py.")
+    print("Make sure render.py is in the LAB7 directory.")
+    exit(1)
 
 def draw_graph_with_costs(graph, pos, title):
     """Helper function to draw the network graph with link costs."""
+    nx, plt = plotting()
     plt.figure(figsize=(12, 8))
     labels = nx.get_edge_attributes(graph, 'weight')
     nx.draw(graph, pos, with_labels=True, node_color='skyblue', node_size=2500, font_size=16, font_weight='bold')
@@ -17,8 +43,12 @@ def draw_graph_with_costs(graph, pos, title):
     print(f"\n*** Graph saved to {filename} ***") 
     plt.close() 
 
-def draw_spt(graph, spt_edges, pos, router_name, title):
-    """Helper function to draw a specific router's Shortest Path Tree."""
+def draw_spt(graph, pos, spt_edges, router_name, title):
+    """
+    Helper function to draw a specific router's Shortest Path Tree.
+    Returns the file name (it may run in a render worker).
+    """
+    nx, plt = plotting()
     plt.figure(figsize=(12, 8))
     
     nx.draw(graph, pos, with_labels=True, node_color='gray', node_size=2000, font_size=14, alpha=0.3)
@@ -40,69 +70,71 @@ def draw_spt(graph, spt_edges, pos, router_name, title):
     
     filename = f"ospf_spt_{router_name}.png" 
     plt.savefig(filename) 
-    print(f"*** SPT graph saved to {filename} ***") 
     plt.close() 
+    return filename
 
-def dijkstra(graph, start_node):
-    """Implements Dijkstra's algorithm to find shortest paths."""
-    
-    pq = [(0, start_node, None)]
-    distances = {node: float('inf') for node in graph.nodes}
-    distances[start_node] = 0
-    predecessors = {node: None for node in graph.nodes}
-    spt_edges = []
-    visited = set()
-
-    while pq:
-        cost, node, prev = heapq.heappop(pq)
-        
-        if node in visited:
-            continue
-            
-        visited.add(node)
-        
-        if prev is not None:
-            spt_edges.append((prev, node))
-
-        for neighbor in graph.neighbors(node):
-            if neighbor not in visited:
-                edge_data = graph.get_edge_data(node, neighbor)
-                new_cost = cost + edge_data['weight']
-                
-                if new_cost < distances[neighbor]:
-                    distances[neighbor] = new_cost
-                    predecessors[neighbor] = node
-                    heapq.heappush(pq, (new_cost, neighbor, node))
-                    
-    return distances, predecessors, spt_edges
-
-def build_routing_table(start_node, predecessors):
-    """Builds a routing table from Dijkstra's predecessors map."""
-    table = {}
-    for dest in predecessors:
-        if dest == start_node:
-            table[dest] = {'next_hop': '-', 'cost': 0}
-            continue
-            
-        if predecessors[dest] is None:
-            table[dest] = {'next_hop': '-', 'cost': float('inf')}
-            continue
+def full_routing_tables(link_state_database):
+    """Recomputes every router's routing table from scratch."""
+    tables = {}
+    for router_name in link_state_database.names:
+        distances, first_hops, _ = dijkstra_ecmp(link_state_database, router_name)
+        tables[router_name] = build_routing_table(router_name, distances, first_hops)
+    return tables
 
-        curr = dest
-        while predecessors[curr] is not None and predecessors[curr] != start_node:
-            curr = predecessors[curr]
-        
-        table[dest] = {'next_hop': curr, 'cost': 0} 
-            
-    return table
 
+def simulate_link_events(link_state_database, events):
+    """
+    Applies link events to the network and updates every router's SPT
+    incrementally. Events are ('cost', u, v, new_cost), ('down', u, v)
+    or ('up', u, v). Returns one report per event.
+    """
+    spf = IncrementalSPF(link_state_database)
+    reports = []
+
+    print(f"  {'Event':<22} | {'Time (ms)':<10} | {'Routers changed':<15}")
+    print("  " + "-"*55)
+    for event in events:
+        kind, u, v = event[:3]
+        if kind == 'cost':
+            report = spf.set_link_cost(u, v, event[3])
+            label = f"cost {u}-{v} -> {event[3]}"
+        elif kind == 'down':
+            report = spf.link_down(u, v)
+            label = f"link {u}-{v} down"
+        elif kind == 'up':
+            report = spf.link_up(u, v)
+            label = f"link {u}-{v} up"
+        else:
+            raise ValueError(f"Unknown link event: {kind}")
+        reports.append(report)
+        print(f"  {label:<22} | {report['seconds'] * 1000:<10.3f} | "
+              f"{report['routers_changed']} {report['changed_routers']}")
 
-def simulate_ospf():
-    """Simulates the Open Shortest Path First (OSPF) protocol."""
+        # The incremental result must equal a full recomputation (the
+        # incremental SPF tracks the SPT next hop, not the ECMP set)
+        expected = full_routing_tables(spf.current_graph())
+        for router in spf.names:
+            table = spf.routing_table(router)
+            assert all(table[dest]['next_hop'] == info['next_hop'] and table[dest]['cost'] == info['cost']
+                       for dest, info in expected[router].items())
+
+    return reports
+
+
+def simulate_ospf_topology(edges, workers=None, sources=None, seed=1):
+    """OSPF on a topology from a file or a generator; see link_state.simulate_topology()."""
+    return simulate_topology("OSPF", edges, workers, sources, seed)
+
+def simulate_ospf(batch=False, workers=None, render=True, render_workers=None):
+    """
+    Simulates the Open Shortest Path First (OSPF) protocol. With
+    render=False no figures are drawn and networkx/matplotlib are never
+    imported; otherwise the SPT figures are drawn on `render_workers`
+    processes, all with the same layout.
+    """
     
     print("--- Simulating OSPF (Dijkstra) ---")
     
-    G = nx.Graph()
     edges = [
         ('A', 'B', 5), ('A', 'C', 4), ('A', 'D', 2),
         ('B', 'C', 3), ('B', 'F', 5),
@@ -110,43 +142,71 @@ def simulate_ospf():
         ('D', 'E', 7),
         ('E', 'F', 6)
     ]
-    for u, v, w in edges:
-        G.add_edge(u, v, weight=w)
+    network = adjacency(edges)
 
-    print(f"Network Nodes: {list(G.nodes)}")
+    print(f"Network Nodes: {list(network)}")
     print(f"Network Links (with costs): {edges}\n")
     
-    link_state_database = G
+    # The LSDB is compiled once into a compact CSR graph shared by every SPF run
+    link_state_database = CSRGraph.from_adjacency({node: list(links.items()) for node, links in network.items()})
     print("Step 1: Link-State Advertisement (LSA) flooding simulated.")
     print("All routers now have a complete map (LSDB) of the network.\n")
     
-    pos = nx.spring_layout(G)
-    draw_graph_with_costs(G, pos, "OSPF Network Topology (Link Costs)")
+    if render:
+        G, pos = figure_graph(edges)
+        draw_graph_with_costs(G, pos, "OSPF Network Topology (Link Costs)")
     
     all_routing_tables = {}
+    spt_figures = []
     
-    print("Step 2: Each router runs Dijkstra's algorithm to build its SPT.\n")
+    if batch:
+        print("Step 2: Batch mode - all routers run SPF in parallel on a process pool.\n")
+        run_batch_spf(link_state_database, workers)
+    else:
+        print("Step 2: Each router runs Dijkstra's algorithm to build its SPT.\n")
     
-    for router_name in G.nodes:
-        print(f"--- Router {router_name} Calculations ---")
+        for router_name in network:
+            print(f"--- Router {router_name} Calculations ---")
         
-        distances, predecessors, spt_edges = dijkstra(link_state_database, router_name)
+            distances, first_hops, spt_edges = dijkstra_ecmp(link_state_database, router_name)
         
-        routing_table = build_routing_table(router_name, predecessors)
-        for dest in routing_table:
-            routing_table[dest]['cost'] = distances[dest]
+            routing_table = build_routing_table(router_name, distances, first_hops)
             
-        all_routing_tables[router_name] = routing_table
+            all_routing_tables[router_name] = routing_table
         
-        print(f"Shortest Path Tree (SPT) for Router {router_name} (Edges): {spt_edges}")
-        print(f"Routing Table for Router {router_name}:")
-        print(f"  {'Destination':<12} | {'Next Hop':<10} | {'Total Cost':<10}")
-        print("  " + "-"*40)
-        for dest, info in sorted(routing_table.items()):
-            print(f"  {dest:<12} | {info['next_hop']:<10} | {info['cost']:<10}")
-        print()
+            print(f"Shortest Path Tree (SPT) for Router {router_name} (Edges): {spt_edges}")
+            print_routing_table(router_name, routing_table)
         
-        draw_spt(G, spt_edges, pos, router_name, f"Shortest Path Tree (SPT) for Router {router_name}")
+            spt_figures.append((spt_edges, router_name, f"Shortest Path Tree (SPT) for Router {router_name}"))
+
+    if render and spt_figures:
+        for filename in render_parallel(draw_spt, (G, pos), spt_figures, render_workers):
+            print(f"*** SPT graph saved to {filename} ***")
+        print()
+
+    print("Step 3: Link changes are flooded; routers update their SPTs incrementally.\n")
+    simulate_link_events(link_state_database, [
+        ('cost', 'C', 'D', 6),
+        ('down', 'A', 'D'),
+        ('up', 'A', 'D'),
+        ('cost', 'C', 'D', 2),
+    ])
 
 if __name__ == "__main__":
-    simulate_ospf()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", action="store_true",
+                        help="compute all routing tables in parallel instead of router by router")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--headless", action="store_true",
+                        help="draw no figures (networkx and matplotlib are not even imported)")
+    parser.add_argument("--render-workers", type=int, default=None, help="worker processes drawing SPT figures")
+    add_topology_arguments(parser)
+    parser.add_argument("--sources", type=int, default=None,
+                        help="routers that run SPF on a loaded topology (default: all up to 2000 routers, else 64)")
+    args = parser.parse_args()
+    edges = topology_from_args(args)
+    if edges is not None:
+        simulate_ospf_topology(edges, args.workers, args.sources, args.seed)
+    else:
+        simulate_ospf(batch=args.batch, workers=args.workers, render=not args.headless,
+                      render_workers=args.render_workers)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import multiprocessing as mp
+import os
+
+# networkx and matplotlib take longer to import than a batch run takes to
+# compute, so they are only loaded by the first figure drawn
+_modules = None
+
+
+def plotting() -> tuple:
+    """(networkx, matplotlib.pyplot), imported on first use with the non-GUI backend."""
+    global _modules
+    if _modules is None:
+        import matplotlib
+        matplotlib.use('Agg') # Use a non-GUI backend
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        _modules = nx, plt
+    return _modules
+
+
+def figure_graph(edges, layout: str = 'spring') -> tuple:
+    """
+    The networkx Graph of (u, v) or (u, v, weight) links, built in link
+    order, and its layout, computed once so every figure of a run can
+    reuse it. Returns (graph, pos).
+    """
+    nx, _ = plotting()
+    graph = nx.Graph()
+    for edge in edges:
+        if len(edge) > 2:
+            graph.add_edge(edge[0], edge[1], weight=edge[2])
+        else:
+            graph.add_edge(*edge)
+    pos = nx.circular_layout(graph) if layout == 'circular' else nx.spring_layout(graph)
+    return graph, pos
+
+
+# --- Parallel rendering ---
+
+# Set in each worker by _init_render_worker. With the 'fork' start method
+# the graph and layout are inherited from the parent, otherwise they are
+# pickled once per worker; either way tasks carry only their own figure's
+# arguments.
+_worker_draw = None
+_worker_args = ()
+
+
+def _init_render_worker(draw, shared_args: tuple):
+    global _worker_draw, _worker_args
+    _worker_draw = draw
+    _worker_args = shared_args
+    plotting()
+
+
+def _render(job: tuple):
+    return _worker_draw(*_worker_args, *job)
+
+
+def render_parallel(draw, shared_args: tuple, jobs, workers: int = None) -> list:
+    """
+    Calls draw(*shared_args, *job) for every job on a process pool and
+    returns the results in job order. workers=1 draws in this process.
+    """
+    jobs = list(jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        _init_render_worker(draw, shared_args)
+        return [_render(job) for job in jobs]
+    method = "fork" if "fork" in mp.get_all_start_methods() else None
+    with mp.get_context(method).Pool(workers, initializer=_init_render_worker,
+                                     initargs=(draw, shared_args)) as pool:
+        return pool.map(_render, jobs)
@@ -0,0 +1,325 @@
+import heapq
+import itertools
+import random
+import time
+
+
+class RIPEngine:
+    """
+    Event-driven RIP on a virtual clock.
+
+    Routers exchange distance vectors as messages on an event heap ordered
+    by (time, sequence); the clock jumps from one event to the next, so
+    nothing ever sleeps. Modeled behavior:
+      - triggered updates: a route change schedules an update after
+        `triggered_delay`, which carries only the routes changed since the
+        last one (delta_updates=True) or the whole table (False). With
+        triggered_updates=False changes only spread with periodic updates;
+      - periodic updates of the whole table every `periodic_interval`
+        seconds (with +/- `jitter` fraction), route timeout and garbage
+        collection after `route_timeout` and `gc_time` seconds;
+      - split horizon: 'poison' (poison reverse), 'simple' or None;
+      - metrics are capped at INFINITY (16).
+    Message and route-entry counts are kept per update kind.
+    """
+
+    INFINITY = 16
+
+    PERIODIC = 0
+    TRIGGERED = 1
+    DELIVER = 2
+    LINK = 3
+
+    def __init__(self, network: dict, split_horizon='poison', delta_updates: bool = True,
+                 triggered_updates: bool = True, periodic_interval=30.0, triggered_delay: float = 1.0,
+                 link_delay: float = 0.01, route_timeout: float = 180.0, gc_time: float = 120.0,
+                 jitter: float = 0.15, seed=None):
+        if split_horizon not in ('poison', 'simple', None):
+            raise ValueError(f"Unknown split horizon mode: {split_horizon}")
+        # {router: {neighbor: cost}}
+        self.neighbors = {node: dict(links) for node, links in network.items()}
+        self.split_horizon = split_horizon
+        self.delta_updates = delta_updates
+        self.triggered_updates = triggered_updates
+        self.periodic_interval = periodic_interval
+        self.triggered_delay = triggered_delay
+        self.link_delay = link_delay
+        self.route_timeout = route_timeout
+        self.gc_time = gc_time
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+        self.now = 0.0
+        self.events = []
+        self.sequence = itertools.count()
+        # Events other than periodic timers still waiting on the heap
+        self.in_flight = 0
+
+        # router -> {dest: [next_hop, metric, last_updated]}
+        self.routes = {node: {node: [node, 0, 0.0]} for node in self.neighbors}
+        # router -> destinations changed since its last triggered update
+        self.changed = {node: {node} for node in self.neighbors}
+        self.trigger_scheduled = set()
+
+        self.messages = {'triggered': 0, 'periodic': 0}
+        self.entries = {'triggered': 0, 'periodic': 0}
+        self.route_changes = 0
+        self.last_change = 0.0
+        self.events_processed = 0
+
+        # Cold start: every router announces itself straight away and
+        # then runs its periodic timer, staggered by the jitter
+        for node in self.neighbors:
+            self._schedule_trigger(node, 0.0)
+            if periodic_interval:
+                self._schedule(self._next_period(), self.PERIODIC, node)
+
+    # --- Event plumbing ---
+
+    def _schedule(self, event_time: float, kind: int, data):
+        if kind != self.PERIODIC:
+            self.in_flight += 1
+        heapq.heappush(self.events, (event_time, next(self.sequence), kind, data))
+
+    def _next_period(self) -> float:
+        spread = self.jitter * self.periodic_interval
+        return self.now + self.periodic_interval + self.rng.uniform(-spread, spread)
+
+    def _schedule_trigger(self, router, delay: float):
+        if router not in self.trigger_scheduled:
+            self.trigger_scheduled.add(router)
+            self._schedule(self.now + delay, self.TRIGGERED, router)
+
+    def _route_changed(self, router, dest, route):
+        route[2] = self.now
+        self.route_changes += 1
+        self.last_change = self.now
+        if self.triggered_updates:
+            self.changed[router].add(dest)
+            self._schedule_trigger(router, self.triggered_delay)
+
+    # --- Sending ---
+
+    def _advertise(self, router, dests, kind: str, only_to=None):
+        """Sends the routes for `dests` to each neighbor (or just `only_to`)."""
+        table = self.routes[router]
+        for neighbor in ([only_to] if only_to is not None else self.neighbors[router]):
+            if self.split_horizon is None:
+                entries = [(dest, table[dest][1]) for dest in dests]
+            elif self.split_horizon == 'simple':
+                entries = [(dest, table[dest][1]) for dest in dests if table[dest][0] != neighbor]
+            else:
+                entries = [(dest, self.INFINITY if table[dest][0] == neighbor else table[dest][1])
+                           for dest in dests]
+            if entries:
+                self.messages[kind] += 1
+                self.entries[kind] += len(entries)
+                self._schedule(self.now + self.link_delay, self.DELIVER, (neighbor, router, entries))
+
+    def _triggered_update(self, router):
+        self.trigger_scheduled.discard(router)
+        changed = self.changed[router]
+        dests = [dest for dest in changed if dest in self.routes[router]]
+        self.changed[router] = set()
+        if not self.delta_updates:
+            dests = list(self.routes[router])
+        if dests:
+            self._advertise(router, dests, 'triggered')
+
+    def _periodic_update(self, router):
+        # Routes not refreshed in time are timed out, then garbage collected
+        table = self.routes[router]
+        for dest, route in list(table.items()):
+            if dest == router:
+                continue
+            if route[1] < self.INFINITY and self.now - route[2] > self.route_timeout:
+                route[1] = self.INFINITY
+                self._route_changed(router, dest, route)
+            elif route[1] >= self.INFINITY and self.now - route[2] > self.gc_time:
+                del table[dest]
+        self._advertise(router, list(table), 'periodic')
+        self._schedule(self._next_period(), self.PERIODIC, router)
+
+    # --- Receiving ---
+
+    def _receive(self, router, sender, entries):
+        cost = self.neighbors[router].get(sender)
+        if cost is None:
+            # The link went down while the message was in flight
+            return
+        table = self.routes[router]
+        infinity = self.INFINITY
+        now = self.now
+        for dest, metric in entries:
+            new_metric = metric + cost
+            if new_metric > infinity:
+                new_metric = infinity
+            route = table.get(dest)
+            if route is None:
+                if new_metric < infinity:
+                    route = table[dest] = [sender, new_metric, now]
+                    self._route_changed(router, dest, route)
+            elif route[0] == sender:
+                # The current next hop is always believed, better or worse
+                if new_metric != route[1]:
+                    route[1] = new_metric
+                    self._route_changed(router, dest, route)
+                elif new_metric < infinity:
+                    route[2] = now
+            elif new_metric < route[1]:
+                route[0] = sender
+                route[1] = new_metric
+                self._route_changed(router, dest, route)
+
+    def _link_event(self, u, v, cost):
+        if cost is None:
+            # Both ends notice the interface going down
+            for a, b in ((u, v), (v, u)):
+                self.neighbors[a].pop(b, None)
+                for dest, route in self.routes[a].items():
+                    if route[0] == b and route[1] < self.INFINITY:
+                        route[1] = self.INFINITY
+                        self._route_changed(a, dest, route)
+        else:
+            # A new or re-costed link: both ends send their full table over it
+            for a, b in ((u, v), (v, u)):
+                old_cost = self.neighbors[a].get(b)
+                self.neighbors[a][b] = cost
+                if old_cost is not None and old_cost != cost:
+                    for dest, route in self.routes[a].items():
+                        if route[0] == b and route[1] < self.INFINITY:
+                            route[1] = min(route[1] - old_cost + cost, self.INFINITY)
+                            self._route_changed(a, dest, route)
+            for a, b in ((u, v), (v, u)):
+                self._advertise(a, list(self.routes[a]), 'triggered', only_to=b)
+
+    # --- Public API ---
+
+    def link_down(self, u, v, at: float = None):
+        self._schedule(self.now if at is None else at, self.LINK, (u, v, None))
+
+    def link_up(self, u, v, cost=1, at: float = None):
+        self._schedule(self.now if at is None else at, self.LINK, (u, v, cost))
+
+    def set_link_cost(self, u, v, cost, at: float = None):
+        self._schedule(self.now if at is None else at, self.LINK, (u, v, cost))
+
+    def run(self, until: float = float('inf'), stop_when_converged: bool = True) -> dict:
+        """
+        Processes events until the virtual clock passes `until` or, with
+        stop_when_converged, until only periodic timers are left (no update
+        in flight and none scheduled). Returns the report.
+        """
+        wall_start = time.perf_counter()
+        events = self.events
+        while events:
+            if stop_when_converged and self.in_flight == 0:
+                break
+            event_time, _, kind, data = events[0]
+            if event_time > until:
+                break
+            heapq.heappop(events)
+            self.now = event_time
+            self.events_processed += 1
+            if kind != self.PERIODIC:
+                self.in_flight -= 1
+
+            if kind == self.DELIVER:
+                self._receive(*data)
+            elif kind == self.TRIGGERED:
+                self._triggered_update(data)
+            elif kind == self.PERIODIC:
+                self._periodic_update(data)
+            else:
+                self._link_event(*data)
+        return self.report(time.perf_counter() - wall_start)
+
+    @property
+    def tables(self) -> dict:
+        """Routing tables in simulate_rip's {router: {dest: {'next_hop', 'cost'}}} shape."""
+        return {node: {dest: {'next_hop': route[0], 'cost': route[1]} for dest, route in table.items()}
+                for node, table in self.routes.items()}
+
+    def report(self, wall_seconds: float = 0.0) -> dict:
+        return {
+            'virtual_time': self.now,
+            'converged_at': self.last_change,
+            'wall_seconds': wall_seconds,
+            'events': self.events_processed,
+            'route_changes': self.route_changes,
+            'messages': dict(self.messages),
+            'route_entries': dict(self.entries),
+            'total_messages': sum(self.messages.values()),
+            'total_route_entries': sum(self.entries.values()),
+        }
+
+
+def random_topology(routers: int, extra_links: int = None, seed=None) -> dict:
+    """
+    Connected random topology with unit link costs: a random tree plus
+    `extra_links` random chords (default: one per router), which keeps
+    the diameter well under RIP's 15-hop limit for a few thousand routers.
+    """
+    rng = random.Random(seed)
+    network = {i: {} for i in range(routers)}
+    for i in range(1, routers):
+        j = rng.randrange(max(0, i - 50), i) if rng.random() < 0.5 else rng.randrange(i)
+        network[i][j] = network[j][i] = 1
+    for _ in range(routers if extra_links is None else extra_links):
+        u, v = rng.sample(range(routers), 2)
+        network[u][v] = network[v][u] = 1
+    return network
+
+
+def print_report(title: str, report: dict):
+    print(f"{title}: converged at t={report['converged_at']:.2f} s (virtual), "
+          f"{report['wall_seconds']:.2f} s wall, {report['route_changes']} route changes")
+    print(f"  messages: {report['total_messages']} "
+          f"(triggered {report['messages']['triggered']}, periodic {report['messages']['periodic']}), "
+          f"route entries: {report['total_route_entries']}")
+
+
+# --- Main execution for testing ---
+if __name__ == "__main__":
+
+    # The LAB7 topology: every router reaches every other at hop distance
+    network = {'A': {'B': 1, 'C': 1}, 'B': {'A': 1, 'C': 1}, 'C': {'A': 1, 'B': 1, 'D': 1},
+               'D': {'C': 1, 'E': 1}, 'E': {'D': 1}}
+    engine = RIPEngine(network, seed=1)
+    report = engine.run()
+    tables = engine.tables
+    assert tables['A']['E'] == {'next_hop': 'C', 'cost': 3}
+    assert tables['E']['B'] == {'next_hop': 'D', 'cost': 3}
+    assert report['converged_at'] < engine.periodic_interval
+
+    # Link failure: E becomes unreachable everywhere
+    engine.link_down('D', 'E')
+    engine.run()
+    assert all(tables['E']['cost'] == RIPEngine.INFINITY
+               for node, tables in engine.tables.items() if node != 'E')
+
+    # Count to infinity on a chain A-B-C when C's link fails, with periodic
+    # updates only: without split horizon A and B keep feeding each other
+    # a stale route until it reaches 16
+    chain = {'A': {'B': 1}, 'B': {'A': 1, 'C': 1}, 'C': {'B': 1}}
+    for mode in (None, 'simple', 'poison'):
+        engine = RIPEngine(chain, split_horizon=mode, triggered_updates=False, jitter=0.0)
+        engine.run(until=40, stop_when_converged=False)
+        before = engine.report()
+        engine.link_down('B', 'C', at=45)
+        report = engine.run(until=1000, stop_when_converged=False)
+        # The dead route is garbage collected once it has been at 16 long enough
+        assert 'C' not in engine.routes['A'] and 'C' not in engine.routes['B']
+        print(f"Split horizon {str(mode):<6}: C unreachable everywhere at t={report['converged_at']:.0f} s, "
+              f"{report['route_changes'] - before['route_changes']} route changes after the failure")
+
+    # Delta-only triggered updates against full-table triggered updates
+    network = random_topology(1000, seed=7)
+    for delta in (True, False):
+        engine = RIPEngine(network, delta_updates=delta, seed=1)
+        report = engine.run()
+        print_report(f"1000 routers, {'delta' if delta else 'full-table'} triggered updates", report)
+        assert report['converged_at'] < engine.periodic_interval
+        assert all(len(table) == 1000 for table in engine.routes.values())
+
+    print("\n--- All RIP Engine Tests Passed ---")
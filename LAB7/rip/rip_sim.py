@@ -1,11 +1,33 @@
-import networkx as nx
-import matplotlib
-matplotlib.use('Agg') # Use a non-GUI backend
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
 import time
 
+try:
+    from rip_engine import RIPEngine, random_topology, print_report
+    from rip_vector import INFINITY, vectorized_rip
+except ImportError:
+    print("Error: Could not import from rip_engine.py or rip_vector.py.")
+    print("Make sure they are in the same directory.")
+    exit(1)
+# The topology loaders are shared by all LAB7 simulators and live in LAB7/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from topology import add_topology_arguments, adjacency, csr_graph, topology_from_args
+except ImportError:
+    print("Error: Could not import from topology.py.")
+    print("Make sure topology.py is in the LAB7 directory.")
+    exit(1)
+try:
+    from render import figure_graph, plotting
+except ImportError:
+    print("Error: Could not import from render.py.")
+    print("Make sure render.py is in the LAB7 directory.")
+    exit(1)
+
 def draw_graph(graph, labels, pos, title):
     """Helper function to draw the network graph and save to file."""
+    nx, plt = plotting()
     plt.figure(figsize=(10, 6))
     nx.draw(graph, pos, with_labels=True, node_color='lightblue', node_size=2000, font_size=16, font_weight='bold')
     nx.draw_networkx_edge_labels(graph, pos, edge_labels=labels, font_color='red')
@@ -16,12 +38,17 @@ def draw_graph(graph, labels, pos, title):
     print(f"\n*** Graph saved to {filename} ***") 
     plt.close() 
 
-def simulate_rip():
-    """Simulates the Routing Information Protocol (RIP)."""
+def simulate_rip(nodes=None, edges=None, verbose=True, round_delay=1, render=True):
+    """
+    Simulates the Routing Information Protocol (RIP). Returns the final
+    routing tables; verbose=False skips printing and drawing, render=False
+    only drawing (networkx/matplotlib are then never imported).
+    """
     
     # 1. Create a network topology
-    nodes = ['A', 'B', 'C', 'D', 'E']
-    edges = [('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'D'), ('D', 'E')]
+    if nodes is None:
+        nodes = ['A', 'B', 'C', 'D', 'E']
+        edges = [('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'D'), ('D', 'E')]
     
     network = {node: {} for node in nodes}
     for u, v in edges:
@@ -34,15 +61,17 @@ def simulate_rip():
         for neighbor in network[node]:
             tables[node][neighbor] = {'next_hop': neighbor, 'cost': 1}
 
-    print("--- Simulating RIP (Bellman-Ford) ---")
-    print(f"Network Nodes: {nodes}")
-    print(f"Network Links (all cost 1): {edges}\n")
+    if verbose:
+        print("--- Simulating RIP (Bellman-Ford) ---")
+        print(f"Network Nodes: {nodes}")
+        print(f"Network Links (all cost 1): {edges}\n")
 
     # 3. Simulate periodic routing updates until convergence
     round_num = 0
     while True:
         round_num += 1
-        print(f"--- ROUND {round_num} ---")
+        if verbose:
+            print(f"--- ROUND {round_num} ---")
         
         changed = False
         tables_snapshot = {node: table.copy() for node, table in tables.items()}
@@ -67,22 +96,28 @@ def simulate_rip():
                         changed = True
 
         # Print tables for this round
-        for node in nodes:
-            print(f"Router {node} Table (Round {round_num}):")
-            for dest, info in sorted(tables[node].items()):
-                print(f"  -> Dest: {dest}, Next Hop: {info['next_hop']}, Cost: {info['cost']}")
-        
-        print("-" * 20)
+        if verbose:
+            for node in nodes:
+                print(f"Router {node} Table (Round {round_num}):")
+                for dest, info in sorted(tables[node].items()):
+                    print(f"  -> Dest: {dest}, Next Hop: {info['next_hop']}, Cost: {info['cost']}")
+            
+            print("-" * 20)
         
         if not changed:
-            print(f"\n*** CONVERGENCE REACHED in {round_num} rounds. ***\n")
+            if verbose:
+                print(f"\n*** CONVERGENCE REACHED in {round_num} rounds. ***\n")
             break
         
         if round_num > 10:
-            print("Reached max rounds, stopping.")
+            if verbose:
+                print("Reached max rounds, stopping.")
             break
             
-        time.sleep(1) 
+        time.sleep(round_delay) 
+
+    if not verbose:
+        return tables
 
     # 4. Display final routing tables
     print("--- FINAL CONVERGED ROUTING TABLES ---")
@@ -93,11 +128,98 @@ def simulate_rip():
         print()
 
     # Visualization
-    G = nx.Graph()
-    G.add_edges_from(edges)
-    pos = nx.spring_layout(G)
-    labels = {(u, v): 1 for u, v in edges}
-    draw_graph(G, labels, pos, "RIP Network Topology (All Link Costs = 1)")
+    if render:
+        G, pos = figure_graph(edges)
+        labels = {(u, v): 1 for u, v in edges}
+        draw_graph(G, labels, pos, "RIP Network Topology (All Link Costs = 1)")
+    return tables
+
+def simulate_rip_events(routers=None, seed=1, network=None):
+    """
+    Runs RIP on the event-driven engine (virtual clock, triggered delta
+    updates, poison reverse). With `routers` a random topology of that size
+    is used, or the given {router: {neighbor: cost}} `network`, and delta
+    updates are compared with full-table updates.
+    """
+    print("--- Simulating RIP (event-driven, virtual time) ---")
+
+    if network is not None:
+        nodes = list(network)
+        failed_link = (nodes[0], next(iter(network[nodes[0]])))
+    elif routers is None:
+        nodes = ['A', 'B', 'C', 'D', 'E']
+        edges = [('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'D'), ('D', 'E')]
+        network = {node: {} for node in nodes}
+        for u, v in edges:
+            network[u][v] = 1
+            network[v][u] = 1
+        failed_link = ('D', 'E')
+    else:
+        network = random_topology(routers, seed=seed)
+        nodes = list(network)
+        failed_link = (0, next(iter(network[0])))
+    print(f"Network: {len(nodes)} routers, {sum(len(links) for links in network.values()) // 2} links\n")
+
+    for delta in (True, False):
+        engine = RIPEngine(network, delta_updates=delta, seed=seed)
+        mode = 'delta' if delta else 'full-table'
+        print_report(f"Initial convergence, {mode} triggered updates", engine.run())
+        before = engine.report()
+        engine.link_down(*failed_link)
+        report = engine.run()
+        print(f"  after link {failed_link[0]}-{failed_link[1]} fails: "
+              f"{report['total_messages'] - before['total_messages']} messages, "
+              f"{report['total_route_entries'] - before['total_route_entries']} route entries, "
+              f"reconverged {report['converged_at'] - before['virtual_time']:.2f} s later\n")
+
+    if len(nodes) <= 20:
+        print("--- FINAL ROUTING TABLES (after the link failure) ---")
+        tables = engine.tables
+        for node in nodes:
+            print(f"Router {node}'s Final Table:")
+            for dest, info in sorted(tables[node].items()):
+                print(f"  -> Dest: {dest}, Next Hop: {info['next_hop']}, Cost: {info['cost']}")
+            print()
+
+def simulate_rip_vectorized(routers=None, seed=1, edges=None):
+    """
+    Synchronous RIP rounds using the N x N matrix solver, on a random
+    topology with `routers` routers or on the given (u, v, cost) links,
+    which are streamed straight into CSR form.
+    """
+    print("--- Simulating RIP (vectorized Bellman-Ford) ---")
+    network = random_topology(routers, seed=seed) if edges is None else csr_graph(edges)
+    start = time.perf_counter()
+    names, cost, next_hop, rounds = vectorized_rip(network)
+    elapsed = time.perf_counter() - start
+    routers = len(names)
+    reachable = int((cost < INFINITY).sum())
+    print(f"{routers} routers converged in {rounds} rounds ({elapsed:.2f} s).")
+    print(f"  reachable (router, destination) pairs: {reachable} of {routers * routers}, "
+          f"longest route: {int(cost[cost < INFINITY].max())} hops")
+    print(f"  tables: {(cost.nbytes + next_hop.nbytes) / 2**20:.1f} MB "
+          f"({cost.dtype} costs, {next_hop.dtype} next hops)")
 
 if __name__ == "__main__":
-    simulate_rip()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event-driven", action="store_true",
+                        help="use the event-driven engine instead of synchronous rounds")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="use the N x N matrix solver (needs --routers, --topology or --generate)")
+    parser.add_argument("--routers", type=int, default=None,
+                        help="run on a random topology with this many routers")
+    parser.add_argument("--headless", action="store_true",
+                        help="draw no figures (networkx and matplotlib are not even imported)")
+    add_topology_arguments(parser)
+    args = parser.parse_args()
+    edges = topology_from_args(args)
+    if args.vectorized:
+        if not args.routers and edges is None:
+            parser.error("--vectorized needs --routers, --topology or --generate")
+        simulate_rip_vectorized(args.routers, args.seed, edges)
+    elif edges is not None:
+        simulate_rip_events(seed=args.seed, network=adjacency(edges))
+    elif args.event_driven or args.routers:
+        simulate_rip_events(args.routers, args.seed)
+    else:
+        simulate_rip(render=not args.headless)
\ No newline at end of file
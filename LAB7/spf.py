@@ -0,0 +1,577 @@
+import heapq
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+
+class CSRGraph:
+    """
+    Compact link-state database for SPF runs.
+
+    Routers get integer ids and the adjacency is stored in CSR form:
+    the neighbors of router i are indices[indptr[i]:indptr[i + 1]], with
+    the matching link costs in weights. It is built once from the LSDB and
+    then shared by every router's SPF, so no per-edge dict lookups happen
+    during the run.
+
+    Ids follow the sorted router names when the names can be sorted, so
+    ties between equal-cost paths break exactly like the heap of
+    (cost, name, previous) tuples the simulators used before.
+    """
+
+    def __init__(self, names, indptr, indices, weights):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        weights = np.asarray(weights)
+        # Integer costs stay integers so tables print as before
+        self.weights = weights.astype(np.int64 if weights.dtype.kind in "iub" else np.float64)
+        self._lists = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        # Each undirected link is stored once per direction
+        return len(self.indices) // 2
+
+    @classmethod
+    def from_adjacency(cls, adjacency: dict):
+        """
+        Builds the graph from {router: [(neighbor, cost), ...]}. The
+        neighbor order of every router is kept.
+        """
+        names = list(adjacency)
+        try:
+            names = sorted(names)
+        except TypeError:
+            pass
+        index = {name: i for i, name in enumerate(names)}
+
+        indptr = [0]
+        indices = []
+        weights = []
+        for name in names:
+            for neighbor, cost in adjacency[name]:
+                indices.append(index[neighbor])
+                weights.append(cost)
+            indptr.append(len(indices))
+        return cls(names, indptr, indices, weights)
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Builds the graph from undirected (u, v, cost) links."""
+        adjacency = {}
+        for u, v, cost in edges:
+            adjacency.setdefault(u, {})[v] = cost
+            adjacency.setdefault(v, {})[u] = cost
+        return cls.from_adjacency({name: list(links.items()) for name, links in adjacency.items()})
+
+    @classmethod
+    def from_networkx(cls, graph, weight: str = 'weight'):
+        """Builds the graph from a networkx Graph, reading edge costs once."""
+        return cls.from_adjacency({
+            name: [(neighbor, data[weight]) for neighbor, data in graph.adj[name].items()]
+            for name in graph.nodes
+        })
+
+    def neighbor_lists(self) -> tuple:
+        # Plain Python lists of the CSR arrays: indexing them in the SPF
+        # loop is much faster than indexing NumPy arrays one element at a time
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        return self._lists
+
+
+def shortest_path_tree(graph: CSRGraph, source: int) -> tuple:
+    """
+    Dijkstra from router id `source`. Returns (distances, predecessors,
+    spt_edges) as lists indexed by router id: predecessor -1 means none,
+    and spt_edges lists (parent, child) ids in the order routers settle.
+    """
+    indptr, indices, weights = graph.neighbor_lists()
+    n = graph.node_count
+    distances = [float('inf')] * n
+    predecessors = [-1] * n
+    visited = [False] * n
+    spt_edges = []
+
+    distances[source] = 0
+    pq = [(0, source, -1)]
+    while pq:
+        cost, node, prev = heapq.heappop(pq)
+        if visited[node]:
+            continue
+        visited[node] = True
+        if prev >= 0:
+            spt_edges.append((prev, node))
+
+        for k in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[k]
+            if not visited[neighbor]:
+                new_cost = cost + weights[k]
+                if new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    predecessors[neighbor] = node
+                    heapq.heappush(pq, (new_cost, neighbor, node))
+
+    return distances, predecessors, spt_edges
+
+
+def spf_with_first_hops(graph: CSRGraph, source: int) -> tuple:
+    """
+    Dijkstra from router id `source` that also carries first hops while it
+    runs. Returns (distances, predecessors, spt_edges, first_hops), where
+    first_hops[i] is a tuple of the source's neighbor ids over which router
+    i is reached at minimum cost (the ECMP set, empty for the source itself
+    and unreachable routers). The first entry is the hop on the SPT path.
+    """
+    indptr, indices, weights = graph.neighbor_lists()
+    n = graph.node_count
+    distances = [float('inf')] * n
+    predecessors = [-1] * n
+    visited = [False] * n
+    first_hops = [()] * n
+    spt_edges = []
+
+    distances[source] = 0
+    pq = [(0, source, -1)]
+    while pq:
+        cost, node, prev = heapq.heappop(pq)
+        if visited[node]:
+            continue
+        visited[node] = True
+        if prev >= 0:
+            spt_edges.append((prev, node))
+
+        # Every equal-cost parent settles before its children (costs are
+        # positive), so first_hops[node] is final by now and a child just
+        # inherits it, or merges it in on a tie
+        for k in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[k]
+            if not visited[neighbor]:
+                new_cost = cost + weights[k]
+                hops = (neighbor,) if node == source else first_hops[node]
+                if new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    predecessors[neighbor] = node
+                    first_hops[neighbor] = hops
+                    heapq.heappush(pq, (new_cost, neighbor, node))
+                elif new_cost == distances[neighbor] and hops is not first_hops[neighbor]:
+                    current = first_hops[neighbor]
+                    extra = tuple(hop for hop in hops if hop not in current)
+                    if extra:
+                        first_hops[neighbor] = current + extra
+
+    return distances, predecessors, spt_edges, first_hops
+
+
+def spf_arrays(graph: CSRGraph, source: int) -> tuple:
+    """
+    Same as shortest_path_tree, but returns NumPy arrays
+    (distances as float64 with inf, predecessors as int32 with -1).
+    """
+    distances, predecessors, _ = shortest_path_tree(graph, source)
+    return np.array(distances, dtype=np.float64), np.array(predecessors, dtype=np.int32)
+
+
+def dijkstra(graph: CSRGraph, start_node):
+    """
+    Runs SPF from router `start_node` and returns (distances, predecessors,
+    spt_edges) keyed by router name, in the shape the simulators use:
+    {node: cost}, {node: previous node or None}, [(previous, node), ...].
+    """
+    distances, predecessors, spt_edges = shortest_path_tree(graph, graph.index[start_node])
+    names = graph.names
+    return (
+        {names[i]: cost for i, cost in enumerate(distances)},
+        {names[i]: (names[p] if p >= 0 else None) for i, p in enumerate(predecessors)},
+        [(names[u], names[v]) for u, v in spt_edges],
+    )
+
+
+def dijkstra_ecmp(graph: CSRGraph, start_node):
+    """
+    Runs SPF with first-hop tracking from router `start_node` and returns
+    (distances, first_hops, spt_edges) keyed by router name:
+    {node: cost}, {node: [next hop, ...]}, [(previous, node), ...].
+    Each next-hop list starts with the hop on the SPT path.
+    """
+    distances, _, spt_edges, first_hops = spf_with_first_hops(graph, graph.index[start_node])
+    names = graph.names
+    return (
+        {names[i]: cost for i, cost in enumerate(distances)},
+        {names[i]: [names[hop] for hop in hops] for i, hops in enumerate(first_hops)},
+        [(names[u], names[v]) for u, v in spt_edges],
+    )
+
+
+def tree_first_hops(source: int, predecessors: list, distances: list) -> list:
+    """
+    First hop from `source` towards every router id, read off the SPT
+    (-1 for the source itself and for unreachable routers).
+    """
+    # Parents settle before their children, so walking in distance
+    # order lets every router copy its parent's first hop
+    first_hops = [-1] * len(predecessors)
+    for node in sorted(range(len(predecessors)), key=lambda i: distances[i]):
+        parent = predecessors[node]
+        if parent == source:
+            first_hops[node] = node
+        elif parent >= 0:
+            first_hops[node] = first_hops[parent]
+    return first_hops
+
+
+def routing_table_from_arrays(graph: CSRGraph, source: int, distances, first_hops, ecmp=None) -> dict:
+    """
+    Expands one router's rows of the all_routers_spf() arrays into the
+    {destination: {'next_hop': ..., 'next_hops': [...], 'cost': ...}}
+    tables the simulators print. Without an ECMP row only the SPT next
+    hop is listed.
+    """
+    names = graph.names
+    integral = graph.weights.dtype.kind == 'i'
+    neighbors = graph.indices[graph.indptr[source]:graph.indptr[source + 1]].tolist()
+    table = {}
+    for node, name in enumerate(names):
+        cost = float(distances[node])
+        if integral and cost != float('inf'):
+            cost = int(cost)
+        hop = int(first_hops[node])
+        if hop < 0:
+            table[name] = {'next_hop': '-', 'next_hops': [], 'cost': cost}
+            continue
+        hops = [hop]
+        if ecmp is not None:
+            mask = int(ecmp[node])
+            hops += [neighbor for bit, neighbor in enumerate(neighbors) if mask >> bit & 1 and neighbor != hop]
+        table[name] = {'next_hop': names[hop], 'next_hops': [names[h] for h in hops], 'cost': cost}
+    return table
+
+
+class IncrementalSPF:
+    """
+    Keeps every router's shortest path tree up to date as link costs
+    change, without rerunning Dijkstra from scratch.
+
+    For each source router it stores distances, predecessors, the SPT
+    children and the first hop towards every destination. When a link
+    changes, a source is only touched if the change can matter to it:
+      - a cheaper link is propagated Dijkstra-style from its endpoints,
+        visiting only routers whose distance improves;
+      - a more expensive (or failed) link only matters if it is in the
+        source's SPT, and then only the subtree below it is recomputed.
+    Predecessors are then re-chosen for routers next to a distance change,
+    using the same tie-break as a full Dijkstra run (the equal-cost
+    neighbor that settles first, i.e. smallest (distance, id)), so the
+    result is always identical to a full recomputation. Link costs must be
+    positive.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.names = list(graph.names)
+        self.index = dict(graph.index)
+        indptr, indices, weights = graph.neighbor_lists()
+        n = len(self.names)
+        self.adjacency = [dict(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                          for i in range(n)]
+        if any(cost <= 0 for links in self.adjacency for cost in links.values()):
+            raise ValueError("Incremental SPF needs positive link costs")
+        self.down_links = {}
+
+        self.distances = []
+        self.predecessors = []
+        self.children = []
+        self.first_hops = []
+        for source in range(n):
+            distances, predecessors, _ = shortest_path_tree(graph, source)
+            self.distances.append(distances)
+            self.predecessors.append(predecessors)
+            children = [set() for _ in range(n)]
+            for node, parent in enumerate(predecessors):
+                if parent >= 0:
+                    children[parent].add(node)
+            self.children.append(children)
+            self.first_hops.append(tree_first_hops(source, predecessors, distances))
+
+    # --- Events ---
+
+    def set_link_cost(self, u, v, cost) -> dict:
+        """
+        Changes the cost of link u-v (adding it if absent). A cost of
+        float('inf') takes the link down. Returns a report with the time
+        spent and the routers whose routing table changed.
+        """
+        start = time.perf_counter()
+        a, b = self.index[u], self.index[v]
+        if cost <= 0:
+            raise ValueError("Incremental SPF needs positive link costs")
+        old_cost = self.adjacency[a].get(b, float('inf'))
+        if cost == float('inf'):
+            self.adjacency[a].pop(b, None)
+            self.adjacency[b].pop(a, None)
+        else:
+            self.adjacency[a][b] = cost
+            self.adjacency[b][a] = cost
+
+        changed_routers = []
+        touched = 0
+        if cost != old_cost:
+            for source in range(len(self.names)):
+                changed, visited = self._update_source(source, a, b, old_cost, cost)
+                touched += visited
+                if changed:
+                    changed_routers.append(self.names[source])
+
+        return {
+            'link': (u, v),
+            'old_cost': old_cost,
+            'new_cost': cost,
+            'seconds': time.perf_counter() - start,
+            'routers_changed': len(changed_routers),
+            'changed_routers': changed_routers,
+            'nodes_touched': touched,
+        }
+
+    def link_down(self, u, v) -> dict:
+        self.down_links[frozenset((u, v))] = self.adjacency[self.index[u]][self.index[v]]
+        return self.set_link_cost(u, v, float('inf'))
+
+    def link_up(self, u, v, cost=None) -> dict:
+        if cost is None:
+            cost = self.down_links.pop(frozenset((u, v)))
+        return self.set_link_cost(u, v, cost)
+
+    def _update_source(self, source: int, a: int, b: int, old_cost, new_cost) -> tuple:
+        distances = self.distances[source]
+        predecessors = self.predecessors[source]
+        children = self.children[source]
+        adjacency = self.adjacency
+        old_distances = {}
+
+        if new_cost < old_cost:
+            # Cheaper link: push improvements outwards from its endpoints
+            pq = []
+            for x, y in ((a, b), (b, a)):
+                new_distance = distances[x] + new_cost
+                if new_distance < distances[y]:
+                    old_distances.setdefault(y, distances[y])
+                    distances[y] = new_distance
+                    heapq.heappush(pq, (new_distance, y))
+            while pq:
+                cost, node = heapq.heappop(pq)
+                if cost != distances[node]:
+                    continue
+                for neighbor, weight in adjacency[node].items():
+                    if cost + weight < distances[neighbor]:
+                        old_distances.setdefault(neighbor, distances[neighbor])
+                        distances[neighbor] = cost + weight
+                        heapq.heappush(pq, (cost + weight, neighbor))
+        else:
+            # Dearer or failed link: only its SPT subtree can be affected
+            if predecessors[b] == a:
+                root = b
+            elif predecessors[a] == b:
+                root = a
+            else:
+                root = -1
+            if root >= 0:
+                subtree = set()
+                stack = [root]
+                while stack:
+                    node = stack.pop()
+                    subtree.add(node)
+                    stack.extend(children[node])
+                for node in subtree:
+                    old_distances[node] = distances[node]
+                    distances[node] = float('inf')
+                # Re-enter the subtree from its unaffected border, then
+                # run Dijkstra inside it
+                pq = []
+                for node in subtree:
+                    best = min((distances[y] + w for y, w in adjacency[node].items() if y not in subtree),
+                               default=float('inf'))
+                    if best < distances[node]:
+                        distances[node] = best
+                        heapq.heappush(pq, (best, node))
+                while pq:
+                    cost, node = heapq.heappop(pq)
+                    if cost != distances[node]:
+                        continue
+                    for neighbor, weight in adjacency[node].items():
+                        if neighbor in subtree and cost + weight < distances[neighbor]:
+                            distances[neighbor] = cost + weight
+                            heapq.heappush(pq, (cost + weight, neighbor))
+                old_distances = {node: d for node, d in old_distances.items() if distances[node] != d}
+
+        # Re-choose predecessors wherever the candidate set may differ
+        recheck = {a, b}
+        for node in old_distances:
+            recheck.add(node)
+            recheck.update(adjacency[node])
+        new_roots = []
+        for node in recheck:
+            if node == source:
+                continue
+            best = -1
+            if distances[node] != float('inf'):
+                best_key = None
+                for neighbor, weight in adjacency[node].items():
+                    if distances[neighbor] + weight == distances[node]:
+                        key = (distances[neighbor], neighbor)
+                        if best_key is None or key < best_key:
+                            best_key, best = key, neighbor
+            if best != predecessors[node]:
+                if predecessors[node] >= 0:
+                    children[predecessors[node]].discard(node)
+                if best >= 0:
+                    children[best].add(node)
+                predecessors[node] = best
+                new_roots.append(node)
+
+        # First hops change exactly below routers whose parent changed
+        first_hops = self.first_hops[source]
+        changed = bool(old_distances)
+        new_roots.sort(key=lambda node: distances[node])
+        for root in new_roots:
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                parent = predecessors[node]
+                hop = node if parent == source else (first_hops[parent] if parent >= 0 else -1)
+                if hop != first_hops[node]:
+                    first_hops[node] = hop
+                    changed = True
+                stack.extend(children[node])
+
+        return changed, len(old_distances) + len(recheck)
+
+    # --- Results ---
+
+    def routing_table(self, router) -> dict:
+        """
+        {destination: {'next_hop': ..., 'cost': ...}} for one router, in the
+        same shape as build_routing_table() plus the distances.
+        """
+        source = self.index[router]
+        distances = self.distances[source]
+        first_hops = self.first_hops[source]
+        table = {}
+        for node, name in enumerate(self.names):
+            if node == source or first_hops[node] < 0:
+                table[name] = {'next_hop': '-', 'cost': distances[node]}
+            else:
+                table[name] = {'next_hop': self.names[first_hops[node]], 'cost': distances[node]}
+        return table
+
+    def current_graph(self) -> CSRGraph:
+        names = self.names
+        return CSRGraph.from_adjacency({
+            names[i]: [(names[neighbor], cost) for neighbor, cost in links.items()]
+            for i, links in enumerate(self.adjacency)
+        })
+
+    def matches_full_recomputation(self) -> bool:
+        """Checks every router's state against a fresh Dijkstra run."""
+        graph = self.current_graph()
+        for source in range(len(self.names)):
+            distances, predecessors, _ = shortest_path_tree(graph, source)
+            if distances != self.distances[source] or predecessors != self.predecessors[source]:
+                return False
+            if tree_first_hops(source, predecessors, distances) != self.first_hops[source]:
+                return False
+        return True
+
+
+# --- Parallel all-routers SPF ---
+
+# Set in each worker by _init_spf_worker. With the 'fork' start method the
+# graph is inherited from the parent, otherwise it is pickled once per
+# worker; either way tasks carry only a range of positions in the source
+# list.
+_worker_graph = None
+_worker_sources = None
+
+
+def _init_spf_worker(graph: CSRGraph, sources):
+    global _worker_graph, _worker_sources
+    _worker_graph = graph
+    _worker_sources = sources
+    graph.neighbor_lists()
+
+
+def _spf_rows(bounds: tuple) -> tuple:
+    lo, hi = bounds
+    graph = _worker_graph
+    n = graph.node_count
+    indptr, indices, _ = graph.neighbor_lists()
+    distances = np.empty((hi - lo, n), dtype=np.float64)
+    first_hops = np.full((hi - lo, n), -1, dtype=np.int32)
+    ecmp = np.zeros((hi - lo, n), dtype=np.uint64)
+    for row, source in enumerate(_worker_sources[lo:hi]):
+        dist, _, _, hops = spf_with_first_hops(graph, source)
+        distances[row] = dist
+        # ECMP sets become bitmasks over the source's neighbor list
+        bit = {neighbor: 1 << k for k, neighbor in enumerate(indices[indptr[source]:indptr[source + 1]])}
+        first_row = first_hops[row]
+        ecmp_row = ecmp[row]
+        for node, node_hops in enumerate(hops):
+            if node_hops:
+                first_row[node] = node_hops[0]
+                if len(node_hops) > 1 and len(bit) <= 64:
+                    mask = 0
+                    for hop in node_hops:
+                        mask |= bit[hop]
+                    ecmp_row[node] = mask
+    return lo, distances, first_hops, ecmp
+
+
+def all_routers_spf(graph: CSRGraph, workers: int = None, chunk_size: int = None, sources=None) -> tuple:
+    """
+    Runs SPF from every router on a process pool and returns three n x n
+    arrays indexed [source id, destination id]: distances (float64, inf if
+    unreachable), SPT first hops (int32, -1 for none) and ECMP sets as
+    uint64 bitmasks over the source's CSR neighbor list (0 when there is a
+    single next hop). The ECMP array is None if some router has more than
+    64 neighbors. workers=1 runs in this process.
+
+    With `sources` (router ids) only those routers run SPF and the arrays
+    have one row per source, in that order: on large networks the full
+    n x n tables do not fit in memory.
+    """
+    n = graph.node_count
+    sources = list(range(n)) if sources is None else list(sources)
+    rows = len(sources)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, min(256, rows // (workers * 4)))
+    chunks = [(lo, min(lo + chunk_size, rows)) for lo in range(0, rows, chunk_size)]
+
+    distances = np.empty((rows, n), dtype=np.float64)
+    first_hops = np.empty((rows, n), dtype=np.int32)
+    ecmp = np.zeros((rows, n), dtype=np.uint64)
+    if workers == 1 or rows < 2:
+        _init_spf_worker(graph, sources)
+        results = map(_spf_rows, chunks)
+        pool = None
+    else:
+        method = "fork" if "fork" in mp.get_all_start_methods() else None
+        pool = mp.get_context(method).Pool(workers, initializer=_init_spf_worker, initargs=(graph, sources))
+        results = pool.imap_unordered(_spf_rows, chunks)
+    try:
+        for lo, dist, hops, masks in results:
+            distances[lo:lo + len(dist)] = dist
+            first_hops[lo:lo + len(dist)] = hops
+            ecmp[lo:lo + len(dist)] = masks
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if n and int(np.diff(graph.indptr).max()) > 64:
+        ecmp = None
+    return distances, first_hops, ecmp
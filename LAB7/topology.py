@@ -0,0 +1,373 @@
+import math
+import random
+from array import array
+
+import numpy as np
+
+from spf import CSRGraph
+
+
+# --- Readers and writers ---
+
+def _node(token: str):
+    # Numeric router ids stay ints so large files need no string per node
+    return int(token) if token.lstrip('-').isdigit() else token
+
+
+def _cost(token: str):
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def read_edges(path: str, default_cost=1):
+    """
+    Streams links from an edge-list file, one per line: "u v" or the
+    weighted "u v cost", separated by whitespace or commas. Lines of the
+    CAIDA "as1|as2|relationship" format are links of cost `default_cost`,
+    since their third field is a relationship, not a cost. Blank lines and
+    '#' comments are skipped; fields after the cost are ignored. Numeric
+    node names become ints. Yields (u, v, cost) triples; a negative cost
+    is a ValueError, as SPF cannot use it.
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            caida = '|' in line
+            fields = line.replace('|', ' ').replace(',', ' ').split()
+            if len(fields) < 2:
+                raise ValueError(f"{path}:{number}: expected 'u v [cost]', got {line!r}")
+            cost = _cost(fields[2]) if len(fields) > 2 and not caida else default_cost
+            if cost < 0:
+                raise ValueError(f"{path}:{number}: negative link cost {cost} in {line!r}")
+            yield _node(fields[0]), _node(fields[1]), cost
+
+
+def write_edges(path: str, edges):
+    """Writes (u, v, cost) links as a weighted edge list."""
+    with open(path, 'w') as f:
+        for u, v, cost in edges:
+            f.write(f"{u} {v} {cost}\n")
+
+
+def read_as_links(path: str):
+    """
+    Reads AS links from a file, one per line: "as1 as2", "as1,as2" or the
+    CAIDA "as1|as2|relationship" format. Blank lines and '#' comments are
+    skipped. Yields (as1, as2) pairs of ints.
+    """
+    for u, v, _ in read_edges(path):
+        yield int(u), int(v)
+
+
+def read_as_relationships(path: str):
+    """
+    Reads an AS relationship file in the CAIDA format, one link per line:
+    "provider|customer|-1" or "peer|peer|0" (whitespace or commas also
+    work; extra fields are ignored). Blank lines and '#' comments are
+    skipped. Yields (as1, as2, relationship) triples of ints.
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.replace('|', ' ').replace(',', ' ').split()
+            if len(fields) < 3:
+                raise ValueError(f"{path}:{number}: expected 'as1|as2|relationship', got {line!r}")
+            yield int(fields[0]), int(fields[1]), int(fields[2])
+
+
+def write_as_relationships(path: str, relationships):
+    """Writes (as1, as2, relationship) triples in the CAIDA format."""
+    with open(path, 'w') as f:
+        f.write("# provider|customer|-1 or peer|peer|0\n")
+        for u, v, rel in relationships:
+            f.write(f"{u}|{v}|{rel}\n")
+
+
+# --- In-memory representations ---
+
+def csr_graph(edges) -> CSRGraph:
+    """
+    Builds a CSRGraph straight from a stream of undirected (u, v, cost)
+    links: endpoints go into flat typed arrays as they arrive, and the CSR
+    arrays are sorted out with NumPy at the end, so no per-router dicts
+    are built. Like CSRGraph.from_edges, a repeated link keeps its last
+    cost and router ids follow the sorted names; neighbors are listed in
+    id order. Self-loops are dropped.
+    """
+    index = {}
+    names = []
+    sources = array('q')
+    targets = array('q')
+    costs = array('d')
+    for u, v, cost in edges:
+        if u == v:
+            continue
+        for name in (u, v):
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+        sources.append(index[u])
+        targets.append(index[v])
+        costs.append(cost)
+
+    n = len(names)
+    order = list(range(n))
+    try:
+        order.sort(key=names.__getitem__)
+    except TypeError:
+        pass
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    names = [names[i] for i in order]
+
+    u = rank[np.frombuffer(sources, dtype=np.int64)]
+    v = rank[np.frombuffer(targets, dtype=np.int64)]
+    cost = np.frombuffer(costs, dtype=np.float64)
+    # Both directions, sorted by (source, target, arrival) so the last
+    # copy of each link is the one kept
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u])
+    cost = np.concatenate([cost, cost])
+    order = np.lexsort((np.arange(len(src)), dst, src))
+    src, dst, cost = src[order], dst[order], cost[order]
+    last = np.ones(len(src), dtype=bool)
+    last[:-1] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst, cost = src[last], dst[last], cost[last]
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    if np.array_equal(cost, np.floor(cost)):
+        cost = cost.astype(np.int64)
+    return CSRGraph(names, indptr, dst, cost)
+
+
+def adjacency(edges) -> dict:
+    """{router: {neighbor: cost}} from (u, v, cost) links, the RIP engines' input."""
+    network = {}
+    for u, v, cost in edges:
+        if u != v:
+            network.setdefault(u, {})[v] = cost
+            network.setdefault(v, {})[u] = cost
+    return network
+
+
+def to_networkx(edges):
+    """A networkx Graph with 'weight' edge attributes, for drawing; imported on demand."""
+    import networkx as nx
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(edges)
+    return graph
+
+
+# --- Synthetic generators ---
+
+def waxman_edges(n: int, degree: float = 4.0, alpha: float = None, beta: float = None, seed=None):
+    """
+    Waxman random graph: n routers placed uniformly in the unit square,
+    each pair linked with probability beta * exp(-d / (alpha * L)), L being
+    the square's diagonal. By default alpha shrinks with n so links stay
+    local, and beta is chosen for about `degree` links per router. Only
+    pairs in neighboring cells of a grid sized to the distance where the
+    probability has decayed by e^-8 are looked at, so large n stay cheap.
+    Costs grow with link length. The graph is not guaranteed connected.
+    """
+    rng = np.random.default_rng(seed)
+    diagonal = math.sqrt(2)
+    if alpha is None:
+        alpha = 2 / (math.sqrt(n) * diagonal)
+    scale = alpha * diagonal
+    if beta is None:
+        beta = min(1.0, degree / (n * 2 * math.pi * scale * scale))
+    points = rng.random((n, 2))
+
+    cells = max(1, int(1 / (8 * scale)))
+    cell_of = np.minimum((points * cells).astype(np.int64), cells - 1)
+    cell_id = cell_of[:, 0] * cells + cell_of[:, 1]
+    order = np.argsort(cell_id, kind='stable')
+    bounds = np.searchsorted(cell_id[order], np.arange(cells * cells + 1))
+    members = [order[bounds[c]:bounds[c + 1]] for c in range(cells * cells)]
+
+    for x in range(cells):
+        for y in range(cells):
+            mine = members[x * cells + y]
+            if not len(mine):
+                continue
+            # Each pair of cells once: this cell, then the half-stencil
+            for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+                if not (0 <= x + dx < cells and 0 <= y + dy < cells):
+                    continue
+                theirs = members[(x + dx) * cells + y + dy]
+                if not len(theirs):
+                    continue
+                distance = np.hypot(*(points[mine][:, None, :] - points[theirs][None, :, :]).transpose(2, 0, 1))
+                linked = rng.random(distance.shape) < beta * np.exp(-distance / scale)
+                if dx == dy == 0:
+                    linked = np.triu(linked, 1)
+                rows, cols = np.nonzero(linked)
+                lengths = distance[rows, cols]
+                for u, v, length in zip(mine[rows].tolist(), theirs[cols].tolist(), lengths.tolist()):
+                    yield u, v, 1 + int(length / scale)
+
+
+def barabasi_albert_edges(n: int, m: int = 3, seed=None):
+    """
+    Preferential-attachment graph (Barabasi-Albert) on routers 1..n: a
+    clique of m + 1 founders, then each new router links to m existing
+    routers picked in proportion to their degree. Unit costs.
+    """
+    rng = random.Random(seed)
+    # Every link end appears once here, so a uniform pick is degree-weighted
+    ends = list(range(1, m + 2))
+    for u in range(1, m + 2):
+        for v in range(u + 1, m + 2):
+            yield u, v, 1
+            ends += [u, v]
+    for node in range(m + 2, n + 1):
+        targets = set()
+        while len(targets) < m:
+            targets.add(rng.choice(ends))
+        for target in targets:
+            yield node, target, 1
+            ends += [node, target]
+
+
+def fat_tree_edges(k: int, hosts: bool = False):
+    """
+    k-ary fat-tree (k even): (k/2)^2 core switches and k pods of k/2
+    aggregation and k/2 edge switches, plus k^3/4 hosts if asked for.
+    Ids: cores first, then per pod its aggregation and edge switches,
+    then hosts. Unit costs.
+    """
+    if k < 2 or k % 2:
+        raise ValueError(f"Fat-tree arity must be a positive even number, got {k}")
+    half = k // 2
+    cores = half * half
+    first_host = cores + k * k
+    for pod in range(k):
+        aggregation = cores + pod * k
+        edge = aggregation + half
+        for a in range(half):
+            for c in range(half):
+                yield aggregation + a, a * half + c, 1
+            for e in range(half):
+                yield aggregation + a, edge + e, 1
+        if hosts:
+            for e in range(half):
+                for h in range(half):
+                    yield edge + e, first_host + (pod * half + e) * half + h, 1
+
+
+def grid_edges(rows: int, cols: int = None, torus: bool = False):
+    """rows x cols grid (router id = row * cols + col), wrapped into a torus if asked. Unit costs."""
+    cols = rows if cols is None else cols
+    for r in range(rows):
+        for c in range(cols):
+            node = r * cols + c
+            if c + 1 < cols or (torus and cols > 2):
+                yield node, r * cols + (c + 1) % cols, 1
+            if r + 1 < rows or (torus and rows > 2):
+                yield node, ((r + 1) % rows) * cols + c, 1
+
+
+def generate(spec: str, seed=None):
+    """
+    Edges of a synthetic topology from a short spec: "waxman:N",
+    "ba:N" (Barabasi-Albert), "fat-tree:K" or "grid:R" / "grid:RxC".
+    """
+    kind, _, size = spec.partition(':')
+    try:
+        if kind == 'waxman':
+            return waxman_edges(int(size), seed=seed)
+        if kind == 'ba':
+            return barabasi_albert_edges(int(size), seed=seed)
+        if kind == 'fat-tree':
+            return fat_tree_edges(int(size))
+        if kind == 'grid':
+            rows, _, cols = size.partition('x')
+            return grid_edges(int(rows), int(cols) if cols else None)
+    except ValueError:
+        raise ValueError(f"Bad topology size in {spec!r}") from None
+    raise ValueError(f"Unknown topology {spec!r} (expected waxman:N, ba:N, fat-tree:K or grid:RxC)")
+
+
+# --- Command line ---
+
+def add_topology_arguments(parser):
+    """Adds the --topology / --generate / --seed options shared by the LAB7 simulators."""
+    parser.add_argument("--topology", help="edge-list file ('u v', weighted 'u v cost' or CAIDA 'as1|as2|rel' lines, "
+                             "which get unit cost)")
+    parser.add_argument("--generate", metavar="SPEC",
+                        help="synthetic topology: waxman:N, ba:N, fat-tree:K or grid:RxC")
+    parser.add_argument("--seed", type=int, default=1, help="seed for generated topologies")
+
+
+def topology_from_args(args):
+    """The edge stream selected by --topology or --generate, or None for the built-in network."""
+    if args.topology:
+        return read_edges(args.topology)
+    if args.generate:
+        return generate(args.generate, seed=args.seed)
+    return None
+
+
+# --- Main execution for testing ---
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    # Streaming CSR matches the dict-based builder (up to neighbor order)
+    edges = [('R1', 'R2', 10), ('R1', 'R3', 5), ('R2', 'R3', 2), ('R2', 'R4', 1),
+             ('R3', 'R2', 2), ('R3', 'R4', 9), ('R3', 'R5', 2), ('R4', 'R5', 4), ('R5', 'R1', 7)]
+    graph = csr_graph(edges)
+    reference = CSRGraph.from_edges(edges)
+    assert graph.names == reference.names
+    assert graph.weights.dtype == np.int64
+    for i in range(graph.node_count):
+        row = slice(graph.indptr[i], graph.indptr[i + 1])
+        ref = slice(reference.indptr[i], reference.indptr[i + 1])
+        assert sorted(zip(graph.indices[row].tolist(), graph.weights[row].tolist())) == \
+            sorted(zip(reference.indices[ref].tolist(), reference.weights[ref].tolist()))
+
+    # File round trip, comments and mixed separators
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'edges.txt')
+        write_edges(path, edges)
+        assert list(read_edges(path)) == edges
+        with open(path, 'w') as f:
+            f.write("# AS links\n1|2|-1|bgp\n2,3\n\n3 4 2.5\n")
+        assert list(read_edges(path)) == [(1, 2, 1), (2, 3, 1), (3, 4, 2.5)]
+        assert list(read_as_links(path)) == [(1, 2), (2, 3), (3, 4)]
+        with open(path, 'w') as f:
+            f.write("1 2 3\n2 3 -4\n")
+        try:
+            list(read_edges(path))
+        except ValueError as error:
+            assert str(error).startswith(f"{path}:2:")
+        else:
+            raise AssertionError("a negative cost was accepted")
+
+    # Generator shapes
+    fat_tree = csr_graph(fat_tree_edges(4, hosts=True))
+    assert fat_tree.node_count == 5 * 16 // 4 + 16 and fat_tree.edge_count == 48
+    grid = csr_graph(grid_edges(3, 4))
+    assert grid.node_count == 12 and grid.edge_count == 17
+    assert csr_graph(grid_edges(4, torus=True)).edge_count == 32
+    ba = csr_graph(barabasi_albert_edges(1000, 3, seed=1))
+    assert ba.node_count == 1000 and ba.edge_count == 6 + 3 * 996
+
+    # Scaling: 10^5 routers straight into CSR form
+    for spec in ('waxman:100000', 'ba:100000', 'fat-tree:48', 'grid:316x316'):
+        start = time.perf_counter()
+        graph = csr_graph(generate(spec, seed=1))
+        degrees = np.diff(graph.indptr)
+        print(f"{spec}: {graph.node_count} routers, {graph.edge_count} links, "
+              f"mean degree {degrees.mean():.1f}, built in {time.perf_counter() - start:.2f} s")
+
+    print("\n--- All Topology Tests Passed ---")
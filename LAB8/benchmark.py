@@ -0,0 +1,372 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from lpm import LinearLookup, PatriciaTrie, Dir24_8
+    from scheduler import (Packet, CompactPacket, PacketBatch, FIFOScheduler, PriorityScheduler,
+                           DRRScheduler, WFQScheduler)
+    from ip_utils import int_to_ip
+except ImportError:
+    print("Error: Could not import from lpm.py, scheduler.py or ip_utils.py.")
+    print("Make sure they are in the same directory.")
+    exit(1)
+
+
+# Rough shape of the global IPv6 table: most prefixes are /48 and /32-/44
+# allocations, with a tail of longer and shorter ones
+IPV6_LENGTH_WEIGHTS = {29: 2, 32: 12, 36: 4, 40: 8, 44: 10, 46: 2, 47: 2, 48: 55, 56: 3, 64: 2}
+
+
+def generate_ipv6_prefixes(count: int, seed: int = 1) -> list:
+    """
+    Returns `count` distinct (network, prefix_length) pairs inside 2000::/3.
+    Prefixes are grouped under a few thousand /32 allocations, the way
+    regional registries hand them out, so the trie has realistic sharing.
+    """
+    rng = random.Random(seed)
+    lengths = list(IPV6_LENGTH_WEIGHTS)
+    weights = list(IPV6_LENGTH_WEIGHTS.values())
+    allocations = [(0b001 << 125) | (rng.getrandbits(29) << 96) for _ in range(max(1, count // 50))]
+
+    prefixes = set()
+    while len(prefixes) < count:
+        prefix_length = rng.choices(lengths, weights)[0]
+        network = rng.choice(allocations) | rng.getrandbits(96)
+        network &= ((1 << prefix_length) - 1) << (128 - prefix_length)
+        prefixes.add((network, prefix_length))
+    return list(prefixes)
+
+
+# Approximate share of each prefix length in the global IPv4 BGP table:
+# /24 dominates, /19-/23 follow, and the /8-/18 and /25-/32 tails are thin
+BGP_LENGTH_WEIGHTS = {
+    8: 0.02, 9: 0.01, 10: 0.03, 11: 0.1, 12: 0.3, 13: 0.5, 14: 0.9, 15: 1.0, 16: 1.4,
+    17: 0.8, 18: 1.4, 19: 2.5, 20: 4.0, 21: 4.5, 22: 11.0, 23: 9.5, 24: 60.0,
+    25: 0.6, 26: 0.6, 27: 0.4, 28: 0.3, 29: 0.3, 30: 0.2, 31: 0.05, 32: 0.3,
+}
+
+
+def generate_ipv4_routes(count: int, links: int = 32, seed: int = 1) -> list:
+    """
+    Returns `count` distinct (network, prefix_length, output_link) routes
+    with BGP-like prefix lengths. Longer prefixes are carved out of a pool
+    of /16 "allocations", so routes nest the way real tables do.
+    """
+    rng = random.Random(seed)
+    lengths = list(BGP_LENGTH_WEIGHTS)
+    weights = list(BGP_LENGTH_WEIGHTS.values())
+    allocations = [rng.randint(1, 223) << 24 | rng.getrandbits(8) << 16 for _ in range(max(1, count // 40))]
+
+    routes = {}
+    while len(routes) < count:
+        prefix_length = rng.choices(lengths, weights)[0]
+        network = rng.choice(allocations) | rng.getrandbits(16)
+        network &= (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+        routes.setdefault((network, prefix_length), f"Link {rng.randrange(links)}")
+    return [(network, prefix_length, link) for (network, prefix_length), link in routes.items()]
+
+
+def zipf_destinations(routes: list, count: int, exponent: float = 1.1, seed: int = 1):
+    """
+    Returns a uint32 array of `count` destinations whose popularity follows
+    a Zipf law over the routes: the k-th most popular prefix is hit with
+    probability proportional to 1 / k**exponent. Host bits are random.
+    """
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, len(routes) + 1, dtype=np.float64)
+    probabilities = ranks ** -exponent
+    probabilities /= probabilities.sum()
+    # Popularity is unrelated to where a prefix sits in the list
+    popularity = rng.permutation(len(routes))
+    picks = popularity[rng.choice(len(routes), size=count, p=probabilities)]
+
+    networks = np.array([route[0] for route in routes], dtype=np.uint64)
+    host_bits = np.array([32 - route[1] for route in routes], dtype=np.uint64)
+    host = rng.integers(0, 1 << 32, count, dtype=np.uint64) & ((np.uint64(1) << host_bits[picks]) - np.uint64(1))
+    return (networks[picks] | host).astype(np.uint32)
+
+
+def bench_lpm(engine, routes: list, destinations, measure_memory: bool = True) -> dict:
+    """
+    Build time, memory and lookups per second of one lookup engine class
+    on the given routes and destinations. Memory is split into the empty
+    table (Dir24_8's fixed 2^24 first level) and the increment per route.
+    """
+    start = time.perf_counter()
+    table = engine(32)
+    for network, prefix_length, link in routes:
+        table.insert(network, prefix_length, link)
+    build_seconds = time.perf_counter() - start
+
+    table_bytes = memory_bytes = None
+    if measure_memory:
+        # A second, traced build; tracing would distort the timing above
+        def build():
+            traced = engine(32)
+            for network, prefix_length, link in routes:
+                traced.insert(network, prefix_length, link)
+            return traced
+        memory_bytes = _traced_bytes(build)
+        table_bytes = _traced_bytes(lambda: engine(32))
+
+    addresses = destinations.tolist()
+    lookup = table.lookup
+    start = time.perf_counter()
+    for address in addresses:
+        lookup(address)
+    lookup_seconds = time.perf_counter() - start
+
+    result = {
+        'benchmark': 'lpm',
+        'engine': engine.__name__,
+        'routes': len(routes),
+        'build_seconds': build_seconds,
+        'table_bytes': table_bytes,
+        'bytes_per_route': (memory_bytes - table_bytes) / len(routes) if memory_bytes is not None else None,
+        'lookups_per_second': len(addresses) / lookup_seconds,
+    }
+    if hasattr(table, 'lookup_batch'):
+        start = time.perf_counter()
+        table.lookup_batch(destinations)
+        result['batch_lookups_per_second'] = len(addresses) / (time.perf_counter() - start)
+    return result
+
+
+SCHEDULERS = {
+    'FIFOScheduler': lambda: FIFOScheduler(),
+    'PriorityScheduler': lambda: PriorityScheduler(),
+    'DRRScheduler': lambda: DRRScheduler({0: 4, 1: 2, 2: 1}),
+    'WFQScheduler': lambda: WFQScheduler({0: 4, 1: 2, 2: 1}),
+}
+
+
+def bench_scheduler(name: str, count: int, backlog: int = 1_000, seed: int = 1) -> dict:
+    """
+    Enqueue + dequeue operations per second with `backlog` packets kept
+    queued, so heap-based schedulers work at a realistic depth.
+    """
+    rng = random.Random(seed)
+    packets = [CompactPacket(rng.getrandbits(32), rng.getrandbits(32), rng.randint(40, 1500), rng.randint(0, 2))
+               for _ in range(backlog + min(count, 10_000))]
+    scheduler = SCHEDULERS[name]()
+    for packet in packets[:backlog]:
+        scheduler.enqueue(packet)
+
+    enqueue = scheduler.enqueue
+    dequeue = scheduler.dequeue
+    pool = len(packets)
+    start = time.perf_counter()
+    for i in range(count):
+        enqueue(packets[i % pool])
+        dequeue()
+    seconds = time.perf_counter() - start
+    return {
+        'benchmark': 'scheduler',
+        'scheduler': name,
+        'backlog': backlog,
+        'operations': 2 * count,
+        'operations_per_second': 2 * count / seconds,
+    }
+
+
+def trie_memory_bytes(trie: PatriciaTrie) -> int:
+    """
+    Bytes held by the trie's nodes, their child lists and the integers they
+    store (output links are shared with the caller and not counted).
+    """
+    total = 0
+    stack = [trie.root]
+    while stack:
+        node = stack.pop()
+        total += sys.getsizeof(node) + sys.getsizeof(node.children) + sys.getsizeof(node.network)
+        stack.extend(child for child in node.children if child is not None)
+    return total
+
+
+def bench_ipv6_lookup(count: int = 200_000, lookups: int = 200_000, seed: int = 1) -> dict:
+    """
+    Builds a PatriciaTrie(128) with `count` IPv6 prefixes and reports the
+    build time, memory per prefix and average lookup latency.
+    """
+    prefixes = generate_ipv6_prefixes(count, seed)
+    rng = random.Random(seed + 1)
+
+    start = time.perf_counter()
+    trie = PatriciaTrie(128)
+    for i, (network, prefix_length) in enumerate(prefixes):
+        trie.insert(network, prefix_length, i)
+    build_seconds = time.perf_counter() - start
+    memory_bytes = trie_memory_bytes(trie)
+
+    # Destinations inside random installed prefixes, so each lookup
+    # walks a real path instead of failing at the root
+    destinations = []
+    for _ in range(lookups):
+        network, prefix_length = rng.choice(prefixes)
+        destinations.append(network | rng.getrandbits(128 - prefix_length))
+
+    lookup = trie.lookup
+    start = time.perf_counter()
+    for address in destinations:
+        lookup(address)
+    lookup_seconds = time.perf_counter() - start
+
+    return {
+        'prefixes': len(trie),
+        'build_seconds': build_seconds,
+        'bytes_per_prefix': memory_bytes / len(trie),
+        'lookup_ns': lookup_seconds / lookups * 1e9,
+        'lookups_per_second': lookups / lookup_seconds,
+    }
+
+
+def _traced_bytes(build) -> int:
+    # Memory still allocated by whatever build() returns
+    tracemalloc.start()
+    held = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return allocated
+
+
+def bench_packet_memory(count: int = 1_000_000, seed: int = 1) -> dict:
+    """
+    Bytes per queued packet for a list of Packet, a list of CompactPacket
+    and a PacketBatch holding the same `count` packets.
+    """
+    rng = random.Random(seed)
+    fields = [(rng.getrandbits(32), rng.getrandbits(32), rng.randint(40, 1500), rng.randint(0, 2))
+              for _ in range(count)]
+
+    # Payload strings are part of what a Packet has to hold on to
+    packet_bytes = _traced_bytes(lambda: [
+        Packet(int_to_ip(src), int_to_ip(dst), "x" * size, priority) for src, dst, size, priority in fields])
+    compact_bytes = _traced_bytes(lambda: [
+        CompactPacket(src, dst, size, priority) for src, dst, size, priority in fields])
+    batch_bytes = _traced_bytes(lambda: PacketBatch(*zip(*fields)))
+
+    return {
+        'packets': count,
+        'packet_bytes_each': packet_bytes / count,
+        'compact_packet_bytes_each': compact_bytes / count,
+        'packet_batch_bytes_each': batch_bytes / count,
+    }
+
+
+def run_suite(scales=(1_000, 10_000, 100_000), lookups: int = 200_000, scheduler_ops: int = 200_000,
+              linear_limit: int = 10_000, seed: int = 1, ipv6: bool = False) -> dict:
+    """
+    Runs the LPM benchmarks for every engine at every scale (table size)
+    and the scheduler benchmarks at every scale (queue backlog), and
+    returns the results with run metadata.
+    LinearLookup is O(routes) per lookup, so it only runs up to
+    `linear_limit` routes.
+    """
+    results = []
+    for scale in scales:
+        routes = generate_ipv4_routes(scale, seed=seed)
+        destinations = zipf_destinations(routes, lookups, seed=seed)
+        for engine in (LinearLookup, PatriciaTrie, Dir24_8):
+            if engine is LinearLookup and scale > linear_limit:
+                continue
+            result = bench_lpm(engine, routes, destinations)
+            results.append(result)
+            print(f"  lpm {result['engine']:<13} {scale:>9} routes: build {result['build_seconds']:.2f} s, "
+                  f"{result['table_bytes'] / 2**20:.1f} MiB + {result['bytes_per_route']:.0f} B/route, "
+                  f"{result['lookups_per_second']:,.0f} lookups/s")
+
+    for scale in scales:
+        for name in SCHEDULERS:
+            result = bench_scheduler(name, scheduler_ops, backlog=scale, seed=seed)
+            results.append(result)
+            print(f"  scheduler {name:<18} {scale:>9} queued: {result['operations_per_second']:,.0f} ops/s")
+
+    if ipv6:
+        result = bench_ipv6_lookup(seed=seed)
+        result['benchmark'] = 'ipv6_lpm'
+        results.append(result)
+        print(f"  ipv6 PatriciaTrie {result['prefixes']} prefixes: {result['lookups_per_second']:,.0f} lookups/s")
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def _result_key(result: dict) -> tuple:
+    return (result['benchmark'], result.get('engine') or result.get('scheduler'),
+            result.get('routes') or result.get('prefixes') or result.get('backlog'))
+
+
+def compare_runs(baseline: dict, current: dict):
+    """
+    Prints current/baseline ratios for the throughput metrics of results
+    present in both runs. Ratios below 1.0 are slowdowns.
+    """
+    metrics = ('lookups_per_second', 'batch_lookups_per_second', 'operations_per_second')
+    old = {_result_key(result): result for result in baseline['results']}
+    print(f"  {'Benchmark':<44} | {'Metric':<26} | {'Ratio':<6}")
+    print("  " + "-" * 82)
+    for result in current['results']:
+        previous = old.get(_result_key(result))
+        if previous is None:
+            continue
+        for metric in metrics:
+            if result.get(metric) and previous.get(metric):
+                name = " ".join(str(part) for part in _result_key(result) if part is not None)
+                print(f"  {name:<44} | {metric:<26} | {result[metric] / previous[metric]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LAB8 lookup and scheduling benchmarks")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="routing table sizes to benchmark")
+    parser.add_argument('--lookups', type=int, default=200_000, help="destinations per lookup benchmark")
+    parser.add_argument('--scheduler-ops', type=int, default=200_000, help="enqueue/dequeue pairs per scheduler")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--ipv6', action='store_true', help="also run the 200k-prefix IPv6 benchmark")
+    parser.add_argument('--packet-memory', action='store_true', help="also measure queued packet memory")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Error: benchmark.py needs NumPy (pip install numpy).")
+        exit(1)
+
+    print("--- LAB8 Benchmark Suite ---")
+    run = run_suite(args.scales, args.lookups, args.scheduler_ops, seed=args.seed, ipv6=args.ipv6)
+
+    if args.packet_memory:
+        result = bench_packet_memory(seed=args.seed)
+        result['benchmark'] = 'packet_memory'
+        run['results'].append(result)
+        print(f"  packet memory: Packet {result['packet_bytes_each']:.0f} B, "
+              f"CompactPacket {result['compact_packet_bytes_each']:.0f} B, "
+              f"PacketBatch {result['packet_batch_bytes_each']:.0f} B each")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n*** Results saved to {args.output} ***")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n--- Compared with {args.compare} ({baseline['created']}) ---")
+        compare_runs(baseline, run)
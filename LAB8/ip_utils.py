@@ -1,3 +1,15 @@
+import string
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only needed by the batch conversion helpers below
+    np = None
+
+_DECIMAL_DIGITS = frozenset(string.digits)
+_HEX_DIGITS = frozenset(string.hexdigits)
+
 def ip_to_binary(ip_address: str) -> str:
 
     # Split the IP into its four octets
@@ -27,6 +39,212 @@ def get_network_prefix(ip_cidr: str) -> str:
     # Return the prefix portion of the binary IP
     return binary_ip[:prefix_length]
 
+def ip_to_int(ip_address: str) -> int:
+
+    # Split the IP into its four octets
+    octets = ip_address.split('.')
+    if len(octets) != 4:
+        raise ValueError(f"Invalid IPv4 address: {ip_address!r}")
+
+    # Shift each octet into place, most significant first
+    value = 0
+    for octet in octets:
+        # 1-3 decimal digits, as in the batch parser: int() alone would
+        # also take signs, spaces and underscores
+        if not (1 <= len(octet) <= 3 and set(octet) <= _DECIMAL_DIGITS):
+            raise ValueError(f"Invalid IPv4 address: {ip_address!r}")
+        octet_value = int(octet)
+        if octet_value > 255:
+            raise ValueError(f"Invalid IPv4 address: {ip_address!r}")
+        value = (value << 8) | octet_value
+    return value
+
+def int_to_ip(value: int) -> str:
+    return f"{(value >> 24) & 255}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+def prefix_length_to_mask(prefix_length: int) -> int:
+    if not (0 <= prefix_length <= 32):
+        raise ValueError("Prefix length must be between 0 and 32")
+    return (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+
+def parse_cidr(ip_cidr: str) -> tuple:
+
+    # Same format checks as get_network_prefix, but returns integers:
+    # (network_address, prefix_length) with the host bits cleared
+    try:
+        ip_address, prefix_length_str = ip_cidr.split('/')
+        prefix_length = int(prefix_length_str)
+    except ValueError:
+        raise ValueError("Invalid CIDR format. Expected 'ip/prefix_length'")
+
+    mask = prefix_length_to_mask(prefix_length)
+    return ip_to_int(ip_address) & mask, prefix_length
+
+def get_network_and_mask(ip_cidr: str) -> tuple:
+    network, prefix_length = parse_cidr(ip_cidr)
+    return network, prefix_length_to_mask(prefix_length)
+
+def ip_in_network(address: int, network: int, mask: int) -> bool:
+    return (address & mask) == network
+
+# --- Batch conversion with NumPy ---
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch address conversion (pip install numpy)")
+
+def _octets_to_uint32(ip_addresses):
+    # Lay the addresses out as a byte matrix, one 16-byte column per
+    # address (a dotted quad is at most 15 characters), and check and parse
+    # every column at once: four fields of 1-3 digits joined by three dots
+    count = len(ip_addresses)
+    if not count:
+        return np.empty(0, dtype=np.uint32)
+    try:
+        flat = np.array(ip_addresses, dtype='S16').view(np.uint8)
+    except UnicodeEncodeError:
+        broken = next(address for address in ip_addresses if not address.isascii())
+        raise ValueError(f"Invalid IPv4 address: {broken!r}") from None
+    chars = flat.reshape(count, 16).T.copy()
+    dot = chars == ord('.')
+    digit = (chars - np.uint8(ord('0'))) < 10
+    bad = ((chars[15] != 0) | (dot.sum(axis=0, dtype=np.uint8) != 3)
+           | (~digit & ~dot & (chars != 0)).any(axis=0))
+
+    if not bad.any():
+        # Field k ends where the characters of fields 0..k (and their dots) do
+        field = np.cumsum(dot, axis=0, dtype=np.uint8)
+        ends = np.empty((4, count), dtype=np.int64)
+        for k in range(3):
+            ends[k] = (field <= k).sum(axis=0, dtype=np.uint8)
+        ends[3] = (chars != 0).sum(axis=0, dtype=np.uint8)
+        widths = ends.copy()
+        widths[1:] -= ends[:3] + 1
+        ends += np.arange(0, 16 * count, 16)
+        octets = np.zeros((4, count), dtype=np.int16)
+        for place in range(3):
+            # The digit `place` positions left of each field's end
+            value = flat.take(ends - 1 - place).astype(np.int16) - ord('0')
+            value[widths <= place] = 0
+            octets += value * np.int16(10 ** place)
+        bad = ((widths < 1) | (widths > 3) | (octets > 255)).any(axis=0)
+    if bad.any():
+        raise ValueError(f"Invalid IPv4 address: {ip_addresses[int(np.argmax(bad))]!r}")
+
+    octets = octets.astype(np.uint32)
+    return (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+
+def ips_to_uint32(ip_addresses):
+    """
+    Converts a list or array of dotted-quad strings to a NumPy uint32 array.
+    An entry that is not a dotted-quad address raises ValueError.
+    """
+    _require_numpy()
+    return _octets_to_uint32(ip_addresses)
+
+def load_ips_uint32(path: str, chunk_lines: int = 1 << 20):
+    """
+    Reads a file with one dotted-quad address per line into a NumPy uint32
+    array. The file is parsed in chunks so the text is never held in memory
+    all at once; blank lines are ignored.
+    """
+    _require_numpy()
+    chunks = []
+    with open(path) as f:
+        while True:
+            lines = list(islice(f, chunk_lines))
+            if not lines:
+                break
+            chunks.append(_octets_to_uint32([address for address in map(str.strip, lines) if address]))
+    if not chunks:
+        return np.empty(0, dtype=np.uint32)
+    return np.concatenate(chunks)
+
+def mask_uint32(addresses, prefix_length: int):
+    _require_numpy()
+    return np.asarray(addresses, dtype=np.uint32) & np.uint32(prefix_length_to_mask(prefix_length))
+
+def in_network_uint32(addresses, network: int, mask: int):
+    _require_numpy()
+    return (np.asarray(addresses, dtype=np.uint32) & np.uint32(mask)) == np.uint32(network)
+
+# --- IPv6 ---
+
+def ipv6_to_int(ip_address: str) -> int:
+
+    # An embedded IPv4 tail (e.g. ::ffff:192.0.2.1) becomes two hex groups
+    if '.' in ip_address:
+        head, _, ipv4_tail = ip_address.rpartition(':')
+        ipv4_value = ip_to_int(ipv4_tail)
+        ip_address = f"{head}:{ipv4_value >> 16:x}:{ipv4_value & 0xFFFF:x}"
+
+    # Expand "::" into as many zero groups as are missing
+    if ip_address.count('::') > 1:
+        raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+    if '::' in ip_address:
+        left, right = ip_address.split('::')
+        left_groups = left.split(':') if left else []
+        right_groups = right.split(':') if right else []
+        missing = 8 - len(left_groups) - len(right_groups)
+        if missing < 1:
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+        groups = left_groups + ['0'] * missing + right_groups
+    else:
+        groups = ip_address.split(':')
+        if len(groups) != 8:
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+
+    # Each group is one to four hex digits, most significant first (int()
+    # alone would also take signs, spaces and underscores)
+    value = 0
+    for group in groups:
+        if not (1 <= len(group) <= 4 and set(group) <= _HEX_DIGITS):
+            raise ValueError(f"Invalid IPv6 address: {ip_address!r}")
+        value = (value << 16) | int(group, 16)
+    return value
+
+def int_to_ipv6(value: int) -> str:
+
+    groups = [(value >> shift) & 0xFFFF for shift in range(112, -16, -16)]
+
+    # Find the longest run of zero groups (at least two) to write as "::"
+    best_start, best_length = -1, 1
+    run_start, run_length = -1, 0
+    for i, group in enumerate(groups):
+        if group == 0:
+            if run_length == 0:
+                run_start = i
+            run_length += 1
+            if run_length > best_length:
+                best_start, best_length = run_start, run_length
+        else:
+            run_length = 0
+
+    hex_groups = [f"{group:x}" for group in groups]
+    if best_start < 0:
+        return ":".join(hex_groups)
+    left = ":".join(hex_groups[:best_start])
+    right = ":".join(hex_groups[best_start + best_length:])
+    return f"{left}::{right}"
+
+def parse_cidr6(ip_cidr: str) -> tuple:
+
+    # IPv6 counterpart of parse_cidr: (network_address, prefix_length)
+    try:
+        ip_address, prefix_length_str = ip_cidr.split('/')
+        prefix_length = int(prefix_length_str)
+    except ValueError:
+        raise ValueError("Invalid CIDR format. Expected 'ip/prefix_length'")
+
+    if not (0 <= prefix_length <= 128):
+        raise ValueError("Prefix length must be between 0 and 128")
+
+    mask = ((1 << prefix_length) - 1) << (128 - prefix_length)
+    return ipv6_to_int(ip_address) & mask, prefix_length
+
+def is_ipv6(ip_address: str) -> bool:
+    return ':' in ip_address
+
 # --- Main execution for testing ---
 if __name__ == "__main__":
     print("--- Testing ip_utils.py ---")
@@ -51,4 +269,61 @@ if __name__ == "__main__":
     test_cidr_2 = "223.1.1.0/24"
     network_prefix_2 = get_network_prefix(test_cidr_2)
     print(f'\nget_network_prefix("{test_cidr_2}"):\n{network_prefix_2}')
-    print(f'Length: {len(network_prefix_2)} bits')
\ No newline at end of file
+    print(f'Length: {len(network_prefix_2)} bits')
+
+    # Test the integer equivalents against the string versions
+    test_int = ip_to_int(test_ip)
+    print(f'\nip_to_int("{test_ip}"): {test_int}')
+    assert format(test_int, '032b') == binary_ip
+    assert int_to_ip(test_int) == test_ip
+    for bad_ip in ("+1.2.3.4", " 1.2.3.4", "1_0.0.0.1", "1.2.3.0004", "1.2.3.256", "1.2.3", "1.2..4"):
+        try:
+            ip_to_int(bad_ip)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"ip_to_int accepted {bad_ip!r}")
+
+    network, mask = get_network_and_mask(test_cidr)
+    print(f'get_network_and_mask("{test_cidr}"): ({int_to_ip(network)}, {int_to_ip(mask)})')
+    assert format(network, '032b')[:23] == network_prefix
+    assert ip_in_network(ip_to_int("200.23.17.255"), network, mask)
+    assert not ip_in_network(ip_to_int("200.23.18.0"), network, mask)
+
+    if np is not None:
+        batch = ips_to_uint32([test_ip, test_ip_2, "255.255.255.255"])
+        print(f'ips_to_uint32(...): {batch}')
+        assert batch.tolist() == [ip_to_int(test_ip), ip_to_int(test_ip_2), 0xFFFFFFFF]
+        assert in_network_uint32(batch, network, mask).tolist() == [False, True, False]
+        for bad in (['1.2.3.4', '5.6.7.8.9', '10.11.12'], ['1.2.3.256'], ['1.2..3'], ['1.2.3.x'], ['1.2.3.0004']):
+            try:
+                ips_to_uint32(bad)
+            except ValueError as error:
+                assert repr(bad[1] if len(bad) > 1 else bad[0]) in str(error)
+            else:
+                raise AssertionError(f"{bad} was accepted")
+
+    # Test IPv6 parsing, including "::" compression
+    test_ip6 = "2001:db8::1"
+    ip6_value = ipv6_to_int(test_ip6)
+    print(f'\nipv6_to_int("{test_ip6}"): {ip6_value:#034x}')
+    assert ip6_value == 0x20010db8000000000000000000000001
+    assert int_to_ipv6(ip6_value) == test_ip6
+    assert ipv6_to_int("::") == 0
+    assert int_to_ipv6(ipv6_to_int("::ffff:192.0.2.1")) == "::ffff:c000:201"
+    assert int_to_ipv6(ipv6_to_int("2001:0:0:1:0:0:0:1")) == "2001:0:0:1::1"
+    for bad_ip6 in ("2001:db8::-1", "::+1", "1::+f:2", "2001:db8:: 1", "2001:db8::1_0", "::12345", "2001:db8::-1/64"):
+        try:
+            if '/' in bad_ip6:
+                parse_cidr6(bad_ip6)
+            else:
+                ipv6_to_int(bad_ip6)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad_ip6!r} was accepted")
+
+    test_cidr6 = "2001:db8:abcd:12ff::/56"
+    network6, prefix_length6 = parse_cidr6(test_cidr6)
+    print(f'parse_cidr6("{test_cidr6}"): ({int_to_ipv6(network6)}, /{prefix_length6})')
+    assert int_to_ipv6(network6) == "2001:db8:abcd:1200::"
\ No newline at end of file
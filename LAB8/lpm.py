@@ -0,0 +1,463 @@
+import bisect
+import json
+
+try:
+    import numpy as np
+except ImportError:
+    # Only the array-backed Dir24_8 table needs NumPy
+    np = None
+
+
+class LinearLookup:
+    """
+    The original lookup strategy: a list of routes kept sorted from the
+    longest prefix to the shortest, scanned until the first match.
+    Every lookup is O(number of routes).
+    """
+
+    def __init__(self, width: int = 32):
+        self.width = width
+        # Tuples of (-prefix_length, network, prefix_length, output_link)
+        self.routes = []
+
+    def insert(self, network: int, prefix_length: int, output_link):
+        # Routes of the same length sit next to each other in the list
+        lo = bisect.bisect_left(self.routes, -prefix_length, key=lambda item: item[0])
+        hi = bisect.bisect_right(self.routes, -prefix_length, key=lambda item: item[0])
+        entry = (-prefix_length, network, prefix_length, output_link)
+        for i in range(lo, hi):
+            if self.routes[i][1] == network:
+                # Re-inserting a prefix replaces its route, as in the trie
+                self.routes[i] = entry
+                return
+        self.routes.insert(hi, entry)
+
+    def remove(self, network: int, prefix_length: int):
+        lo = bisect.bisect_left(self.routes, -prefix_length, key=lambda item: item[0])
+        hi = bisect.bisect_right(self.routes, -prefix_length, key=lambda item: item[0])
+        for i in range(lo, hi):
+            if self.routes[i][1] == network:
+                return self.routes.pop(i)[3]
+        raise KeyError((network, prefix_length))
+
+    def lookup(self, address: int):
+        for _, network, prefix_length, output_link in self.routes:
+            shift = self.width - prefix_length
+            if (address >> shift) == (network >> shift):
+                return output_link
+        return None
+
+    def __len__(self):
+        return len(self.routes)
+
+
+class _TrieNode:
+    __slots__ = ("network", "prefix_length", "output_link", "has_route", "children")
+
+    def __init__(self, network: int, prefix_length: int, output_link=None, has_route: bool = False):
+        self.network = network
+        self.prefix_length = prefix_length
+        self.output_link = output_link
+        self.has_route = has_route
+        self.children = [None, None]
+
+
+class PatriciaTrie:
+    """
+    Path-compressed binary trie (Patricia trie) for longest prefix match.
+
+    Each node stores the full network address and prefix length it stands
+    for, so chains of single-child nodes are skipped in one comparison.
+    A lookup visits at most `width` nodes no matter how many routes are
+    stored, and in practice far fewer.
+    """
+
+    def __init__(self, width: int = 32):
+        self.width = width
+        self.root = _TrieNode(0, 0)
+        self.size = 0
+
+    def _bit(self, value: int, position: int) -> int:
+        # Bit number `position` counted from the most significant end
+        return (value >> (self.width - 1 - position)) & 1
+
+    def _mask(self, prefix_length: int) -> int:
+        return ((1 << prefix_length) - 1) << (self.width - prefix_length)
+
+    def _common_length(self, a: int, b: int, limit: int) -> int:
+        # Number of leading bits a and b share, looking at no more than `limit`
+        if limit == 0:
+            return 0
+        diff = (a ^ b) >> (self.width - limit)
+        return limit - diff.bit_length()
+
+    def insert(self, network: int, prefix_length: int, output_link):
+        if not (0 <= prefix_length <= self.width):
+            raise ValueError(f"Prefix length must be between 0 and {self.width}")
+        network &= self._mask(prefix_length)
+
+        node = self.root
+        while True:
+            if node.prefix_length == prefix_length:
+                # Same prefix already has a node: just (re)assign the route
+                if not node.has_route:
+                    self.size += 1
+                node.output_link = output_link
+                node.has_route = True
+                return
+
+            bit = self._bit(network, node.prefix_length)
+            child = node.children[bit]
+
+            if child is None:
+                node.children[bit] = _TrieNode(network, prefix_length, output_link, True)
+                self.size += 1
+                return
+
+            common = self._common_length(child.network, network,
+                                         min(child.prefix_length, prefix_length))
+            if common == child.prefix_length:
+                # The child's prefix covers the new one: keep descending
+                node = child
+                continue
+
+            new_node = _TrieNode(network, prefix_length, output_link, True)
+            self.size += 1
+            if common == prefix_length:
+                # The new prefix covers the child: insert it in between
+                new_node.children[self._bit(child.network, common)] = child
+                node.children[bit] = new_node
+                return
+
+            # The two prefixes diverge: add a routeless branching node
+            branch = _TrieNode(network & self._mask(common), common)
+            branch.children[self._bit(child.network, common)] = child
+            branch.children[self._bit(network, common)] = new_node
+            node.children[bit] = branch
+            return
+
+    def remove(self, network: int, prefix_length: int):
+        network &= self._mask(prefix_length)
+
+        # Walk down to the node for this exact prefix, remembering the path
+        path = [self.root]
+        node = self.root
+        while node.prefix_length < prefix_length:
+            child = node.children[self._bit(network, node.prefix_length)]
+            if (child is None or child.prefix_length > prefix_length
+                    or self._common_length(child.network, network, child.prefix_length) < child.prefix_length):
+                raise KeyError((network, prefix_length))
+            path.append(child)
+            node = child
+        if not node.has_route:
+            raise KeyError((network, prefix_length))
+
+        output_link = node.output_link
+        node.output_link = None
+        node.has_route = False
+        self.size -= 1
+
+        # Drop or splice out routeless nodes with fewer than two children so
+        # the trie stays path-compressed (the root always stays)
+        while len(path) > 1:
+            node = path.pop()
+            if node.has_route:
+                break
+            children = [child for child in node.children if child is not None]
+            if len(children) == 2:
+                break
+            parent = path[-1]
+            parent.children[self._bit(node.network, parent.prefix_length)] = children[0] if children else None
+        return output_link
+
+    def lookup(self, address: int):
+        width = self.width
+        # Walk down on the address bits alone, collecting the nodes that
+        # hold routes. The skipped bits are only compared afterwards, from
+        # the deepest candidate up: nodes on one path are nested prefixes,
+        # so the first candidate that matches is the longest match.
+        candidates = []
+        node = self.root
+        while node is not None:
+            if node.has_route:
+                candidates.append(node)
+            if node.prefix_length == width:
+                break
+            node = node.children[(address >> (width - 1 - node.prefix_length)) & 1]
+
+        for node in reversed(candidates):
+            shift = width - node.prefix_length
+            if (address >> shift) == (node.network >> shift):
+                return node.output_link
+        return None
+
+    def __len__(self):
+        return self.size
+
+
+class Dir24_8:
+    """
+    DIR-24-8 forwarding table backed by flat NumPy arrays.
+
+    tbl24 has one entry for every /24: either a next-hop index, or (when
+    the top bit is set) the number of a 256-entry overflow block in
+    tbl_long that holds the answers for prefixes longer than /24. Any
+    lookup is one or two array reads, so a whole batch of destinations
+    can be resolved with array indexing instead of a Python loop.
+
+    Next-hop index 0 means "no route". Next to each entry we keep the
+    length of the prefix that wrote it, so routes can be inserted in any
+    order without a shorter prefix overwriting a longer one.
+    """
+
+    BLOCK_FLAG = 0x80000000
+    BLOCK_SIZE = 256
+
+    def __init__(self, width: int = 32):
+        if np is None:
+            raise ImportError("NumPy is required for the Dir24_8 table (pip install numpy)")
+        if width != 32:
+            raise ValueError("Dir24_8 only supports 32-bit (IPv4) addresses")
+        self.width = width
+        self.tbl24 = np.zeros(1 << 24, dtype=np.uint32)
+        self.tbl24_len = np.zeros(1 << 24, dtype=np.uint8)
+        self.tbl_long = np.zeros(16 * self.BLOCK_SIZE, dtype=np.uint32)
+        self.tbl_long_len = np.zeros(16 * self.BLOCK_SIZE, dtype=np.uint8)
+        self.long_blocks = 0
+        # next_hops[i] is the output link for next-hop index i
+        self.next_hops = [None]
+        self.next_hop_index = {}
+        self._routes = {}
+        self._snapshot_routes = None
+
+    @property
+    def routes(self) -> dict:
+        # (network, prefix_length) -> output_link. A table loaded from a
+        # snapshot only builds this dict the first time something needs it
+        # (updates, len), so lookups can start right away.
+        if self._snapshot_routes is not None:
+            networks, lengths, hops = self._snapshot_routes
+            next_hops = self.next_hops
+            self._routes = {(network, length): next_hops[hop] for network, length, hop
+                            in zip(networks.tolist(), lengths.tolist(), hops.tolist())}
+            self._snapshot_routes = None
+        return self._routes
+
+    def _hop_index(self, output_link) -> int:
+        index = self.next_hop_index.get(output_link)
+        if index is None:
+            index = len(self.next_hops)
+            self.next_hops.append(output_link)
+            self.next_hop_index[output_link] = index
+        return index
+
+    def _new_block(self, hop: int, prefix_length: int) -> int:
+        # Grow tbl_long by doubling so batch lookups can index one array
+        if (self.long_blocks + 1) * self.BLOCK_SIZE > self.tbl_long.size:
+            extra = max(self.tbl_long.size, 16 * self.BLOCK_SIZE)
+            self.tbl_long = np.concatenate([self.tbl_long, np.zeros(extra, dtype=np.uint32)])
+            self.tbl_long_len = np.concatenate([self.tbl_long_len, np.zeros(extra, dtype=np.uint8)])
+        block = self.long_blocks
+        self.long_blocks += 1
+        start = block * self.BLOCK_SIZE
+        # A new block starts out with whatever the /24 entry resolved to
+        self.tbl_long[start:start + self.BLOCK_SIZE] = hop
+        self.tbl_long_len[start:start + self.BLOCK_SIZE] = prefix_length
+        return block
+
+    def _fill(self, entries, lengths, hop: int, prefix_length: int):
+        # Overwrite only entries that were set by an equal or shorter prefix
+        mask = lengths <= prefix_length
+        entries[mask] = hop
+        lengths[mask] = prefix_length
+
+    def _write(self, network: int, prefix_length: int, hop: int):
+        size = self.BLOCK_SIZE
+        if prefix_length <= 24:
+            start = network >> 8
+            end = start + (1 << (24 - prefix_length))
+            entries = self.tbl24[start:end]
+            lengths = self.tbl24_len[start:end]
+            is_block = (entries & self.BLOCK_FLAG) != 0
+
+            mask = ~is_block & (lengths <= prefix_length)
+            entries[mask] = hop
+            lengths[mask] = prefix_length
+
+            # /24s already split into overflow blocks are updated inside the block
+            for block in (entries[is_block] & ~np.uint32(self.BLOCK_FLAG)).tolist():
+                self._fill(self.tbl_long[block * size:(block + 1) * size],
+                           self.tbl_long_len[block * size:(block + 1) * size],
+                           hop, prefix_length)
+        else:
+            slot = network >> 8
+            entry = int(self.tbl24[slot])
+            if entry & self.BLOCK_FLAG:
+                block = entry & ~self.BLOCK_FLAG
+            else:
+                block = self._new_block(entry, int(self.tbl24_len[slot]))
+                self.tbl24[slot] = self.BLOCK_FLAG | block
+            start = block * size + (network & 0xFF)
+            end = start + (1 << (32 - prefix_length))
+            self._fill(self.tbl_long[start:end], self.tbl_long_len[start:end],
+                       hop, prefix_length)
+
+    def insert(self, network: int, prefix_length: int, output_link):
+        if not (0 <= prefix_length <= 32):
+            raise ValueError("Prefix length must be between 0 and 32")
+        network &= (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+        self.routes[(network, prefix_length)] = output_link
+        self._write(network, prefix_length, self._hop_index(output_link))
+
+    def _covering_route(self, network: int, prefix_length: int):
+        # Longest installed prefix strictly shorter than this one that covers it
+        for length in range(prefix_length - 1, -1, -1):
+            key = (network & ((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF), length)
+            if key in self.routes:
+                return self.next_hop_index[self.routes[key]], length
+        return 0, 0
+
+    def remove(self, network: int, prefix_length: int):
+        network &= (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+        output_link = self.routes.pop((network, prefix_length))
+
+        # Entries written by this prefix fall back to the covering route.
+        # Entries taken over by longer prefixes keep their own answer.
+        hop, length = self._covering_route(network, prefix_length)
+        size = self.BLOCK_SIZE
+        if prefix_length <= 24:
+            start = network >> 8
+            end = start + (1 << (24 - prefix_length))
+            entries = self.tbl24[start:end]
+            lengths = self.tbl24_len[start:end]
+            is_block = (entries & self.BLOCK_FLAG) != 0
+            mask = ~is_block & (lengths == prefix_length)
+            entries[mask] = hop
+            lengths[mask] = length
+            block_list = (entries[is_block] & ~np.uint32(self.BLOCK_FLAG)).tolist()
+            ranges = [(block * size, (block + 1) * size) for block in block_list]
+        else:
+            entry = int(self.tbl24[network >> 8])
+            start = (entry & ~self.BLOCK_FLAG) * size + (network & 0xFF)
+            ranges = [(start, start + (1 << (32 - prefix_length)))]
+
+        for start, end in ranges:
+            entries = self.tbl_long[start:end]
+            lengths = self.tbl_long_len[start:end]
+            mask = lengths == prefix_length
+            entries[mask] = hop
+            lengths[mask] = length
+        return output_link
+
+    def lookup(self, address: int):
+        entry = int(self.tbl24[address >> 8])
+        if entry & self.BLOCK_FLAG:
+            entry = int(self.tbl_long[(entry & ~self.BLOCK_FLAG) * self.BLOCK_SIZE + (address & 0xFF)])
+        return self.next_hops[entry]
+
+    def lookup_batch(self, addresses):
+        """
+        Resolves an array of uint32 addresses in one go and returns the
+        array of next-hop indices (0 where there is no route).
+        """
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        entries = self.tbl24[addresses >> 8]
+        in_block = (entries & self.BLOCK_FLAG) != 0
+        if in_block.any():
+            blocks = (entries[in_block] & ~np.uint32(self.BLOCK_FLAG)).astype(np.int64)
+            entries[in_block] = self.tbl_long[(blocks << 8) | (addresses[in_block] & 0xFF)]
+        return entries
+
+    def __len__(self):
+        return len(self.routes)
+
+    # --- Snapshot files ---
+    #
+    # Layout: 8-byte magic, 8-byte little-endian header length, a JSON
+    # header (next hops, array dtypes/shapes/offsets, caller extras), then
+    # the raw arrays, each starting on a 64-byte boundary so they can be
+    # memory-mapped in place.
+
+    SNAPSHOT_MAGIC = b"DIR248\x00\x01"
+    SNAPSHOT_ALIGN = 64
+
+    def save(self, path: str, extra=None):
+        """
+        Writes the table to a binary snapshot file. Output links must be
+        JSON-serialisable (strings). `extra` is any JSON data the caller
+        wants stored alongside it.
+        """
+        routes = self.routes
+        arrays = {
+            'tbl24': self.tbl24,
+            'tbl24_len': self.tbl24_len,
+            'tbl_long': self.tbl_long[:self.long_blocks * self.BLOCK_SIZE],
+            'tbl_long_len': self.tbl_long_len[:self.long_blocks * self.BLOCK_SIZE],
+            'route_networks': np.fromiter((key[0] for key in routes), dtype=np.uint32, count=len(routes)),
+            'route_lengths': np.fromiter((key[1] for key in routes), dtype=np.uint8, count=len(routes)),
+            'route_hops': np.fromiter((self.next_hop_index[link] for link in routes.values()),
+                                      dtype=np.uint32, count=len(routes)),
+        }
+
+        # Offsets are relative to the end of the header, which is padded
+        # so that the first array starts aligned
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += -(-array.nbytes // self.SNAPSHOT_ALIGN) * self.SNAPSHOT_ALIGN
+        header = json.dumps({
+            'next_hops': self.next_hops[1:],
+            'long_blocks': self.long_blocks,
+            'arrays': layout,
+            'extra': extra,
+        }).encode()
+        data_start = -(-(16 + len(header)) // self.SNAPSHOT_ALIGN) * self.SNAPSHOT_ALIGN
+
+        with open(path, 'wb') as f:
+            f.write(self.SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Opens a snapshot written by save(). The arrays are memory-mapped
+        copy-on-write, so start-up does not depend on the table size and
+        later updates never modify the file. Returns (table, extra).
+        """
+        if np is None:
+            raise ImportError("NumPy is required for the Dir24_8 table (pip install numpy)")
+        with open(path, 'rb') as f:
+            if f.read(8) != cls.SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a DIR-24-8 snapshot file")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length))
+        data_start = -(-(16 + header_length) // cls.SNAPSHOT_ALIGN) * cls.SNAPSHOT_ALIGN
+
+        arrays = {}
+        for name, info in header['arrays'].items():
+            shape = tuple(info['shape'])
+            if 0 in shape:
+                # mmap cannot map zero bytes
+                arrays[name] = np.zeros(shape, dtype=info['dtype'])
+            else:
+                arrays[name] = np.memmap(path, dtype=info['dtype'], mode='c',
+                                         offset=data_start + info['offset'], shape=shape)
+
+        table = cls.__new__(cls)
+        table.width = 32
+        table.tbl24 = arrays['tbl24']
+        table.tbl24_len = arrays['tbl24_len']
+        table.tbl_long = arrays['tbl_long']
+        table.tbl_long_len = arrays['tbl_long_len']
+        table.long_blocks = header['long_blocks']
+        table.next_hops = [None] + header['next_hops']
+        table.next_hop_index = {link: i for i, link in enumerate(table.next_hops) if i}
+        table._routes = {}
+        table._snapshot_routes = (arrays['route_networks'], arrays['route_lengths'], arrays['route_hops'])
+        return table, header['extra']
@@ -0,0 +1,366 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from itertools import repeat
+from multiprocessing import shared_memory
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: pipeline.py needs NumPy (pip install numpy).")
+    exit(1)
+
+try:
+    from lpm import Dir24_8
+    from router import Router
+    from scheduler import CompactPacket, PacketBatch, PriorityScheduler
+except ImportError:
+    print("Error: Could not import from lpm.py, router.py or scheduler.py.")
+    print("Make sure they are in the same directory.")
+    exit(1)
+
+
+class ShmRing:
+    """
+    Single-producer single-consumer ring of packet batches in shared memory.
+
+    The ring has `slots` slots of up to `batch_size` packets, stored as
+    NumPy columns (dest, source, size, priority) over one SharedMemory
+    block. Two semaphores count free and filled slots, so only a wake-up
+    crosses the process boundary; the packets themselves are never pickled.
+    Worker processes must be forked so they inherit the mapping.
+    """
+
+    END_OF_STREAM = -1
+
+    def __init__(self, ctx, slots: int, batch_size: int):
+        self.slots = slots
+        self.batch_size = batch_size
+        per_slot = batch_size * (4 + 4 + 4 + 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=8 * slots + per_slot * slots)
+        buffer = self.shm.buf
+
+        self.counts = np.ndarray((slots,), dtype=np.int64, buffer=buffer, offset=0)
+        offset = 8 * slots
+        columns = []
+        for dtype in (np.uint32, np.uint32, np.uint32, np.uint8):
+            columns.append(np.ndarray((slots, batch_size), dtype=dtype, buffer=buffer, offset=offset))
+            offset += slots * batch_size * np.dtype(dtype).itemsize
+        self.dest_ip, self.source_ip, self.size, self.priority = columns
+
+        self.free = ctx.Semaphore(slots)
+        self.filled = ctx.Semaphore(0)
+        # Each side only ever touches its own position
+        self.write_position = 0
+        self.read_position = 0
+
+    def put(self, dest_ip, source_ip, size, priority, timeout: Optional[float] = None) -> bool:
+        """
+        Writes one batch into the next free slot. Returns False if no slot
+        came free within `timeout` seconds (None waits forever).
+        """
+        if not self.free.acquire(timeout=timeout):
+            return False
+        slot = self.write_position
+        count = len(dest_ip)
+        self.dest_ip[slot, :count] = dest_ip
+        self.source_ip[slot, :count] = source_ip
+        self.size[slot, :count] = size
+        self.priority[slot, :count] = priority
+        self.counts[slot] = count
+        self.write_position = (slot + 1) % self.slots
+        self.filled.release()
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        # Tells the consumer no more batches are coming
+        if not self.free.acquire(timeout=timeout):
+            return False
+        self.counts[self.write_position] = self.END_OF_STREAM
+        self.write_position = (self.write_position + 1) % self.slots
+        self.filled.release()
+        return True
+
+    def get(self):
+        """
+        Returns copies of the next batch's columns, or None at the end of
+        the stream. The slot is handed back to the producer straight away.
+        """
+        self.filled.acquire()
+        slot = self.read_position
+        count = int(self.counts[slot])
+        self.read_position = (slot + 1) % self.slots
+        if count == self.END_OF_STREAM:
+            self.free.release()
+            return None
+        batch = (self.dest_ip[slot, :count].copy(), self.source_ip[slot, :count].copy(),
+                 self.size[slot, :count].copy(), self.priority[slot, :count].copy())
+        self.free.release()
+        return batch
+
+    def release(self):
+        # Views into the buffer must go before it can be closed
+        del self.counts, self.dest_ip, self.source_ip, self.size, self.priority
+        self.shm.close()
+        self.shm.unlink()
+
+
+def flow_shards(source_ip, dest_ip, shards: int):
+    """
+    Maps each packet to a shard by hashing its (source, dest) pair, so all
+    packets of one flow are handled, and kept in order, by one worker.
+    """
+    h = (source_ip.astype(np.uint64) * 0x9E3779B1) ^ (dest_ip.astype(np.uint64) * 0x85EBCA77)
+    h ^= h >> 15
+    return (h % shards).astype(np.int64)
+
+
+def _worker(worker_id: int, ring: ShmRing, table: Optional[Dir24_8], snapshot_path: Optional[str],
+            queue_capacity: Optional[int], link_budget: Optional[int], results):
+    # The FIB is either inherited copy-on-write from the parent or
+    # memory-mapped from a snapshot file; both are shared, never copied
+    if table is None:
+        table, _ = Dir24_8.load(snapshot_path)
+
+    hop_count = len(table.next_hops)
+    link_packets = [0] * hop_count
+    link_bytes = [0] * hop_count
+    class_packets = [0] * 256
+    class_bytes = [0] * 256
+    # Batches each departed packet spent queued, summed per class
+    class_wait = [0] * 256
+    # One strict priority queue per output link, created on first use
+    schedulers = {}
+    processed = 0
+    tick = 0
+
+    def transmit(hop, scheduler):
+        # The link sends up to link_budget packets per batch interval
+        departures = scheduler.dequeue_batch(link_budget) if link_budget else scheduler.drain()
+        link_packets[hop] += len(departures)
+        for packet in departures:
+            traffic_class = packet.priority
+            class_packets[traffic_class] += 1
+            class_bytes[traffic_class] += packet.size
+            class_wait[traffic_class] += tick - packet.arrival_time
+            link_bytes[hop] += packet.size
+
+    while True:
+        batch = ring.get()
+        if batch is None:
+            break
+        dest_ip, source_ip, size, priority = batch
+
+        # Forwarding: one vectorized DIR-24-8 lookup for the whole batch
+        hops = table.lookup_batch(dest_ip).astype(np.int64)
+
+        # Scheduling: each output link's packets join its queue in arrival
+        # order (tail-dropped when their class is full), then every link
+        # sends what its budget allows
+        by_link = np.argsort(hops, kind='stable')
+        bounds = np.searchsorted(hops[by_link], np.arange(hop_count + 1))
+        for hop in np.nonzero(np.diff(bounds))[0].tolist():
+            if hop not in schedulers:
+                schedulers[hop] = PriorityScheduler(max_per_class=queue_capacity)
+            enqueue = schedulers[hop].enqueue
+            rows = by_link[bounds[hop]:bounds[hop + 1]]
+            for packet in map(CompactPacket, source_ip[rows].tolist(), dest_ip[rows].tolist(),
+                              size[rows].tolist(), priority[rows].tolist(), repeat(tick)):
+                enqueue(packet)
+        for hop, scheduler in schedulers.items():
+            transmit(hop, scheduler)
+        processed += len(dest_ip)
+        tick += 1
+
+    # Arrivals have stopped; the links keep sending until their queues empty
+    while any(schedulers.values()):
+        for hop, scheduler in schedulers.items():
+            transmit(hop, scheduler)
+        tick += 1
+
+    link_dropped = [0] * hop_count
+    class_dropped = [0] * 256
+    for hop, scheduler in schedulers.items():
+        for traffic_class, count in scheduler.dropped.items():
+            link_dropped[hop] += count
+            class_dropped[traffic_class] += count
+    results.put((worker_id, processed, np.array(link_packets), np.array(link_bytes), np.array(link_dropped),
+                 np.array(class_packets), np.array(class_bytes), np.array(class_dropped),
+                 np.array(class_wait, dtype=np.float64)))
+
+
+class ShardedPipeline:
+    """
+    Forwarding pipeline spread over `workers` forked processes.
+
+    The parent splits each trace batch by flow hash and writes the pieces
+    into one shared-memory ring per worker. Each worker routes its packets
+    with the shared, read-only DIR-24-8 FIB and queues them in its own
+    PriorityScheduler per output link, holding at most `queue_capacity`
+    packets per class. After every batch each link sends up to
+    `link_budget` packets (None: everything queued), so an overloaded link
+    builds a queue and drops its lowest classes first. Only per-link and
+    per-class totals come back at the end.
+    """
+
+    def __init__(self, router: Optional[Router] = None, snapshot_path: Optional[str] = None,
+                 workers: Optional[int] = None, batch_size: int = 8192, ring_slots: int = 8,
+                 poll_interval: float = 0.5, queue_capacity: Optional[int] = None,
+                 link_budget: Optional[int] = None):
+        if (router is None) == (snapshot_path is None):
+            raise ValueError("Give either a router or a snapshot_path")
+        if router is not None and not isinstance(router.lookup_engine, Dir24_8):
+            raise ValueError("ShardedPipeline needs a Router built with engine=Dir24_8")
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("ShardedPipeline needs the 'fork' start method")
+
+        self.table = router.lookup_engine if router is not None else None
+        self.snapshot_path = snapshot_path
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.ring_slots = ring_slots
+        self.ctx = mp.get_context("fork")
+        # How often a blocked parent checks that the workers are still alive
+        self.poll_interval = poll_interval
+        self.queue_capacity = queue_capacity
+        self.link_budget = link_budget
+
+    @staticmethod
+    def _check_workers(processes):
+        # A worker that died can never drain its ring or report back, so
+        # waiting on it would hang the parent forever
+        for shard, process in enumerate(processes):
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"Pipeline worker for shard {shard} exited with code {process.exitcode}")
+
+    def _wait(self, processes, attempt):
+        # Retries attempt(timeout) until it succeeds, checking the workers
+        # every poll_interval seconds
+        while not attempt(self.poll_interval):
+            self._check_workers(processes)
+
+    def run(self, batch: PacketBatch) -> dict:
+        start = time.perf_counter()
+        rings = [ShmRing(self.ctx, self.ring_slots, self.batch_size) for _ in range(self.workers)]
+        results = self.ctx.Queue()
+        processes = [
+            self.ctx.Process(target=_worker, args=(i, rings[i], self.table, self.snapshot_path,
+                                                   self.queue_capacity, self.link_budget, results))
+            for i in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            # Group packets by shard (stable, so flows stay in order) and
+            # feed each worker its share in ring-sized pieces
+            shards = flow_shards(batch.source_ip, batch.dest_ip, self.workers)
+            order = np.argsort(shards, kind='stable')
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(shards, minlength=self.workers))])
+            pieces = [(w, bounds[w] + lo, min(bounds[w] + lo + self.batch_size, bounds[w + 1]))
+                      for w in range(self.workers)
+                      for lo in range(0, int(bounds[w + 1] - bounds[w]), self.batch_size)]
+            # Interleave the workers so they all start right away
+            pieces.sort(key=lambda piece: (piece[1] - bounds[piece[0]], piece[0]))
+            for w, lo, hi in pieces:
+                rows = order[lo:hi]
+                columns = (batch.dest_ip[rows], batch.source_ip[rows], batch.size[rows], batch.priority[rows])
+                self._wait(processes, lambda timeout: rings[w].put(*columns, timeout=timeout))
+            for ring in rings:
+                self._wait(processes, lambda timeout: ring.close(timeout=timeout))
+
+            collected = []
+            while len(collected) < len(processes):
+                try:
+                    collected.append(results.get(timeout=self.poll_interval))
+                except queue.Empty:
+                    self._check_workers(processes)
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for ring in rings:
+                ring.release()
+
+        elapsed = time.perf_counter() - start
+        next_hops = (self.table.next_hops if self.table is not None
+                     else Dir24_8.load(self.snapshot_path)[0].next_hops)
+        (packets, bytes_sent, link_dropped, priority_packets, priority_bytes, priority_dropped,
+         priority_wait) = (sum(r[i] for r in collected) for i in range(2, 9))
+        link_names = ["Default Gateway"] + list(next_hops[1:])
+        classes = np.nonzero(priority_packets + priority_dropped)[0]
+        return {
+            'workers': self.workers,
+            'packets': int(packets.sum()),
+            'dropped': int(link_dropped.sum()),
+            'seconds': elapsed,
+            'packets_per_second': sum(r[1] for r in collected) / elapsed,
+            'per_worker_packets': {r[0]: r[1] for r in sorted(collected)},
+            'per_link': {link_names[i]: (int(packets[i]), int(bytes_sent[i])) for i in np.nonzero(packets)[0]},
+            'per_link_dropped': {link_names[i]: int(link_dropped[i]) for i in np.nonzero(link_dropped)[0]},
+            'per_priority_packets': {int(p): int(priority_packets[p]) for p in classes},
+            'per_priority_bytes': {int(p): int(priority_bytes[p]) for p in classes},
+            'per_priority_dropped': {int(p): int(priority_dropped[p]) for p in classes},
+            # Mean number of batch intervals a departed packet spent queued
+            'per_priority_wait': {int(p): float(priority_wait[p] / priority_packets[p]) if priority_packets[p] else 0.0
+                                  for p in classes},
+        }
+
+
+# --- Main execution for testing ---
+if __name__ == "__main__":
+
+    routes_list = [
+        ("223.1.1.0/24", "Link 0"),
+        ("223.1.2.0/24", "Link 1"),
+        ("223.1.3.0/24", "Link 2"),
+        ("223.1.0.0/16", "Link 4 (ISP)")
+    ]
+    router = Router(routes_list, engine=Dir24_8, verbose=False)
+
+    rng = np.random.default_rng(1)
+    count = 500_000
+    dest_ip = (np.uint32(223 << 24 | 1 << 16) | rng.integers(0, 1 << 12, count).astype(np.uint32))
+    trace = PacketBatch(rng.integers(0, 1 << 32, count, dtype=np.uint64).astype(np.uint32), dest_ip,
+                        rng.choice([64, 576, 1500], count), rng.integers(0, 3, count))
+    expected = router.route_packets(dest_ip)
+
+    print("--- Sharded Forwarding Pipeline (trace replay) ---")
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        report = ShardedPipeline(router, workers=workers).run(trace)
+        print(f"  {workers} worker(s): {report['packets_per_second']:,.0f} packets/s")
+        assert report['packets'] == count and report['dropped'] == 0
+        for link, (packets, _) in report['per_link'].items():
+            assert packets == int((expected == link).sum())
+        assert report['per_priority_packets'] == {p: int((trace.priority == p).sum()) for p in range(3)}
+        assert report['per_priority_bytes'] == {p: int(trace.size[trace.priority == p].sum()) for p in range(3)}
+        assert set(report['per_priority_wait'].values()) == {0.0}
+
+    # Link 4 (ISP) gets 13/16 of the traffic, ~6650 packets of every
+    # 8192-packet batch, but may only send 3000: class 0 still fits, class
+    # 1 gets the rest and class 2 starves, queues up and is dropped
+    report = ShardedPipeline(router, workers=1, queue_capacity=4096, link_budget=3000).run(trace)
+    arrivals = {p: int((trace.priority == p).sum()) for p in range(3)}
+    print(f"  overloaded ISP link: dropped {report['per_priority_dropped']}, "
+          f"mean wait {report['per_priority_wait']} batches")
+    assert list(report['per_link_dropped']) == ["Link 4 (ISP)"]
+    assert report['packets'] + report['dropped'] == count
+    for p in range(3):
+        assert report['per_priority_packets'][p] + report['per_priority_dropped'][p] == arrivals[p]
+    assert report['per_priority_dropped'][0] == 0 < report['per_priority_dropped'][1] < report['per_priority_dropped'][2]
+    assert report['per_priority_wait'][0] < report['per_priority_wait'][1] < report['per_priority_wait'][2]
+
+    # A worker that dies is reported instead of hanging the parent (its
+    # traceback is printed by the worker process)
+    try:
+        ShardedPipeline(snapshot_path=os.devnull, workers=2, poll_interval=0.1).run(trace)
+    except RuntimeError as error:
+        print(f"  failed worker detected: {error}")
+    else:
+        raise AssertionError("a dead worker went unnoticed")
+
+    print("\n--- All Pipeline Tests Passed ---")
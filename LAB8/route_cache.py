@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Bounded destination cache with LRU eviction, placed in front of the
+    Router's longest prefix match.
+
+    Entries are keyed by the integer destination address, so string and
+    integer lookups of one destination share one entry. Each entry also
+    keeps the address strings it was looked up by as aliases, so a string
+    hit through get_alias() skips both the address parsing and the lookup.
+    Every entry is indexed by the top 16 bits of its address, so a route
+    change only evicts the entries that fall inside the changed prefix
+    instead of flushing the whole cache. Use width=128 for an IPv6 cache.
+    """
+
+    BUCKET_BITS = 16
+
+    def __init__(self, capacity: int, width: int = 32):
+        if capacity <= 0:
+            raise ValueError("Cache capacity must be positive")
+        self.capacity = capacity
+        self.width = width
+        self.bucket_shift = width - self.BUCKET_BITS
+        # address -> (output_link, set of aliases), least recently used first
+        self.entries = OrderedDict()
+        # address string -> address, for cached entries only
+        self.aliases = {}
+        # address >> bucket_shift -> set of addresses sharing those top bits
+        self.buckets = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, address: int):
+        entry = self.entries.get(address)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(address)
+        return entry[0]
+
+    def get_alias(self, name: str):
+        """
+        The output link cached for an address string. Returns None, without
+        counting a miss, if the string is not known: the caller then parses
+        it and asks get() with the address.
+        """
+        address = self.aliases.get(name)
+        if address is None:
+            return None
+        return self.get(address)
+
+    def add_alias(self, name: str, address: int):
+        entry = self.entries.get(address)
+        if entry is not None:
+            entry[1].add(name)
+            self.aliases[name] = address
+
+    def put(self, address: int, output_link, alias: str = None):
+        entry = self.entries.get(address)
+        if entry is not None:
+            self.entries[address] = (output_link, entry[1])
+            self.entries.move_to_end(address)
+        else:
+            if len(self.entries) >= self.capacity:
+                self._discard(next(iter(self.entries)))
+                self.evictions += 1
+            self.entries[address] = (output_link, set())
+            self.buckets.setdefault(address >> self.bucket_shift, set()).add(address)
+        if alias is not None:
+            self.add_alias(alias, address)
+
+    def _discard(self, address: int):
+        _, aliases = self.entries.pop(address)
+        for name in aliases:
+            del self.aliases[name]
+        bucket_id = address >> self.bucket_shift
+        bucket = self.buckets[bucket_id]
+        bucket.discard(address)
+        if not bucket:
+            del self.buckets[bucket_id]
+
+    def invalidate(self, network: int, prefix_length: int) -> int:
+        """
+        Evicts every cached destination covered by network/prefix_length,
+        the only ones whose answer a change to that prefix can affect.
+        Returns how many entries were evicted.
+        """
+        shift = self.width - prefix_length
+        if prefix_length >= self.BUCKET_BITS:
+            # The prefix fits inside a single bucket
+            bucket_ids = [network >> self.bucket_shift]
+        else:
+            first = network >> self.bucket_shift
+            last = first + (1 << (self.BUCKET_BITS - prefix_length)) - 1
+            bucket_ids = [b for b in self.buckets if first <= b <= last]
+
+        stale = []
+        for bucket_id in bucket_ids:
+            for address in self.buckets.get(bucket_id, ()):
+                if (address >> shift) == (network >> shift):
+                    stale.append(address)
+        for address in stale:
+            self._discard(address)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self.entries.clear()
+        self.aliases.clear()
+        self.buckets.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,53 +1,282 @@
 try:
-    from ip_utils import ip_to_binary, get_network_prefix
+    import numpy as np
 except ImportError:
-    print("Error: Could not import from ip_utils.py.")
-    print("Make sure ip_utils.py is in the same directory.")
+    # NumPy is only needed for batch routing with route_packets
+    np = None
+
+try:
+    from ip_utils import ip_to_int, parse_cidr, ips_to_uint32, ipv6_to_int, int_to_ipv6, parse_cidr6, is_ipv6
+    from lpm import PatriciaTrie, Dir24_8
+    from route_cache import RouteCache
+except ImportError:
+    print("Error: Could not import from ip_utils.py, lpm.py or route_cache.py.")
+    print("Make sure ip_utils.py, lpm.py and route_cache.py are in the same directory.")
     exit(1)
 
+def read_route_dump(path: str):
+    """
+    Streams (cidr, output_link) pairs from a route dump file, one route per
+    line, without reading the whole file into memory. Lines look like
+    "10.0.0.0/8 Link 1" or "10.0.0.0/8,Link 1"; blank lines and lines
+    starting with '#' are skipped.
+    """
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if ',' in line:
+                fields = line.split(',', 1)
+            else:
+                fields = line.split(None, 1)
+            if len(fields) != 2:
+                raise ValueError(f"{path}:{line_number}: expected 'prefix link', got {line!r}")
+            yield fields[0].strip(), fields[1].strip()
+
 class Router:
 
-    def __init__(self, routes: list):
+    def __init__(self, routes: list, engine=PatriciaTrie, verbose: bool = True, cache_size: int = 0,
+                 engine6=PatriciaTrie):
+
+        # self.routes maps (network_address, prefix_length) -> output_link.
+        # It is the source of truth for what is installed; the lookup
+        # engine answers the actual longest prefix match queries. Any class
+        # from lpm.py (or one with the same insert/remove/lookup methods)
+        # can be plugged in here.
+        self.__routes = {}
+        self.lookup_engine = engine(32)
+
+        # IPv6 routes live in their own table and engine (128-bit keys).
+        # The path-compressed trie only creates nodes where prefixes branch,
+        # so memory stays proportional to the number of prefixes.
+        self.routes6 = {}
+        self.lookup_engine6 = engine6(128)
 
-        # self.forwarding_table will store tuples of:
-        # (binary_prefix, prefix_length, output_link)
-        self.forwarding_table = self.__build_forwarding_table(routes)
+        # Optional destination caches in front of the lookup (0 = disabled)
+        self.cache = RouteCache(cache_size) if cache_size > 0 else None
+        self.cache6 = RouteCache(cache_size, width=128) if cache_size > 0 else None
 
-    def __build_forwarding_table(self, routes: list) -> list:
+        self.__build_forwarding_table(routes, verbose)
+
+    @property
+    def routes(self) -> dict:
+        # A router loaded from a snapshot copies the routes out of its
+        # engine only when something first needs them
+        if self.__routes is None:
+            self.__routes = dict(self.lookup_engine.routes)
+        return self.__routes
+
+    def __select_table(self, address: str) -> tuple:
+        # Picks the IPv4 or IPv6 (routes, engine, cache) for an address or CIDR
+        if is_ipv6(address):
+            return self.routes6, self.lookup_engine6, self.cache6
+        return self.routes, self.lookup_engine, self.cache
+
+    def __parse(self, cidr: str) -> tuple:
+        return parse_cidr6(cidr) if is_ipv6(cidr) else parse_cidr(cidr)
+
+    def __build_forwarding_table(self, routes: list, verbose: bool):
 
-        processed_table = []
         for cidr, output_link in routes:
-            # Get the binary prefix from the CIDR string
-            binary_prefix = get_network_prefix(cidr)
-            # Get the length of the prefix
-            prefix_length = len(binary_prefix)
-            # Store the prefix, its length, and the link
-            processed_table.append((binary_prefix, prefix_length, output_link))
-        
-        processed_table.sort(key=lambda item: item[1], reverse=True)
-        
-        print("--- Built and Sorted Forwarding Table (Longest to Shortest) ---")
-        for prefix, length, link in processed_table:
-            print(f"  Prefix: {prefix:<32} (/{length}) -> {link}")
-        print("-" * 60)
-        
-        return processed_table
+            # Get the network address (host bits cleared) and prefix length
+            key = self.__parse(cidr)
+            table, engine, _ = self.__select_table(cidr)
+            # For duplicate prefixes the route listed first wins,
+            # exactly like the first match of the old sorted scan
+            if key not in table:
+                table[key] = output_link
+                engine.insert(key[0], key[1], output_link)
+
+        if verbose:
+            print("--- Built and Sorted Forwarding Table (Longest to Shortest) ---")
+            for network, length, link in self.forwarding_table:
+                prefix = format(network, '032b')[:length]
+                print(f"  Prefix: {prefix:<32} (/{length}) -> {link}")
+            for network, length, link in self.forwarding_table6:
+                prefix = f"{int_to_ipv6(network)}/{length}"
+                print(f"  Prefix: {prefix:<32} (/{length}) -> {link}")
+            print("-" * 60)
+
+    @staticmethod
+    def __sorted_table(routes: dict) -> list:
+        table = [(network, length, link) for (network, length), link in routes.items()]
+        table.sort(key=lambda item: item[1], reverse=True)
+        return table
+
+    @property
+    def forwarding_table(self) -> list:
+        # (network_address, prefix_length, output_link) tuples, longest
+        # prefix first. Built on demand, only for display.
+        return self.__sorted_table(self.routes)
+
+    @property
+    def forwarding_table6(self) -> list:
+        return self.__sorted_table(self.routes6)
+
+    # --- Snapshots ---
+
+    def save_snapshot(self, path: str):
+        """
+        Saves the IPv4 forwarding table as a DIR-24-8 snapshot file that
+        from_snapshot() can memory-map. IPv6 routes are stored with it as
+        a plain route list.
+        """
+        table = self.lookup_engine
+        if not isinstance(table, Dir24_8):
+            # Other engines have no flat layout to save, so convert
+            table = Dir24_8()
+            for (network, length), output_link in self.routes.items():
+                table.insert(network, length, output_link)
+        routes6 = [[f"{int_to_ipv6(network)}/{length}", link] for (network, length), link in self.routes6.items()]
+        table.save(path, extra={'routes6': routes6})
+
+    @classmethod
+    def from_snapshot(cls, path: str, cache_size: int = 0, engine6=PatriciaTrie):
+        """
+        Starts a router from a snapshot file without re-parsing any IPv4
+        prefix: the DIR-24-8 arrays are memory-mapped as they are.
+        """
+        table, extra = Dir24_8.load(path)
+        routes6 = [tuple(route) for route in extra['routes6']]
+        router = cls(routes6, engine=lambda width: table, verbose=False,
+                     cache_size=cache_size, engine6=engine6)
+        router.__routes = None
+        return router
+
+    # --- Incremental route updates ---
+
+    def add_route(self, cidr: str, output_link):
+        """
+        Installs a route, or overwrites the link of an existing one.
+        Returns the previous link for this prefix, or None.
+        """
+        key = self.__parse(cidr)
+        table, engine, cache = self.__select_table(cidr)
+        previous = table.get(key)
+        table[key] = output_link
+        engine.insert(key[0], key[1], output_link)
+        if cache is not None:
+            cache.invalidate(key[0], key[1])
+        return previous
+
+    def withdraw_route(self, cidr: str):
+        """Removes the route for this prefix and returns its link."""
+        key = self.__parse(cidr)
+        table, engine, cache = self.__select_table(cidr)
+        if key not in table:
+            raise ValueError(f"No route installed for {cidr}")
+        engine.remove(key[0], key[1])
+        if cache is not None:
+            cache.invalidate(key[0], key[1])
+        return table.pop(key)
+
+    def replace_route(self, cidr: str, output_link):
+        """Changes the link of an installed route and returns the old one."""
+        key = self.__parse(cidr)
+        table, _, _ = self.__select_table(cidr)
+        if key not in table:
+            raise ValueError(f"No route installed for {cidr}")
+        return self.add_route(cidr, output_link)
+
+    def apply_updates(self, updates) -> int:
+        """
+        Applies a batch of updates in order. Each update is a tuple:
+          ("add", cidr, output_link), ("replace", cidr, output_link)
+          or ("withdraw", cidr)
+        Returns the number of updates applied.
+        """
+        count = 0
+        for update in updates:
+            action = update[0]
+            if action == "add":
+                self.add_route(update[1], update[2])
+            elif action == "replace":
+                self.replace_route(update[1], update[2])
+            elif action == "withdraw":
+                self.withdraw_route(update[1])
+            else:
+                raise ValueError(f"Unknown route update action: {action!r}")
+            count += 1
+        return count
 
     def route_packet(self, dest_ip: str) -> str:
 
-        # (a) Convert the destination IP to 32-bit binary
-        binary_dest_ip = ip_to_binary(dest_ip)
-        
-        # (b) Iterate through the sorted forwarding table
-        for binary_prefix, prefix_len, output_link in self.forwarding_table:
-            
-            # (c) Check if the binary destination IP starts with the binary prefix
-            if binary_dest_ip.startswith(binary_prefix):
-                # (d) First match is the longest match 
+        _, engine, cache = self.__select_table(dest_ip)
+
+        # (a) Popular destinations are answered straight from the cache;
+        #     an address string seen before skips even the parsing
+        if cache is not None:
+            output_link = cache.get_alias(dest_ip)
+            if output_link is not None:
+                return output_link
+
+        # (b) Convert the destination IP to an integer (32 or 128 bits)
+        dest_address = ipv6_to_int(dest_ip) if is_ipv6(dest_ip) else ip_to_int(dest_ip)
+
+        # The address may be cached already, by route_address() or under
+        # another spelling: then this string becomes an alias of its entry
+        if cache is not None:
+            output_link = cache.get(dest_address)
+            if output_link is not None:
+                cache.add_alias(dest_ip, dest_address)
                 return output_link
-                
-        # (e) If no match is found after checking all routes
-        return "Default Gateway"
+
+        # (c) Ask the lookup engine for the longest matching prefix.
+        #     If no route matches, the packet goes to the default gateway.
+        output_link = engine.lookup(dest_address)
+        if output_link is None:
+            output_link = "Default Gateway"
+
+        if cache is not None:
+            cache.put(dest_address, output_link, alias=dest_ip)
+        return output_link
+
+    def route_address(self, dest_address: int) -> str:
+        """
+        Same as route_packet for an IPv4 destination that is already a
+        32-bit integer, skipping the string parsing.
+        """
+        if self.cache is not None:
+            output_link = self.cache.get(dest_address)
+            if output_link is not None:
+                return output_link
+
+        output_link = self.lookup_engine.lookup(dest_address)
+        if output_link is None:
+            output_link = "Default Gateway"
+
+        if self.cache is not None:
+            self.cache.put(dest_address, output_link)
+        return output_link
+
+    def route_packets(self, dest_addresses):
+        """
+        Routes a whole batch of IPv4 destinations at once. Takes a NumPy
+        array of uint32 addresses (or a list of dotted-quad strings) and
+        returns a NumPy object array with the output link for each one.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for route_packets (pip install numpy)")
+
+        addresses = np.asarray(dest_addresses)
+        if addresses.dtype.kind in "UO":
+            addresses = ips_to_uint32(addresses.tolist())
+
+        # Array-backed engines (Dir24_8) resolve the batch with array
+        # indexing and hand back indices into their next_hops list
+        if hasattr(self.lookup_engine, "lookup_batch"):
+            hop_indices = self.lookup_engine.lookup_batch(addresses)
+            links = np.array(self.lookup_engine.next_hops, dtype=object)
+            links[0] = "Default Gateway"
+            return links[hop_indices]
+
+        # Other engines fall back to one lookup per address
+        lookup = self.lookup_engine.lookup
+        results = np.empty(len(addresses), dtype=object)
+        for i, address in enumerate(addresses.tolist()):
+            output_link = lookup(address)
+            results[i] = "Default Gateway" if output_link is None else output_link
+        return results
 
 if __name__ == "__main__":
     
@@ -80,6 +309,74 @@ if __name__ == "__main__":
     assert my_router.route_packet("223.1.2.5") == "Link 1"
     assert my_router.route_packet("223.1.250.1") == "Link 4 (ISP)"
     assert my_router.route_packet("198.51.100.1") == "Default Gateway"
+
+    # 4. Batch routing with the array-backed DIR-24-8 table
+    if np is not None:
+        print("\n--- Testing Batch Routing (DIR-24-8) ---")
+        dir_router = Router(routes_list, engine=Dir24_8)
+        batch_result = dir_router.route_packets(test_ips)
+        print(f'route_packets({test_ips}) -> {batch_result.tolist()}')
+        assert batch_result.tolist() == [my_router.route_packet(ip) for ip in test_ips]
+
+    # 5. Incremental updates, without rebuilding the table
+    print("\n--- Testing Route Updates ---")
+    applied = my_router.apply_updates([
+        ("add", "223.1.250.0/24", "Link 3"),
+        ("replace", "223.1.2.0/24", "Link 5"),
+        ("withdraw", "223.1.1.0/24"),
+    ])
+    print(f"Applied {applied} updates")
+    assert my_router.route_packet("223.1.250.1") == "Link 3"
+    assert my_router.route_packet("223.1.2.5") == "Link 5"
+    assert my_router.route_packet("223.1.1.100") == "Link 4 (ISP)"
+
+    # 6. Destination cache, invalidated by covering route changes only
+    print("\n--- Testing Destination Cache ---")
+    cached_router = Router(routes_list, verbose=False, cache_size=2)
+    for ip in ["223.1.1.100", "223.1.1.100", "223.1.2.5", "198.51.100.1"]:
+        cached_router.route_packet(ip)
+    cached_router.add_route("223.1.2.0/25", "Link 6")
+    assert cached_router.route_packet("223.1.2.5") == "Link 6"
+    assert cached_router.route_packet("198.51.100.1") == "Default Gateway"
+    print(cached_router.cache.stats())
+    assert cached_router.cache.stats()['hits'] == 2
+    assert cached_router.cache.stats()['evictions'] == 1
+    assert cached_router.cache.stats()['invalidations'] == 1
+    # Both entry points share one entry per destination
+    assert cached_router.route_address(ip_to_int("198.51.100.1")) == "Default Gateway"
+    assert cached_router.cache.stats()['hits'] == 3 and len(cached_router.cache) == 2
+    assert cached_router.route_address(ip_to_int("223.1.1.7")) == "Link 0"
+    assert cached_router.route_packet("223.1.1.7") == "Link 0"
+    assert cached_router.cache.stats()['hits'] == 4 and cached_router.cache.aliases.get("223.1.1.7") is not None
+
+    # 7. Dual-stack routing: IPv6 prefixes next to the IPv4 ones
+    print("\n--- Testing IPv6 Routing ---")
+    dual_router = Router(routes_list + [
+        ("2001:db8::/32", "Link 7"),
+        ("2001:db8:1::/48", "Link 8"),
+    ], verbose=False)
+    for ip in ["2001:db8:1::5", "2001:db8:2::5", "2001:db9::1", "223.1.1.100"]:
+        print(f'route_packet("{ip}") -> {dual_router.route_packet(ip)}')
+    assert dual_router.route_packet("2001:db8:1::5") == "Link 8"
+    assert dual_router.route_packet("2001:db8:2::5") == "Link 7"
+    assert dual_router.route_packet("2001:db9::1") == "Default Gateway"
+    assert dual_router.route_packet("223.1.1.100") == "Link 0"
+    dual_router.withdraw_route("2001:db8:1::/48")
+    assert dual_router.route_packet("2001:db8:1::5") == "Link 7"
+
+    # 8. Snapshot round trip
+    if np is not None:
+        import os
+        import tempfile
+        print("\n--- Testing FIB Snapshot ---")
+        snapshot_path = os.path.join(tempfile.mkdtemp(), "fib.snapshot")
+        dual_router.save_snapshot(snapshot_path)
+        restored = Router.from_snapshot(snapshot_path)
+        for ip in test_ips + ["2001:db8:1::5", "2001:db9::1"]:
+            assert restored.route_packet(ip) == dual_router.route_packet(ip)
+        assert restored.routes == dual_router.routes
+        print(f"Snapshot of {len(restored.routes)} IPv4 and {len(restored.routes6)} IPv6 routes restored")
+        os.remove(snapshot_path)
     
 
     print("\n--- All Test Cases Passed ---")
@@ -1,7 +1,24 @@
+import heapq
+import itertools
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Union
 
-# 1. Packet Class
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only needed for PacketBatch
+    np = None
+
+try:
+    from ip_utils import ip_to_int, ips_to_uint32
+except ImportError:
+    print("Error: Could not import from ip_utils.py.")
+    print("Make sure ip_utils.py is in the same directory.")
+    exit(1)
+
+# 1. Packet Classes
 @dataclass
 class Packet:
     """
@@ -13,14 +30,357 @@ class Packet:
     payload: str
     priority: int
 
+    @property
+    def size(self) -> int:
+        # Schedulers that account in bytes use the payload length
+        return len(self.payload)
+
+@dataclass(slots=True)
+class CompactPacket:
+    """
+    Slotted packet for the scheduler hot path: integer addresses, a size
+    instead of the payload, and no per-instance __dict__.
+    """
+    source_ip: int
+    dest_ip: int
+    size: int
+    priority: int
+    arrival_time: float = 0.0
+
+    @classmethod
+    def from_packet(cls, packet: Packet, arrival_time: float = 0.0) -> "CompactPacket":
+        return cls(ip_to_int(packet.source_ip), ip_to_int(packet.dest_ip),
+                   packet.size, packet.priority, arrival_time)
+
+class PacketBatch:
+    """
+    Struct-of-arrays packet batch: one NumPy column per field, so holding
+    millions of packets costs 21 bytes each instead of a Python object.
+    Indexing with an integer gives a CompactPacket; take() reorders or
+    selects rows and returns a new batch.
+    """
+
+    def __init__(self, source_ip, dest_ip, size, priority, arrival_time=None):
+        if np is None:
+            raise ImportError("NumPy is required for PacketBatch (pip install numpy)")
+        self.source_ip = np.asarray(source_ip, dtype=np.uint32)
+        self.dest_ip = np.asarray(dest_ip, dtype=np.uint32)
+        self.size = np.asarray(size, dtype=np.uint32)
+        self.priority = np.asarray(priority, dtype=np.uint8)
+        if arrival_time is None:
+            arrival_time = np.zeros(len(self.source_ip))
+        self.arrival_time = np.asarray(arrival_time, dtype=np.float64)
+
+    @classmethod
+    def from_packets(cls, packets: List[Packet]) -> "PacketBatch":
+        return cls(ips_to_uint32([p.source_ip for p in packets]),
+                   ips_to_uint32([p.dest_ip for p in packets]),
+                   [p.size for p in packets],
+                   [p.priority for p in packets])
+
+    def take(self, indices) -> "PacketBatch":
+        return PacketBatch(self.source_ip[indices], self.dest_ip[indices], self.size[indices],
+                           self.priority[indices], self.arrival_time[indices])
+
+    def __getitem__(self, index: int) -> CompactPacket:
+        return CompactPacket(int(self.source_ip[index]), int(self.dest_ip[index]), int(self.size[index]),
+                             int(self.priority[index]), float(self.arrival_time[index]))
+
+    def __len__(self):
+        return len(self.source_ip)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.source_ip.nbytes + self.dest_ip.nbytes + self.size.nbytes
+                + self.priority.nbytes + self.arrival_time.nbytes)
+
 # 2. FIFO Scheduler
-def fifo_scheduler(packet_list: List[Packet]) -> List[Packet]:
+def fifo_scheduler(packet_list: Union[List[Packet], PacketBatch]) -> Union[List[Packet], PacketBatch]:
+    if isinstance(packet_list, PacketBatch):
+        return packet_list.take(np.arange(len(packet_list)))
     return list(packet_list)
 
 # 3. Priority Scheduler
-def priority_scheduler(packet_list: List[Packet]) -> List[Packet]:
+def priority_scheduler(packet_list: Union[List[Packet], PacketBatch]) -> Union[List[Packet], PacketBatch]:
+    if isinstance(packet_list, PacketBatch):
+        # A stable argsort keeps arrival order within a priority, like sorted()
+        return packet_list.take(np.argsort(packet_list.priority, kind='stable'))
     return sorted(packet_list, key=lambda packet: packet.priority)
 
+# 4. Online Schedulers
+#
+# The functions above work on a finished list of packets. The classes below
+# take packets one at a time as they arrive, so they can sit inside a live
+# forwarding loop. They share one interface: enqueue() returns False when
+# the packet is tail-dropped, dequeue() returns the next packet or None,
+# and dequeue_batch()/drain() hand out several packets at once.
+
+class FIFOScheduler:
+    """
+    First-in first-out queue with an optional capacity (tail-drop).
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.queue = deque()
+        self.dropped = 0
+
+    def enqueue(self, packet: Packet) -> bool:
+        if self.capacity is not None and len(self.queue) >= self.capacity:
+            self.dropped += 1
+            return False
+        self.queue.append(packet)
+        return True
+
+    def dequeue(self) -> Optional[Packet]:
+        return self.queue.popleft() if self.queue else None
+
+    def dequeue_batch(self, max_packets: int) -> List[Packet]:
+        count = min(max_packets, len(self.queue))
+        return [self.queue.popleft() for _ in range(count)]
+
+    def drain(self) -> List[Packet]:
+        packets = list(self.queue)
+        self.queue.clear()
+        return packets
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class PriorityScheduler:
+    """
+    Strict priority queue on a binary heap: O(log n) enqueue and dequeue.
+
+    Heap entries are (priority, sequence, packet). The sequence number
+    grows with every arrival, so packets of the same priority leave in
+    arrival order, just like the stable sort in priority_scheduler().
+    Each priority class can be capped at `max_per_class` queued packets;
+    arrivals beyond that are tail-dropped and counted per class.
+    """
+
+    def __init__(self, max_per_class: Optional[int] = None):
+        self.max_per_class = max_per_class
+        self.heap = []
+        self.sequence = itertools.count()
+        self.queued: Dict[int, int] = {}
+        self.dropped: Dict[int, int] = {}
+
+    def enqueue(self, packet: Packet) -> bool:
+        priority = packet.priority
+        queued = self.queued.get(priority, 0)
+        if self.max_per_class is not None and queued >= self.max_per_class:
+            self.dropped[priority] = self.dropped.get(priority, 0) + 1
+            return False
+        self.queued[priority] = queued + 1
+        heapq.heappush(self.heap, (priority, next(self.sequence), packet))
+        return True
+
+    def dequeue(self) -> Optional[Packet]:
+        if not self.heap:
+            return None
+        priority, _, packet = heapq.heappop(self.heap)
+        self.queued[priority] -= 1
+        return packet
+
+    def dequeue_batch(self, max_packets: int) -> List[Packet]:
+        batch = []
+        while self.heap and len(batch) < max_packets:
+            batch.append(self.dequeue())
+        return batch
+
+    def drain(self) -> List[Packet]:
+        return self.dequeue_batch(len(self.heap))
+
+    def __len__(self):
+        return len(self.heap)
+
+# 5. Fair Queueing Schedulers
+#
+# Strict priority starves the low classes under load. Deficit Round Robin
+# and Weighted Fair Queueing instead share the link between classes in
+# proportion to their weights, counting bytes (payload length) rather than
+# packets. Both keep per-class statistics so the shares can be checked.
+
+class SchedulerStats:
+    """
+    Per-class counters: packets and bytes sent, drops, queueing delay.
+    """
+
+    def __init__(self):
+        self.packets: Dict[int, int] = {}
+        self.bytes: Dict[int, int] = {}
+        self.dropped: Dict[int, int] = {}
+        self.total_delay: Dict[int, float] = {}
+        self.max_delay: Dict[int, float] = {}
+
+    def record_drop(self, traffic_class: int):
+        self.dropped[traffic_class] = self.dropped.get(traffic_class, 0) + 1
+
+    def record_sent(self, traffic_class: int, size: int, delay: float):
+        self.packets[traffic_class] = self.packets.get(traffic_class, 0) + 1
+        self.bytes[traffic_class] = self.bytes.get(traffic_class, 0) + size
+        self.total_delay[traffic_class] = self.total_delay.get(traffic_class, 0.0) + delay
+        if delay > self.max_delay.get(traffic_class, 0.0):
+            self.max_delay[traffic_class] = delay
+
+    def summary(self) -> Dict[int, dict]:
+        total_bytes = sum(self.bytes.values())
+        classes = sorted(set(self.packets) | set(self.dropped))
+        return {
+            c: {
+                'packets': self.packets.get(c, 0),
+                'bytes': self.bytes.get(c, 0),
+                'byte_share': self.bytes.get(c, 0) / total_bytes if total_bytes else 0.0,
+                'dropped': self.dropped.get(c, 0),
+                'mean_delay': self.total_delay.get(c, 0.0) / self.packets[c] if self.packets.get(c) else 0.0,
+                'max_delay': self.max_delay.get(c, 0.0),
+            }
+            for c in classes
+        }
+
+
+def _unknown_class(traffic_class, weights) -> ValueError:
+    return ValueError(f"Traffic class {traffic_class!r} has no weight "
+                      f"(configured classes: {sorted(weights)})")
+
+
+class DRRScheduler:
+    """
+    Deficit Round Robin over traffic classes (packet.priority).
+
+    Each round, a class earns quantum * weight bytes of credit and sends
+    head-of-line packets while the credit covers them. With the quantum at
+    least as large as the biggest packet, every dequeue is O(1).
+    """
+
+    def __init__(self, weights: Dict[int, float], quantum: int = 1500,
+                 max_per_class: Optional[int] = None, clock=time.perf_counter):
+        self.quanta = {c: quantum * weight for c, weight in weights.items()}
+        self.max_per_class = max_per_class
+        self.clock = clock
+        self.queues: Dict[int, deque] = {c: deque() for c in weights}
+        self.deficit: Dict[int, float] = {c: 0 for c in weights}
+        # Classes with queued packets, in round-robin order
+        self.active = deque()
+        self.quantum_added = False
+        self.size = 0
+        self.stats = SchedulerStats()
+
+    def enqueue(self, packet: Packet) -> bool:
+        traffic_class = packet.priority
+        queue = self.queues.get(traffic_class)
+        if queue is None:
+            raise _unknown_class(traffic_class, self.queues)
+        if self.max_per_class is not None and len(queue) >= self.max_per_class:
+            self.stats.record_drop(traffic_class)
+            return False
+        if not queue:
+            self.active.append(traffic_class)
+        queue.append((self.clock(), packet))
+        self.size += 1
+        return True
+
+    def dequeue(self) -> Optional[Packet]:
+        while self.active:
+            traffic_class = self.active[0]
+            if not self.quantum_added:
+                # The class just reached the head of the round
+                self.deficit[traffic_class] += self.quanta[traffic_class]
+                self.quantum_added = True
+
+            queue = self.queues[traffic_class]
+            size = queue[0][1].size
+            if size > self.deficit[traffic_class]:
+                # Not enough credit left: move on to the next class
+                self.active.rotate(-1)
+                self.quantum_added = False
+                continue
+
+            self.deficit[traffic_class] -= size
+            arrival, packet = queue.popleft()
+            if not queue:
+                # An idle class does not keep its credit
+                self.deficit[traffic_class] = 0
+                self.active.popleft()
+                self.quantum_added = False
+            self.size -= 1
+            self.stats.record_sent(traffic_class, size, self.clock() - arrival)
+            return packet
+        return None
+
+    def dequeue_batch(self, max_packets: int) -> List[Packet]:
+        batch = []
+        while self.size and len(batch) < max_packets:
+            batch.append(self.dequeue())
+        return batch
+
+    def drain(self) -> List[Packet]:
+        return self.dequeue_batch(self.size)
+
+    def __len__(self):
+        return self.size
+
+
+class WFQScheduler:
+    """
+    Weighted Fair Queueing with self-clocked virtual time (SCFQ).
+
+    Every packet gets a virtual finish tag
+        finish = max(virtual_time, last_finish[class]) + size / weight
+    and packets leave in order of finish tag from a heap, so enqueue and
+    dequeue are O(log n). The virtual time is the tag of the packet last
+    sent, which avoids simulating the ideal fluid (GPS) system.
+    """
+
+    def __init__(self, weights: Dict[int, float], max_per_class: Optional[int] = None,
+                 clock=time.perf_counter):
+        self.weights = dict(weights)
+        self.max_per_class = max_per_class
+        self.clock = clock
+        self.heap = []
+        self.sequence = itertools.count()
+        self.virtual_time = 0.0
+        self.last_finish: Dict[int, float] = {c: 0.0 for c in weights}
+        self.queued: Dict[int, int] = {c: 0 for c in weights}
+        self.stats = SchedulerStats()
+
+    def enqueue(self, packet: Packet) -> bool:
+        traffic_class = packet.priority
+        if traffic_class not in self.weights:
+            raise _unknown_class(traffic_class, self.weights)
+        if self.max_per_class is not None and self.queued[traffic_class] >= self.max_per_class:
+            self.stats.record_drop(traffic_class)
+            return False
+        size = packet.size
+        finish = max(self.virtual_time, self.last_finish[traffic_class]) + size / self.weights[traffic_class]
+        self.last_finish[traffic_class] = finish
+        self.queued[traffic_class] += 1
+        heapq.heappush(self.heap, (finish, next(self.sequence), self.clock(), packet))
+        return True
+
+    def dequeue(self) -> Optional[Packet]:
+        if not self.heap:
+            return None
+        finish, _, arrival, packet = heapq.heappop(self.heap)
+        self.virtual_time = finish
+        traffic_class = packet.priority
+        self.queued[traffic_class] -= 1
+        self.stats.record_sent(traffic_class, packet.size, self.clock() - arrival)
+        return packet
+
+    def dequeue_batch(self, max_packets: int) -> List[Packet]:
+        batch = []
+        while self.heap and len(batch) < max_packets:
+            batch.append(self.dequeue())
+        return batch
+
+    def drain(self) -> List[Packet]:
+        return self.dequeue_batch(len(self.heap))
+
+    def __len__(self):
+        return len(self.heap)
+
 # --- Main execution for testing ---
 if __name__ == "__main__":
 
@@ -57,3 +417,67 @@ if __name__ == "__main__":
     assert priority_payloads == expected_priority
 
     print("Priority Test: Passed")
+
+    # --- Test the compact packet representations ---
+    if np is not None:
+        batch = PacketBatch.from_packets(packets_arrival_order)
+        batch_priority = priority_scheduler(batch)
+        order = [packets_arrival_order.index(p) for p in priority_result]
+        assert batch_priority.dest_ip.tolist() == batch.dest_ip[order].tolist()
+        assert fifo_scheduler(batch).dest_ip.tolist() == batch.dest_ip.tolist()
+        assert batch_priority[0] == CompactPacket.from_packet(priority_result[0])
+        print("PacketBatch Test: Passed")
+
+    # --- Test the online schedulers ---
+    print("\n--- Testing Online Priority Scheduler ---")
+    online = PriorityScheduler(max_per_class=1)
+    accepted = [online.enqueue(p) for p in packets_arrival_order]
+    print(f"Accepted: {accepted}")
+    assert accepted == [True, False, True, True, False]
+    assert online.dropped == {2: 1, 0: 1}
+    online_payloads = [p.payload for p in online.drain()]
+    print(online_payloads)
+    assert online_payloads == ["VOIP Packet 1", "Video Packet 1", "Data Packet 1"]
+
+    # Unbounded, packets arriving one by one give the same order as the sort
+    online = PriorityScheduler()
+    for p in packets_arrival_order:
+        online.enqueue(p)
+    first_two = [p.payload for p in online.dequeue_batch(2)]
+    rest = [p.payload for p in online.drain()]
+    assert first_two + rest == expected_priority
+    assert online.dequeue() is None
+
+    fifo_online = FIFOScheduler(capacity=3)
+    for p in packets_arrival_order:
+        fifo_online.enqueue(p)
+    assert [p.payload for p in fifo_online.drain()] == expected_fifo[:3]
+    assert fifo_online.dropped == 2
+
+    print("Online Scheduler Tests: Passed")
+
+    # --- Test the fair queueing schedulers under overload ---
+    # Every class always has packets waiting, so the byte shares should
+    # follow the 4:2:1 weights instead of the high class taking everything
+    print("\n--- Testing DRR and WFQ Schedulers ---")
+    weights = {0: 4, 1: 2, 2: 1}
+    for scheduler in (DRRScheduler(weights, quantum=100), WFQScheduler(weights)):
+        for i in range(3000):
+            for p in packets_arrival_order:
+                scheduler.enqueue(Packet(p.source_ip, p.dest_ip, p.payload * (1 + i % 3), p.priority))
+        scheduler.dequeue_batch(3000)
+        shares = {c: round(info['byte_share'], 2) for c, info in scheduler.stats.summary().items()}
+        print(f"{type(scheduler).__name__} byte shares: {shares}")
+        assert all(abs(shares[c] - weights[c] / 7) < 0.02 for c in weights)
+
+    # A class without a weight is refused with the configured ones listed
+    for scheduler in (DRRScheduler({0: 1, 1: 1}), WFQScheduler({0: 1, 1: 1})):
+        try:
+            scheduler.enqueue(packets_arrival_order[0])
+        except ValueError as error:
+            assert "class 2" in str(error) and "[0, 1]" in str(error)
+        else:
+            raise AssertionError(f"{type(scheduler).__name__} accepted an unknown class")
+        assert len(scheduler) == 0
+
+    print("Fair Queueing Tests: Passed")